@@ -0,0 +1,42 @@
+# analytics/admin.py
+
+from django.contrib import admin
+from .models import RestaurantSalesRollup, ItemSalesRollup, ItemNeighbor, ComboSuggestion
+
+
+@admin.register(RestaurantSalesRollup)
+class RestaurantSalesRollupAdmin(admin.ModelAdmin):
+    """Restaurant sales rollup admin (read-mostly, rebuilt by rebuild_rollups)"""
+    list_display = ['restaurant', 'period', 'period_start', 'order_count', 'item_quantity', 'revenue', 'recommended_count']
+    list_filter = ['period']
+    list_select_related = ['restaurant']
+    raw_id_fields = ['restaurant']
+    show_full_result_count = False
+
+
+@admin.register(ItemSalesRollup)
+class ItemSalesRollupAdmin(admin.ModelAdmin):
+    """Item sales rollup admin"""
+    list_display = ['item', 'period', 'period_start', 'order_count', 'quantity', 'revenue', 'recommended_count']
+    list_filter = ['period']
+    list_select_related = ['item__restaurant']
+    raw_id_fields = ['item', 'restaurant']
+    show_full_result_count = False
+
+
+@admin.register(ItemNeighbor)
+class ItemNeighborAdmin(admin.ModelAdmin):
+    """Precomputed "customers also ordered" lists (rebuilt by build_item_neighbors)"""
+    list_display = ['item', 'rank', 'neighbor', 'score', 'order_count']
+    list_select_related = ['item__restaurant', 'neighbor__restaurant']
+    raw_id_fields = ['item', 'neighbor']
+    show_full_result_count = False
+
+
+@admin.register(ComboSuggestion)
+class ComboSuggestionAdmin(admin.ModelAdmin):
+    """Mined combo suggestions (replaced by every mine_combos run)"""
+    list_display = ['restaurant', 'rank', 'item_ids', 'order_count', 'support', 'avg_totalprice', 'built_at']
+    list_select_related = ['restaurant']
+    raw_id_fields = ['restaurant']
+    show_full_result_count = False
@@ -0,0 +1,195 @@
+# analytics/baskets.py
+
+import math
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count
+
+from orders.models import Order, OrderItem
+from restaurants.models import Item
+from .models import ComboSuggestion
+
+MIN_SUPPORT = 0.01  # share of a restaurant's orders
+MIN_ORDERS = 5  # absolute floor, so small restaurants don't get one-off baskets
+MAX_SIZE = 4
+TOP_COMBOS = 20
+LINES_PER_CHUNK = 5000
+
+
+class _Node:
+    __slots__ = ('item', 'count', 'cents', 'parent', 'children')
+
+    def __init__(self, item, parent):
+        self.item = item
+        self.count = 0
+        self.cents = 0
+        self.parent = parent
+        self.children = {}
+
+
+class FPTree:
+    """
+    FP-growth prefix tree of baskets
+    Every node also sums the totals (in cents) of the orders through it, so
+    the average order value of an itemset comes out of the same pass as its
+    support.
+    """
+
+    def __init__(self):
+        self.root = _Node(None, None)
+        self.nodes = {}  # item -> nodes holding it
+
+    def insert(self, items, count=1, cents=0):
+        """Add a basket; items must follow the tree's item order (most frequent first)"""
+        node = self.root
+        for item in items:
+            child = node.children.get(item)
+            if child is None:
+                child = node.children[item] = _Node(item, node)
+                self.nodes.setdefault(item, []).append(child)
+            child.count += count
+            child.cents += cents
+            node = child
+
+
+def _prefix_paths(nodes):
+    """Conditional pattern base of an item: (path from the root, count, cents) per node"""
+    for node in nodes:
+        path = []
+        parent = node.parent
+        while parent.item is not None:
+            path.append(parent.item)
+            parent = parent.parent
+        path.reverse()
+        yield path, node.count, node.cents
+
+
+def mine_tree(tree, min_count, max_size, suffix=()):
+    """Yield (itemset, order count, total cents) for every frequent itemset of two or more items"""
+    for item, nodes in tree.nodes.items():
+        count = sum(node.count for node in nodes)
+        if count < min_count:
+            continue
+        itemset = suffix + (item,)
+        if len(itemset) >= 2:
+            yield tuple(sorted(itemset)), count, sum(node.cents for node in nodes)
+        if len(itemset) >= max_size:
+            continue
+
+        paths = list(_prefix_paths(nodes))
+        counts = Counter()
+        for path, path_count, _ in paths:
+            for other in path:
+                counts[other] += path_count
+        conditional = FPTree()
+        for path, path_count, cents in paths:
+            kept = [other for other in path if counts[other] >= min_count]
+            if kept:
+                conditional.insert(kept, path_count, cents)
+        if conditional.nodes:
+            yield from mine_tree(conditional, min_count, max_size, itemset)
+
+
+def _baskets(restaurant_id, chunk_size):
+    """Yield (item ids, order total in cents) per order, streaming order lines in chunks"""
+    lines = (
+        OrderItem.objects
+        .filter(order__restaurant_id=restaurant_id)
+        .order_by('order_id')
+        .values_list('order_id', 'item_id', 'order__totalprice')
+        .iterator(chunk_size=chunk_size)
+    )
+    current, items, cents = None, set(), 0
+    for order_id, item_id, totalprice in lines:
+        if order_id != current:
+            if items:
+                yield items, cents
+            current, items, cents = order_id, set(), int(totalprice * 100)
+        items.add(item_id)
+    if items:
+        yield items, cents
+
+
+def frequent_itemsets(restaurant_id, min_support=MIN_SUPPORT, min_orders=MIN_ORDERS, max_size=MAX_SIZE,
+                      chunk_size=LINES_PER_CHUNK):
+    """
+    Frequent itemsets of a restaurant's orders with FP-growth
+    Returns (order count, [(item ids, orders containing them, average order total)])
+
+    Two passes over the data: one aggregate query for per-item order counts,
+    then order lines are streamed in chunks into the tree, keeping only
+    items that can still be frequent.
+    """
+    order_count = Order.objects.filter(restaurant_id=restaurant_id).count()
+    if not order_count:
+        return 0, []
+    min_count = max(min_orders, math.ceil(min_support * order_count))
+
+    item_counts = dict(
+        OrderItem.objects
+        .filter(order__restaurant_id=restaurant_id)
+        .values('item_id')
+        .annotate(orders=Count('order_id', distinct=True))
+        .filter(orders__gte=min_count)
+        .values_list('item_id', 'orders')
+    )
+    if len(item_counts) < 2:
+        return order_count, []
+    rank = {item_id: position for position, item_id in enumerate(
+        sorted(item_counts, key=lambda item_id: (-item_counts[item_id], item_id))
+    )}
+
+    tree = FPTree()
+    for items, cents in _baskets(restaurant_id, chunk_size):
+        kept = sorted((item for item in items if item in rank), key=rank.__getitem__)
+        # Baskets with one frequent item can't contain a combo
+        if len(kept) >= 2:
+            tree.insert(kept, 1, cents)
+
+    itemsets = [
+        (list(itemset), count, (Decimal(cents) / count / 100).quantize(Decimal('0.01')))
+        for itemset, count, cents in mine_tree(tree, min_count, max_size)
+    ]
+    return order_count, itemsets
+
+
+def mine_combos(restaurant_id, top=TOP_COMBOS, **options):
+    """
+    Replace a restaurant's stored combo suggestions with its current most
+    frequent itemsets (most orders first, then larger sets); returns how many were stored
+    """
+    order_count, itemsets = frequent_itemsets(restaurant_id, **options)
+    itemsets.sort(key=lambda entry: (-entry[1], -len(entry[0]), entry[0]))
+
+    items = {
+        row['id']: row
+        for row in Item.objects.filter(id__in={item_id for ids, _, _ in itemsets for item_id in ids})
+        .values('id', 'name', 'price')
+    }
+    suggestions = []
+    for item_ids, count, avg_totalprice in itemsets:
+        if not all(item_id in items for item_id in item_ids):
+            continue  # an item was deleted since it was ordered
+        if len(suggestions) >= top:
+            break
+        suggestions.append(ComboSuggestion(
+            restaurant_id=restaurant_id,
+            rank=len(suggestions) + 1,
+            item_ids=item_ids,
+            items=[
+                {'id': item_id, 'name': items[item_id]['name'], 'price': str(items[item_id]['price'])}
+                for item_id in item_ids
+            ],
+            size=len(item_ids),
+            order_count=count,
+            support=count / order_count,
+            avg_totalprice=avg_totalprice,
+            list_price=sum(items[item_id]['price'] for item_id in item_ids),
+        ))
+
+    with transaction.atomic():
+        ComboSuggestion.objects.filter(restaurant_id=restaurant_id).delete()
+        ComboSuggestion.objects.bulk_create(suggestions)
+    return len(suggestions)
@@ -0,0 +1,201 @@
+# analytics/cooccurrence.py
+
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from .models import ItemCooccurrence, ItemNeighbor, JobWatermark
+from .rollups import upsert_add
+
+WATERMARK = 'item-cooccurrence'
+
+NEIGHBORS_PER_ITEM = 20
+ORDERS_PER_CHUNK = 20000
+
+# Orders inserted more recently than this wait for the next run, so an order
+# whose transaction is still open can't fall behind the watermark. Runs are
+# bounded on Order.created_at, the insert time: an import backdates ordertime,
+# and a backdated order would otherwise carry the bound past open transactions
+SETTLE_SECONDS = 60
+
+# Ids per IN (...) lookup
+LOOKUP_BATCH_SIZE = 500
+
+
+def _empty():
+    return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+
+def pair_counts(order_ids, item_ids):
+    """
+    Co-occurrence counts from parallel arrays of order line (order id, item id)
+    Returns arrays (items, others, counts) holding every ordered pair plus the
+    diagonal (orders containing each item): the sparse product X^T X of the
+    binary order x item matrix X, computed without materializing X.
+    """
+    if not len(order_ids):
+        return _empty()
+    # Distinct (order, item), sorted by order
+    lines = np.unique(np.stack([np.asarray(order_ids, dtype=np.int64), np.asarray(item_ids, dtype=np.int64)], axis=1), axis=0)
+    orders, items = lines[:, 0], lines[:, 1]
+
+    starts = np.flatnonzero(np.r_[True, orders[1:] != orders[:-1]])
+    sizes = np.diff(np.r_[starts, len(orders)])
+    # Pair every line with every line of its order (itself included, for the diagonal)
+    per_line = np.repeat(sizes, sizes)
+    first_line = np.repeat(starts, sizes)
+    left = np.repeat(np.arange(len(items)), per_line)
+    offsets = np.arange(len(left)) - np.repeat(np.cumsum(per_line) - per_line, per_line)
+    right = np.repeat(first_line, per_line) + offsets
+
+    span = int(items.max()) + 1
+    keys, counts = np.unique(items[left] * span + items[right], return_counts=True)
+    return keys // span, keys % span, counts
+
+
+def top_neighbors(rows, totals, top_n=NEIGHBORS_PER_ITEM):
+    """
+    Best neighbors per item from co-occurrence rows
+    rows: int array of (item, other, order_count) without the diagonal
+    totals: (sorted item ids, orders containing each)
+    Returns (items, neighbors, ranks, scores, counts), ranked by cosine
+    similarity count(a, b) / sqrt(count(a) * count(b)), then by raw count.
+    """
+    if not len(rows):
+        return _empty() + (np.zeros(0), np.zeros(0, dtype=np.int64))
+    total_ids, total_counts = totals
+    own = total_counts[np.searchsorted(total_ids, rows[:, 0])]
+    other = total_counts[np.searchsorted(total_ids, rows[:, 1])]
+    scores = rows[:, 2] / np.sqrt(np.maximum(own * other, 1))
+
+    # Group by item, best first; neighbor id breaks ties so ranks are stable
+    order = np.lexsort((rows[:, 1], -rows[:, 2], -scores, rows[:, 0]))
+    rows, scores = rows[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:, 0] != rows[:-1, 0]])
+    sizes = np.diff(np.r_[starts, len(rows)])
+    ranks = np.arange(len(rows)) - np.repeat(starts, sizes)
+    keep = ranks < top_n
+    return rows[keep, 0], rows[keep, 1], ranks[keep] + 1, scores[keep], rows[keep, 2]
+
+
+def _order_totals(item_ids):
+    """(sorted item ids, orders containing each) from the diagonal rows"""
+    pairs = []
+    item_ids = sorted(set(item_ids))
+    for start in range(0, len(item_ids), LOOKUP_BATCH_SIZE):
+        pairs.extend(
+            ItemCooccurrence.objects
+            .filter(item_id__in=item_ids[start:start + LOOKUP_BATCH_SIZE], other_id=F('item_id'))
+            .values_list('item_id', 'order_count')
+        )
+    pairs.sort()
+    return (
+        np.array([item_id for item_id, _ in pairs], dtype=np.int64),
+        np.array([count for _, count in pairs], dtype=np.int64),
+    )
+
+
+def refresh_neighbors(item_ids, top_n=NEIGHBORS_PER_ITEM):
+    """Recompute the stored neighbor lists of items from their co-occurrence rows"""
+    item_ids = sorted(set(item_ids))
+    written = 0
+    for start in range(0, len(item_ids), LOOKUP_BATCH_SIZE):
+        batch = item_ids[start:start + LOOKUP_BATCH_SIZE]
+        rows = np.array(
+            list(
+                ItemCooccurrence.objects
+                .filter(item_id__in=batch)
+                .exclude(other_id=F('item_id'))
+                .values_list('item_id', 'other_id', 'order_count')
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        totals = _order_totals(np.r_[batch, rows[:, 1]].tolist())
+        items, neighbors, ranks, scores, counts = top_neighbors(rows, totals, top_n)
+
+        ItemNeighbor.objects.filter(item_id__in=batch).delete()
+        ItemNeighbor.objects.bulk_create([
+            ItemNeighbor(item_id=item, neighbor_id=neighbor, rank=rank, score=score, order_count=count)
+            for item, neighbor, rank, score, count in zip(
+                items.tolist(), neighbors.tolist(), ranks.tolist(), scores.tolist(), counts.tolist(),
+            )
+        ], batch_size=1000)
+        written += len(items)
+    return written
+
+
+def _listing_items(item_ids):
+    """Items whose stored neighbor lists include any of item_ids"""
+    item_ids = sorted(set(item_ids))
+    listing = set()
+    for start in range(0, len(item_ids), LOOKUP_BATCH_SIZE):
+        listing.update(
+            ItemNeighbor.objects
+            .filter(neighbor_id__in=item_ids[start:start + LOOKUP_BATCH_SIZE])
+            .values_list('item_id', flat=True)
+            .distinct()
+        )
+    return listing
+
+
+def build_item_neighbors(full=False, chunk_size=ORDERS_PER_CHUNK, top_n=NEIGHBORS_PER_ITEM,
+                         settle_seconds=SETTLE_SECONDS):
+    """
+    Fold orders placed since the last run into the co-occurrence counts and
+    refresh the neighbor lists of the items they contain
+
+    Orders are read in id chunks; each chunk's counts, neighbor lists and the
+    watermark commit together, so an interrupted run resumes where it stopped.
+    A chunk changes the pair counts and order totals of the items it contains
+    only, which lowers their scores in other items' lists; so besides those
+    items, every item listing one of them as a neighbor is recomputed. Any
+    other list can't change, as only unlisted scores went down.
+    Returns {'orders', 'pairs', 'items'} processed (items: lists recomputed).
+    """
+    report = {'orders': 0, 'pairs': 0, 'items': 0}
+    if full:
+        with transaction.atomic():
+            ItemNeighbor.objects.all().delete()
+            ItemCooccurrence.objects.all().delete()
+            JobWatermark.objects.filter(name=WATERMARK).delete()
+
+    low = JobWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first() or 0
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    upper = Order.objects.filter(id__gt=low, created_at__lte=cutoff).aggregate(last=Max('id'))['last']
+    if upper is None:
+        return report
+
+    while low < upper:
+        boundary = list(
+            Order.objects.filter(id__gt=low, id__lte=upper).order_by('id')
+            .values_list('id', flat=True)[chunk_size - 1:chunk_size]
+        )
+        high = boundary[0] if boundary else upper
+        lines = np.array(
+            list(OrderItem.objects.filter(order_id__gt=low, order_id__lte=high).values_list('order_id', 'item_id')),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        items, others, counts = pair_counts(lines[:, 0], lines[:, 1])
+        touched = np.unique(items).tolist()
+
+        with transaction.atomic():
+            refreshed = set(touched) | _listing_items(touched)
+            upsert_add(
+                ItemCooccurrence,
+                ['item_id', 'other_id'],
+                ['item_id', 'other_id'],
+                ['order_count'],
+                {(item, other): [count] for item, other, count in zip(items.tolist(), others.tolist(), counts.tolist())},
+            )
+            refresh_neighbors(refreshed, top_n)
+            JobWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': high})
+
+        report['orders'] += len(np.unique(lines[:, 0]))
+        report['pairs'] += int((items != others).sum())
+        report['items'] += len(refreshed)
+        low = high
+    return report
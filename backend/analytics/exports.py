@@ -0,0 +1,311 @@
+# analytics/exports.py
+
+import os
+import shutil
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from restaurants.catalog import catalog
+from restaurants.models import Item
+from .models import JobWatermark
+
+WATERMARK = 'orders-parquet-export'
+
+FORMATS = ('parquet', 'arrow')
+
+# Order lines per server-side cursor fetch, Arrow record batch and (at most) Parquet row group
+LINES_PER_BATCH = 10000
+
+# Orders inserted more recently than this wait for the next run, so an order
+# whose transaction is still open can't fall behind the watermark (bounded on
+# Order.created_at, which imports don't backdate; see analytics/cooccurrence.py)
+SETTLE_SECONDS = 60
+
+# Partition directories are hive style (restaurant_id=3/order_month=2026-10), one file per partition per run.
+# A run reads its lines partition by partition, so only one file is open at a time
+_PARTITION_ORDERING = ('order__restaurant_id', 'ordertime', 'order_id', 'id')
+
+_LINE_FIELDS = (
+    'order_id', 'id', 'order__ordertime', 'order__restaurant_id', 'order__customer_id', 'order__totalprice',
+    'order__isrecommended', 'item_id', 'item__name', 'quantity', 'price',
+    'item__totalprotein', 'item__totalgreens', 'item__totalcarb', 'item__totalfat', 'item__totalcalories',
+)
+_NUTRITION = ('totalprotein', 'totalgreens', 'totalcarb', 'totalfat', 'totalcalories')
+
+
+class ExportUnavailable(Exception):
+    """pyarrow isn't installed"""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ExportUnavailable('Columnar exports need pyarrow (pip install pyarrow)') from exc
+    return pyarrow, pyarrow.parquet
+
+
+def export_root():
+    return Path(getattr(settings, 'ORDER_EXPORT_ROOT', Path(settings.BASE_DIR) / 'exports' / 'orders'))
+
+
+def line_schema():
+    """Arrow schema of exported order lines: one row per line, order and item columns joined in"""
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ('order_id', pa.int64()),
+        ('line_id', pa.int64()),
+        ('ordertime', pa.timestamp('us', tz='UTC')),
+        ('order_date', pa.date32()),  # in the project time zone, like the sales rollups
+        ('restaurant_id', pa.int64()),
+        ('customer_id', pa.int64()),
+        ('order_total', pa.decimal128(8, 2)),
+        ('isrecommended', pa.bool_()),
+        ('item_id', pa.int64()),
+        ('item_name', pa.string()),
+        ('quantity', pa.int32()),
+        ('item_price', pa.decimal128(6, 2)),  # unit price when ordered
+        *[(name, pa.int32()) for name in _NUTRITION],
+        ('tags', pa.list_(pa.string())),
+    ])
+
+
+class _TagNames:
+    """Tag names per item, fetched for each batch's new items only; bounded by the menu size, not the order count"""
+
+    def __init__(self):
+        self.names = {}
+
+    def load(self, item_ids):
+        missing = [item_id for item_id in set(item_ids) if item_id not in self.names]
+        if not missing:
+            return
+        tag_ids = {item_id: [] for item_id in missing}
+        for item_id, tag_id in Item.tags.through.objects.filter(item_id__in=missing).values_list('item_id', 'tag_id'):
+            tag_ids[item_id].append(tag_id)
+        for item_id, ids in tag_ids.items():
+            self.names[item_id] = sorted(catalog.tag_names(ids))
+
+    def __getitem__(self, item_id):
+        return self.names[item_id]
+
+
+def record_batches(lines, batch_size=LINES_PER_BATCH, ordering=('order_id', 'id')):
+    """
+    Yield Arrow record batches of order lines from an OrderItem queryset
+    Rows come from values_list() through iterator(), a server-side cursor
+    where the backend has one, so only one batch is held at a time.
+    """
+    pa, _ = _pyarrow()
+    schema = line_schema()
+    tags = _TagNames()
+    rows = lines.order_by(*ordering).values_list(*_LINE_FIELDS).iterator(chunk_size=batch_size)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield _to_batch(pa, schema, tags, batch)
+            batch = []
+    if batch:
+        yield _to_batch(pa, schema, tags, batch)
+
+
+def _to_batch(pa, schema, tags, rows):
+    columns = list(zip(*rows))
+    tags.load(columns[7])
+    ordertimes = columns[2]
+    data = {
+        'order_id': columns[0],
+        'line_id': columns[1],
+        'ordertime': ordertimes,
+        'order_date': [timezone.localdate(value) for value in ordertimes],
+        'restaurant_id': columns[3],
+        'customer_id': columns[4],
+        'order_total': columns[5],
+        'isrecommended': columns[6],
+        'item_id': columns[7],
+        'item_name': columns[8],
+        'quantity': columns[9],
+        'item_price': columns[10],
+        **{name: columns[11 + index] for index, name in enumerate(_NUTRITION)},
+        'tags': [tags[item_id] for item_id in columns[7]],
+    }
+    return pa.RecordBatch.from_pydict(data, schema=schema)
+
+
+class _PartitionFile:
+    """One partition's Parquet file, written under a temporary name and renamed into place on close()"""
+
+    def __init__(self, pq, schema, directory, basename):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f'{basename}.parquet'
+        self.temporary = directory / f'.{basename}.parquet.tmp'
+        self.writer = pq.ParquetWriter(self.temporary, schema, compression='zstd')
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.temporary, self.path)
+
+    def discard(self):
+        self.writer.close()
+        self.temporary.unlink(missing_ok=True)
+
+
+def write_partitions(batches, root, basename):
+    """
+    Write record batches of order lines, sorted by restaurant and time, as
+    one Parquet file per (restaurant, month) under
+    root/restaurant_id=<id>/order_month=<YYYY-MM>/<basename>.parquet
+    Each partition's lines arrive together, so one file is open at a time
+    and every batch goes straight to it: memory holds a single batch. The
+    restaurant lives in the path only. Rewriting the same basename replaces
+    the files. Returns (files, lines) written.
+    """
+    _, pq = _pyarrow()
+    current = key = None
+    files = lines = 0
+    try:
+        for batch in batches:
+            restaurants = batch.column('restaurant_id').to_numpy()
+            months = batch.column('order_date').to_numpy(zero_copy_only=False).astype('datetime64[M]')
+            starts = np.flatnonzero(np.r_[True, (restaurants[1:] != restaurants[:-1]) | (months[1:] != months[:-1])])
+            ends = np.r_[starts[1:], len(restaurants)]
+            data = batch.drop_columns(['restaurant_id'])
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                if (restaurants[start], months[start]) != key:
+                    if current:
+                        current.close()
+                        current = None
+                        files += 1
+                    key = restaurants[start], months[start]
+                    directory = root / f'restaurant_id={key[0]}' / f'order_month={key[1]}'
+                    current = _PartitionFile(pq, data.schema, directory, basename)
+                current.write(data.slice(start, end - start))
+            lines += batch.num_rows
+        if current:
+            current.close()
+            current = None
+            files += 1
+    except BaseException:
+        if current:
+            current.discard()
+        raise
+    return files, lines
+
+
+def export_orders(root=None, full=False, settle_seconds=SETTLE_SECONDS):
+    """
+    Export order lines placed since the last run to a partitioned Parquet dataset
+
+    Each run writes the lines of the orders past the watermark as one file
+    per (restaurant, month) it touches, named after the run's first order
+    id, streaming them from the database in partition order. The watermark
+    moves only once every file is in place: an interrupted run is repeated
+    from the same order and overwrites its files, so nothing is exported
+    twice. full=True clears the dataset and starts over.
+    Returns {'orders', 'lines', 'files'} exported.
+    """
+    _pyarrow()
+    root = Path(root) if root else export_root()
+    report = {'orders': 0, 'lines': 0, 'files': 0}
+    if full:
+        shutil.rmtree(root, ignore_errors=True)
+        JobWatermark.objects.filter(name=WATERMARK).delete()
+
+    low = JobWatermark.objects.filter(name=WATERMARK).values_list('value', flat=True).first() or 0
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+    upper = Order.objects.filter(id__gt=low, created_at__lte=cutoff).aggregate(last=Max('id'))['last']
+    if upper is None:
+        return report
+
+    lines = OrderItem.objects.filter(order_id__gt=low, order_id__lte=upper)
+    report['files'], report['lines'] = write_partitions(
+        record_batches(lines, ordering=_PARTITION_ORDERING), root, f'part-{low + 1:012d}',
+    )
+    report['orders'] = lines.values('order_id').distinct().count()
+
+    with transaction.atomic():
+        JobWatermark.objects.update_or_create(name=WATERMARK, defaults={'value': upper})
+    return report
+
+
+def day_range(since=None, until=None):
+    """Project-time-zone day bounds as [start, end) datetimes; `until` is inclusive"""
+    zone = timezone.get_current_timezone()
+    start = datetime.combine(since, time.min, tzinfo=zone) if since else None
+    end = datetime.combine(until + timedelta(days=1), time.min, tzinfo=zone) if until else None
+    return start, end
+
+
+def restaurant_lines(restaurant_id, since=None, until=None):
+    """A restaurant's order lines, optionally limited to days (project time zone)"""
+    lines = OrderItem.objects.filter(order__restaurant_id=restaurant_id)
+    start, end = day_range(since, until)
+    if start:
+        lines = lines.filter(ordertime__gte=start)
+    if end:
+        lines = lines.filter(ordertime__lt=end)
+    return lines
+
+
+class _Sink:
+    """Write-only file that hands back what was written since the last drain()"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        chunk = b''.join(self.chunks)
+        self.chunks = []
+        return chunk
+
+
+def stream_lines(lines, fmt):
+    """
+    Yield an OrderItem queryset as a Parquet file or an Arrow IPC stream, in
+    byte chunks of about one record batch (one Parquet row group) each
+    """
+    pa, pq = _pyarrow()
+    schema = line_schema()
+    sink = _Sink()
+    handle = pa.PythonFile(sink, mode='w')
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(handle, schema, compression='zstd')
+    elif fmt == 'arrow':
+        writer = pa.ipc.new_stream(handle, schema)
+    else:
+        raise ValueError(f'Unknown export format {fmt!r}, expected one of {", ".join(FORMATS)}')
+    with writer:
+        for batch in record_batches(lines):
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,31 @@
+# analytics/management/commands/build_item_neighbors.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from analytics.cooccurrence import NEIGHBORS_PER_ITEM, ORDERS_PER_CHUNK, SETTLE_SECONDS, build_item_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Update item co-occurrence counts and "customers also ordered" lists with orders since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Start over from the first order')
+        parser.add_argument('--chunk-size', type=int, default=ORDERS_PER_CHUNK, help='Orders per chunk')
+        parser.add_argument('--neighbors', type=int, default=NEIGHBORS_PER_ITEM, help='Neighbors kept per item')
+        parser.add_argument('--settle-seconds', type=int, default=SETTLE_SECONDS,
+                            help='Leave orders newer than this for the next run')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        report = build_item_neighbors(
+            full=options['full'],
+            chunk_size=options['chunk_size'],
+            top_n=options['neighbors'],
+            settle_seconds=options['settle_seconds'],
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Processed {report['orders']} orders ({report['pairs']} item pairs), "
+            f"refreshed neighbors of {report['items']} items in {elapsed:.1f}s"
+        ))
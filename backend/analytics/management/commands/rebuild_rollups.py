@@ -0,0 +1,28 @@
+# analytics/management/commands/rebuild_rollups.py
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from analytics.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild hourly/daily restaurant and item sales rollups from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='Only rebuild the last N days (default: everything)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['days'] is not None:
+            since = timezone.now() - timedelta(days=options['days'])
+        
+        start = time.perf_counter()
+        restaurant_rows, item_rows = rebuild_rollups(since=since, batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt {restaurant_rows} restaurant and {item_rows} item rollup rows in {elapsed:.1f}s'
+        ))
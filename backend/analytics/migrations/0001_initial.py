@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('restaurants', '0004_tag_bitmask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=10)),
+                ('period_start', models.DateTimeField()),
+                ('order_count', models.IntegerField(default=0, help_text='Orders containing this item')),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('recommended_count', models.IntegerField(default=0, help_text='AI-recommended orders containing this item')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='restaurants.item')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='item_sales_rollups', to='restaurants.restaurant')),
+            ],
+            options={
+                'db_table': 'itemsalesrollup',
+                'ordering': ['-period_start'],
+                'indexes': [models.Index(fields=['restaurant', 'period', 'period_start'], name='itemrollup_restaurant_idx')],
+                'unique_together': {('item', 'period', 'period_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='RestaurantSalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=10)),
+                ('period_start', models.DateTimeField()),
+                ('order_count', models.IntegerField(default=0)),
+                ('item_quantity', models.IntegerField(default=0, help_text='Total items sold')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('recommended_count', models.IntegerField(default=0, help_text='Orders that were AI-recommended')),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='restaurants.restaurant')),
+            ],
+            options={
+                'db_table': 'restaurantsalesrollup',
+                'ordering': ['-period_start'],
+                'unique_together': {('restaurant', 'period', 'period_start')},
+            },
+        ),
+    ]
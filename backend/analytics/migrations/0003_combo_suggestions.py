@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_item_neighbors'),
+        ('restaurants', '0007_menu_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComboSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('item_ids', models.JSONField(default=list)),
+                ('items', models.JSONField(default=list, help_text='[{id, name, price}] at mining time')),
+                ('size', models.PositiveSmallIntegerField()),
+                ('order_count', models.IntegerField(help_text='Orders containing every item of the set')),
+                ('support', models.FloatField(help_text="Share of the restaurant's orders containing the set")),
+                ('avg_totalprice', models.DecimalField(decimal_places=2, help_text='Average total of those orders', max_digits=8)),
+                ('list_price', models.DecimalField(decimal_places=2, help_text="Sum of the items' prices", max_digits=8)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('restaurant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='combo_suggestions', to='restaurants.restaurant')),
+            ],
+            options={
+                'db_table': 'combosuggestion',
+                'ordering': ['restaurant', 'rank'],
+                'unique_together': {('restaurant', 'rank')},
+            },
+        ),
+    ]
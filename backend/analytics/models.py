@@ -0,0 +1,171 @@
+# analytics/models.py
+
+from django.db import models
+from restaurants.models import Restaurant, Item
+
+
+PERIOD_CHOICES = [
+    ('hour', 'Hourly'),
+    ('day', 'Daily'),
+]
+
+
+class RestaurantSalesRollup(models.Model):
+    """
+    Sales summary for one restaurant over one hour or day
+    Maintained incrementally from new orders (see analytics/rollups.py)
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    
+    order_count = models.IntegerField(default=0)
+    item_quantity = models.IntegerField(default=0, help_text="Total items sold")
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    recommended_count = models.IntegerField(default=0, help_text="Orders that were AI-recommended")
+    
+    def __str__(self):
+        return f"{self.restaurant_id} {self.period} {self.period_start:%Y-%m-%d %H:%M}"
+    
+    class Meta:
+        db_table = 'restaurantsalesrollup'
+        unique_together = ('restaurant', 'period', 'period_start')
+        ordering = ['-period_start']
+
+
+class ItemSalesRollup(models.Model):
+    """
+    Sales summary for one menu item over one hour or day
+    """
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='sales_rollups'
+    )
+    # Denormalized so top-items queries stay on this table
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='item_sales_rollups'
+    )
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    
+    order_count = models.IntegerField(default=0, help_text="Orders containing this item")
+    quantity = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    recommended_count = models.IntegerField(default=0, help_text="AI-recommended orders containing this item")
+    
+    def __str__(self):
+        return f"{self.item_id} {self.period} {self.period_start:%Y-%m-%d %H:%M}"
+    
+    class Meta:
+        db_table = 'itemsalesrollup'
+        unique_together = ('item', 'period', 'period_start')
+        ordering = ['-period_start']
+        indexes = [
+            models.Index(fields=['restaurant', 'period', 'period_start'], name='itemrollup_restaurant_idx'),
+        ]
+
+
+class ItemCooccurrence(models.Model):
+    """
+    Number of orders containing both items (stored in both directions)
+    The row with other == item holds how many orders contain the item at all.
+    Accumulated incrementally by build_item_neighbors (see analytics/cooccurrence.py).
+    """
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='cooccurrences'
+    )
+    other = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    order_count = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.item_id} + {self.other_id}: {self.order_count}"
+    
+    class Meta:
+        db_table = 'itemcooccurrence'
+        unique_together = ('item', 'other')
+
+
+class ItemNeighbor(models.Model):
+    """
+    Top items ordered together with an item, best first
+    Served as-is by the "customers also ordered" endpoint
+    """
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='neighbors'
+    )
+    neighbor = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField(help_text="Cosine similarity of the items' order sets")
+    order_count = models.IntegerField(help_text="Orders containing both items")
+    
+    def __str__(self):
+        return f"{self.item_id} -> {self.neighbor_id} (#{self.rank})"
+    
+    class Meta:
+        db_table = 'itemneighbor'
+        unique_together = ('item', 'rank')
+        ordering = ['item', 'rank']
+
+
+class JobWatermark(models.Model):
+    """How far an incremental job has got, e.g. the last order id it processed"""
+    name = models.CharField(max_length=100, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+    
+    class Meta:
+        db_table = 'jobwatermark'
+
+
+class ComboSuggestion(models.Model):
+    """
+    A set of items frequently ordered together at a restaurant
+    Mined from order history by mine_combos (see analytics/baskets.py) and
+    served as-is; item names and prices are copied in at mining time.
+    """
+    restaurant = models.ForeignKey(
+        Restaurant,
+        on_delete=models.CASCADE,
+        related_name='combo_suggestions'
+    )
+    rank = models.PositiveSmallIntegerField()
+    item_ids = models.JSONField(default=list)
+    items = models.JSONField(default=list, help_text="[{id, name, price}] at mining time")
+    size = models.PositiveSmallIntegerField()
+    
+    order_count = models.IntegerField(help_text="Orders containing every item of the set")
+    support = models.FloatField(help_text="Share of the restaurant's orders containing the set")
+    avg_totalprice = models.DecimalField(max_digits=8, decimal_places=2, help_text="Average total of those orders")
+    list_price = models.DecimalField(max_digits=8, decimal_places=2, help_text="Sum of the items' prices")
+    
+    built_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.restaurant_id} #{self.rank}: {self.item_ids}"
+    
+    class Meta:
+        db_table = 'combosuggestion'
+        unique_together = ('restaurant', 'rank')
+        ordering = ['restaurant', 'rank']
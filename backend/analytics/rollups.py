@@ -0,0 +1,277 @@
+# analytics/rollups.py
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import BigIntegerField, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum
+from django.db.models.fields.json import KT
+from django.db.models.functions import Cast, Coalesce, TruncDay, TruncHour
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from taskqueue.models import Task
+from .models import RestaurantSalesRollup, ItemSalesRollup
+
+PERIODS = ('hour', 'day')
+
+_TRUNC = {'hour': TruncHour, 'day': TruncDay}
+
+_COUNTERS = ['order_count', 'quantity', 'revenue', 'recommended_count']
+_RESTAURANT_COUNTERS = ['order_count', 'item_quantity', 'revenue', 'recommended_count']
+
+# The task that calls apply_order_rollups for new orders (orders/tasks.py), payload {'order': id, ...}
+ROLLUP_TASK = 'orders.side_effects'
+
+
+def bucket_start(moment, period):
+    """Start of the hour/day containing moment, in the project time zone"""
+    local = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if period == 'day':
+        local = local.replace(hour=0)
+    return local
+
+
+def _new_counters():
+    return [0, 0, Decimal('0'), 0]
+
+
+def rollup_deltas(order_ids):
+    """
+    Rollup increments for a set of new orders, from two queries
+    Returns ({(restaurant_id, period, start): counters}, {(item_id, restaurant_id, period, start): counters})
+    where counters is [order_count, quantity, revenue, recommended_count]
+    """
+    orders = {}
+    restaurant_rows = defaultdict(_new_counters)
+    rows = Order.objects.filter(id__in=order_ids).values_list(
+        'id', 'restaurant_id', 'ordertime', 'totalprice', 'isrecommended',
+    )
+    for order_id, restaurant_id, ordertime, totalprice, isrecommended in rows:
+        orders[order_id] = (restaurant_id, ordertime, isrecommended)
+        for period in PERIODS:
+            counters = restaurant_rows[(restaurant_id, period, bucket_start(ordertime, period))]
+            counters[0] += 1
+            counters[2] += totalprice
+            counters[3] += int(isrecommended)
+
+    item_rows = defaultdict(_new_counters)
+    lines = OrderItem.objects.filter(order_id__in=order_ids).values_list('order_id', 'item_id', 'quantity', 'price')
+    for order_id, item_id, quantity, price in lines:
+        restaurant_id, ordertime, isrecommended = orders[order_id]
+        for period in PERIODS:
+            start = bucket_start(ordertime, period)
+            restaurant_rows[(restaurant_id, period, start)][1] += quantity
+            counters = item_rows[(item_id, restaurant_id, period, start)]
+            counters[0] += 1
+            counters[1] += quantity
+            counters[2] += price * quantity
+            counters[3] += int(isrecommended)
+    return restaurant_rows, item_rows
+
+
+def upsert_add(model, key_columns, conflict_columns, value_columns, rows):
+    """
+    Add counters into a rollup table with INSERT ... ON CONFLICT DO UPDATE
+    rows: {key tuple: counters list}, matching key_columns / value_columns
+    conflict_columns: the table's unique key
+    """
+    if not rows:
+        return
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        _update_or_insert(model, key_columns, conflict_columns, value_columns, rows)
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = key_columns + value_columns
+    updates = ', '.join(f'{quote(c)} = {table}.{quote(c)} + excluded.{quote(c)}' for c in value_columns)
+    items = list(rows.items())
+    # Adapted like the ORM does, so bucket starts are stored in UTC and match rows it wrote
+    fields = [model._meta.get_field(column) for column in columns]
+
+    # Stay under SQLite's bound-parameter limit
+    batch_size = max(1, 900 // len(columns))
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(batch))
+            params = []
+            for key, counters in batch:
+                params.extend(
+                    field.get_db_prep_save(value, connection)
+                    for field, value in zip(fields, (*key, *counters))
+                )
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(quote(c) for c in columns)}) VALUES {placeholders} '
+                f'ON CONFLICT ({", ".join(quote(c) for c in conflict_columns)}) DO UPDATE SET {updates}',
+                params,
+            )
+
+
+def _update_or_insert(model, key_columns, conflict_columns, value_columns, rows):
+    """Portable fallback for backends without ON CONFLICT"""
+    with transaction.atomic():
+        for key, counters in rows.items():
+            values = dict(zip(key_columns, key))
+            lookup = {column: values[column] for column in conflict_columns}
+            updated = model.objects.filter(**lookup).update(**{
+                column: F(column) + value for column, value in zip(value_columns, counters)
+            })
+            if not updated:
+                model.objects.create(**values, **dict(zip(value_columns, counters)))
+
+
+def apply_order_rollups(order_ids):
+    """
+    Fold newly placed orders into the hourly and daily rollups
+    The upserts wait for a running rebuild_rollups to commit (see _lock_rollups)
+    """
+    restaurant_rows, item_rows = rollup_deltas(order_ids)
+    with transaction.atomic():
+        upsert_add(
+            RestaurantSalesRollup,
+            ['restaurant_id', 'period', 'period_start'],
+            ['restaurant_id', 'period', 'period_start'],
+            _RESTAURANT_COUNTERS,
+            restaurant_rows,
+        )
+        upsert_add(
+            ItemSalesRollup,
+            ['item_id', 'restaurant_id', 'period', 'period_start'],
+            ['item_id', 'period', 'period_start'],
+            _COUNTERS,
+            item_rows,
+        )
+
+
+def _lock_rollups():
+    """
+    Hold incremental updates off the rollup tables until the transaction ends
+    On PostgreSQL a SHARE ROW EXCLUSIVE table lock: it conflicts with the row
+    locks apply_order_rollups' writes take (and with another rebuild) but not
+    with reads. SQLite has a single writer, taken by the rebuild's first delete.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    tables = ', '.join(quote(model._meta.db_table) for model in (RestaurantSalesRollup, ItemSalesRollup))
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE')
+
+
+def _pending_orders():
+    """Ids of orders whose rollup task is queued or running, as a subquery"""
+    return (
+        Task.objects.filter(name=ROLLUP_TASK, status__in=[Task.QUEUED, Task.RUNNING])
+        .values(order_id=Cast(KT('payload__order'), BigIntegerField()))
+    )
+
+
+def rebuild_rollups(since=None, batch_size=5000):
+    """
+    Recompute rollups from order history, optionally only from `since` onwards
+    (rounded down to the start of that day). Returns (restaurant rows, item rows).
+
+    Safe alongside the task workers: incremental updates wait for the rebuild
+    to commit, and orders whose rollup task hasn't finished are left out, so
+    that task adds them once instead of on top of the rebuilt totals. A task
+    that finished first is in the rebuilt totals and its increment is replaced.
+    """
+    orders = Order.objects.all()
+    lines = OrderItem.objects.all()
+    restaurant_rollups = RestaurantSalesRollup.objects.all()
+    item_rollups = ItemSalesRollup.objects.all()
+    if since is not None:
+        since = bucket_start(since, 'day')
+        orders = orders.filter(ordertime__gte=since)
+        lines = lines.filter(order__ordertime__gte=since)
+        restaurant_rollups = restaurant_rollups.filter(period_start__gte=since)
+        item_rollups = item_rollups.filter(period_start__gte=since)
+
+    restaurant_count = 0
+    item_count = 0
+    with transaction.atomic():
+        _lock_rollups()
+        restaurant_rollups.delete()
+        item_rollups.delete()
+        # Read once the lock is held: tasks still pending can't write to the rollups until this commits
+        orders = orders.exclude(id__in=_pending_orders())
+        lines = lines.exclude(order_id__in=_pending_orders())
+        for period in PERIODS:
+            trunc = _TRUNC[period]
+            restaurant_rows = (
+                orders.annotate(bucket=trunc('ordertime'))
+                .values('restaurant_id', 'bucket')
+                .annotate(
+                    order_count=Count('id'),
+                    revenue=Sum('totalprice'),
+                    recommended_count=Count('id', filter=Q(isrecommended=True)),
+                )
+                .order_by()
+            )
+            restaurant_count += _bulk_insert(RestaurantSalesRollup, (
+                RestaurantSalesRollup(
+                    restaurant_id=row['restaurant_id'],
+                    period=period,
+                    period_start=row['bucket'],
+                    order_count=row['order_count'],
+                    revenue=row['revenue'],
+                    recommended_count=row['recommended_count'],
+                )
+                for row in restaurant_rows.iterator(chunk_size=batch_size)
+            ), batch_size)
+
+            item_rows = (
+                lines.annotate(bucket=trunc('order__ordertime'))
+                .values('item_id', 'bucket', restaurant_id=F('order__restaurant_id'))
+                .annotate(
+                    order_count=Count('order_id', distinct=True),
+                    total_quantity=Sum('quantity'),
+                    revenue=Sum(ExpressionWrapper(
+                        F('quantity') * F('price'),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    )),
+                    recommended_count=Count('order_id', filter=Q(order__isrecommended=True), distinct=True),
+                )
+                .order_by()
+            )
+            item_count += _bulk_insert(ItemSalesRollup, (
+                ItemSalesRollup(
+                    item_id=row['item_id'],
+                    restaurant_id=row['restaurant_id'],
+                    period=period,
+                    period_start=row['bucket'],
+                    order_count=row['order_count'],
+                    quantity=row['total_quantity'],
+                    revenue=row['revenue'],
+                    recommended_count=row['recommended_count'],
+                )
+                for row in item_rows.iterator(chunk_size=batch_size)
+            ), batch_size)
+
+            # Items sold per restaurant bucket, summed from the item rollups just written
+            quantity = (
+                ItemSalesRollup.objects
+                .filter(restaurant_id=OuterRef('restaurant_id'), period=period, period_start=OuterRef('period_start'))
+                .values('restaurant_id')
+                .annotate(total=Sum('quantity'))
+                .values('total')
+            )
+            restaurant_rollups.filter(period=period).update(item_quantity=Coalesce(Subquery(quantity), 0))
+    return restaurant_count, item_count
+
+
+def _bulk_insert(model, rows, batch_size):
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            model.objects.bulk_create(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        model.objects.bulk_create(batch)
+        count += len(batch)
+    return count
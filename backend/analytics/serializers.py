@@ -0,0 +1,33 @@
+# analytics/serializers.py
+
+from rest_framework import serializers
+from .models import PERIOD_CHOICES
+
+
+class DashboardQuerySerializer(serializers.Serializer):
+    """Query parameters for the sales dashboard"""
+    period = serializers.ChoiceField(choices=PERIOD_CHOICES, default='day')
+    days = serializers.IntegerField(min_value=1, max_value=366, default=30)
+    top = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class AlsoOrderedQuerySerializer(serializers.Serializer):
+    """Query parameters for "customers also ordered" """
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=10)
+
+
+class ComboQuerySerializer(serializers.Serializer):
+    """Query parameters for a restaurant's combo suggestions"""
+    limit = serializers.IntegerField(min_value=1, max_value=20, default=5)
+    size = serializers.IntegerField(min_value=2, max_value=10, required=False)
+
+
+class OrderExportQuerySerializer(serializers.Serializer):
+    """Query parameters for a restaurant's order line export (days in the project time zone)"""
+    since = serializers.DateField(required=False)
+    until = serializers.DateField(required=False)
+    
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] > attrs['until']:
+            raise serializers.ValidationError('since must not be after until')
+        return attrs
@@ -0,0 +1,257 @@
+# analytics/tests.py
+
+import importlib.util
+import random
+import tempfile
+import unittest
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from itertools import combinations
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from orders.services import place_order
+from restaurants.models import Item, Restaurant
+from taskqueue.models import Task
+from taskqueue.queue import drain
+from users.models import Customer, User
+from .baskets import FPTree, frequent_itemsets, mine_combos, mine_tree
+from .cooccurrence import build_item_neighbors
+from .exports import export_orders
+from .models import ComboSuggestion, ItemCooccurrence, ItemSalesRollup, RestaurantSalesRollup
+from .rollups import rebuild_rollups
+
+
+class OrderFixtures:
+    """A restaurant, a customer and a helper placing orders with chosen ids and timestamps"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Analytics Arms', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.items = [
+            Item.objects.create(restaurant=cls.restaurant, name=f'Dish {index}', price=Decimal('4.00') + index)
+            for index in range(4)
+        ]
+        user = User.objects.create_user(username='eater', password='x')
+        cls.customer = Customer.objects.create(user=user, firstname='Ada', lastname='Eats')
+
+    def add_order(self, order_id, items, ordertime=None, created_at=None):
+        """
+        An order with an explicit id, as if it had been inserted (created_at)
+        at that point of the id sequence, and placed at ordertime
+        """
+        now = timezone.now()
+        order = Order.objects.create(id=order_id, customer=self.customer, restaurant=self.restaurant)
+        Order.objects.filter(pk=order_id).update(ordertime=ordertime or now, created_at=created_at or now)
+        order.refresh_from_db()
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, item=item, quantity=1, price=item.price, ordertime=order.ordertime) for item in items
+        ])
+        return order
+
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+def brute_force_itemsets(baskets, min_count, max_size):
+    """Every set of 2..max_size items in at least min_count baskets: {itemset: (baskets, total cents)}"""
+    items = sorted({item for basket, _ in baskets for item in basket})
+    found = {}
+    for size in range(2, max_size + 1):
+        for itemset in combinations(items, size):
+            having = [cents for basket, cents in baskets if basket.issuperset(itemset)]
+            if len(having) >= min_count:
+                found[itemset] = (len(having), sum(having))
+    return found
+
+
+def random_baskets(rng, count, items):
+    """Baskets of 1-6 items, skewed so a few items (and their combinations) are common"""
+    weights = [1 / (rank + 1) for rank in range(len(items))]
+    baskets = []
+    for _ in range(count):
+        basket = set(rng.choices(items, weights, k=rng.randint(1, 6)))
+        baskets.append((basket, rng.randint(500, 6000)))
+    return baskets
+
+
+class CooccurrenceWatermarkTests(OrderFixtures, TestCase):
+    def counts(self):
+        return sorted(ItemCooccurrence.objects.values_list('item_id', 'other_id', 'order_count'))
+
+    def test_backdated_order_doesnt_skip_a_late_commit(self):
+        a, b, c, d = self.items
+        hours_ago = timezone.now() - timedelta(hours=2)
+        self.add_order(1, [a, b], ordertime=hours_ago, created_at=hours_ago)
+        # Imported just now with a year-old ordertime, while order 2 is still uncommitted
+        self.add_order(3, [c, d], ordertime=timezone.now() - timedelta(days=365))
+        build_item_neighbors(settle_seconds=60)
+        # Order 2 commits after that run
+        self.add_order(2, [a, c])
+        build_item_neighbors(settle_seconds=0)
+        incremental = self.counts()
+
+        build_item_neighbors(full=True, settle_seconds=0)
+        self.assertEqual(incremental, self.counts())
+        self.assertIn((a.pk, c.pk, 1), incremental)
+
+
+class FPGrowthTests(SimpleTestCase):
+    """mine_tree finds exactly the itemsets, counts and totals an exhaustive count does"""
+
+    def mine(self, baskets, min_count, max_size):
+        # The tree as frequent_itemsets builds it: frequent items only, most frequent first
+        counts = Counter(item for basket, _ in baskets for item in basket)
+        frequent = sorted(
+            (item for item in counts if counts[item] >= min_count), key=lambda item: (-counts[item], item),
+        )
+        rank = {item: position for position, item in enumerate(frequent)}
+        tree = FPTree()
+        for basket, cents in baskets:
+            kept = sorted((item for item in basket if item in rank), key=rank.__getitem__)
+            if len(kept) >= 2:
+                tree.insert(kept, 1, cents)
+        mined = {}
+        for itemset, count, cents in mine_tree(tree, min_count, max_size):
+            self.assertNotIn(itemset, mined)
+            mined[itemset] = (count, cents)
+        return mined
+
+    def test_matches_brute_force(self):
+        for seed in range(4):
+            baskets = random_baskets(random.Random(seed), 200, list(range(1, 13)))
+            for min_count in (3, 10, 25):
+                for max_size in (2, 3, 4):
+                    with self.subTest(seed=seed, min_count=min_count, max_size=max_size):
+                        expected = brute_force_itemsets(baskets, min_count, max_size)
+                        self.assertTrue(expected)
+                        self.assertEqual(self.mine(baskets, min_count, max_size), expected)
+
+    def test_no_frequent_pairs(self):
+        baskets = [({1, 2}, 100), ({3, 4}, 100), ({1}, 100)]
+        self.assertEqual(self.mine(baskets, 2, 4), {})
+
+
+class FrequentItemsetTests(OrderFixtures, TestCase):
+    """frequent_itemsets and mine_combos over stored orders"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.items += [
+            Item.objects.create(restaurant=cls.restaurant, name=f'Dish {index}', price=Decimal('4.00') + index)
+            for index in range(4, 8)
+        ]
+
+    def setUp(self):
+        self.baskets = random_baskets(random.Random(7), 80, [item.pk for item in self.items])
+        for order_id, (basket, cents) in enumerate(self.baskets, start=1):
+            self.add_order(order_id, [item for item in self.items if item.pk in basket])
+            Order.objects.filter(pk=order_id).update(totalprice=Decimal(cents) / 100)
+
+    def test_matches_brute_force(self):
+        order_count, itemsets = frequent_itemsets(self.restaurant.pk, min_support=0.05, min_orders=2, max_size=3)
+        self.assertEqual(order_count, 80)
+        expected = {
+            itemset: (count, (Decimal(cents) / count / 100).quantize(Decimal('0.01')))
+            for itemset, (count, cents) in brute_force_itemsets(self.baskets, 4, 3).items()
+        }
+        self.assertTrue(expected)
+        self.assertEqual({tuple(ids): (count, average) for ids, count, average in itemsets}, expected)
+
+    def test_mine_combos_ranks_by_orders(self):
+        stored = mine_combos(self.restaurant.pk, top=5, min_support=0.05, min_orders=2, max_size=3)
+        combos = list(ComboSuggestion.objects.filter(restaurant=self.restaurant).order_by('rank'))
+        self.assertEqual((stored, [combo.rank for combo in combos]), (5, [1, 2, 3, 4, 5]))
+        expected = sorted(
+            brute_force_itemsets(self.baskets, 4, 3).items(),
+            key=lambda entry: (-entry[1][0], -len(entry[0]), entry[0]),
+        )[:5]
+        self.assertEqual([(tuple(combo.item_ids), combo.order_count) for combo in combos],
+                         [(itemset, count) for itemset, (count, _) in expected])
+        prices = {item.pk: item.price for item in self.items}
+        for combo in combos:
+            self.assertEqual(combo.list_price, sum(prices[item_id] for item_id in combo.item_ids))
+            self.assertAlmostEqual(combo.support, combo.order_count / 80)
+
+
+class RollupRebuildTests(OrderFixtures, TestCase):
+    def totals(self):
+        return (
+            sorted(RestaurantSalesRollup.objects.values_list(
+                'restaurant_id', 'period', 'period_start', 'order_count', 'item_quantity', 'revenue',
+                'recommended_count',
+            )),
+            sorted(ItemSalesRollup.objects.values_list(
+                'item_id', 'period', 'period_start', 'order_count', 'quantity', 'revenue', 'recommended_count',
+            )),
+        )
+
+    def order(self, *lines):
+        return place_order(self.customer, self.restaurant, [(item.pk, quantity) for item, quantity in lines])
+
+    def test_rebuild_matches_incremental_updates(self):
+        a, b, c, _ = self.items
+        self.order((a, 2), (b, 1))
+        self.order((a, 1), (c, 3))
+        drain()
+        # A price change only affects orders placed after it
+        Item.objects.filter(pk=a.pk).update(price=Decimal('9.99'))
+        self.order((a, 1))
+        drain()
+        incremental = self.totals()
+
+        rebuild_rollups()
+        self.assertEqual(incremental, self.totals())
+        revenue = ItemSalesRollup.objects.get(item=a, period='day').revenue
+        self.assertEqual(revenue, Decimal('4.00') * 3 + Decimal('9.99'))
+
+    def test_rebuild_leaves_pending_orders_to_their_task(self):
+        a, b, _, _ = self.items
+        self.order((a, 1))
+        drain()
+        self.order((a, 1), (b, 2))
+        self.assertEqual(Task.objects.filter(status=Task.QUEUED).count(), 1)
+
+        rebuild_rollups()
+        self.assertEqual(RestaurantSalesRollup.objects.get(period='day').order_count, 1)
+        # The queued task adds its order on top of the rebuild, once
+        drain()
+        incremental = self.totals()
+        rebuild_rollups()
+        self.assertEqual(incremental, self.totals())
+        self.assertEqual(RestaurantSalesRollup.objects.get(period='day').order_count, 2)
+
+
+@unittest.skipUnless(HAS_PYARROW, 'needs pyarrow')
+class OrderExportTests(OrderFixtures, TestCase):
+    def setUp(self):
+        self.root = tempfile.TemporaryDirectory()
+        self.addCleanup(self.root.cleanup)
+
+    def exported(self):
+        import pyarrow.dataset as ds
+
+        table = ds.dataset(self.root.name, format='parquet', partitioning='hive').to_table()
+        return sorted(zip(table.column('order_id').to_pylist(), table.column('line_id').to_pylist()))
+
+    def test_incremental_export_around_a_backdated_order(self):
+        a, b, c, d = self.items
+        hours_ago = timezone.now() - timedelta(hours=2)
+        self.add_order(1, [a, b], ordertime=hours_ago, created_at=hours_ago)
+        self.add_order(3, [c, d], ordertime=timezone.now() - timedelta(days=365))
+        self.assertEqual(export_orders(self.root.name, settle_seconds=60)['orders'], 1)
+        # Order 2 commits after the first run, below the backdated order's id
+        self.add_order(2, [a, c])
+        report = export_orders(self.root.name, settle_seconds=0)
+        self.assertEqual((report['orders'], report['lines']), (2, 4))
+
+        expected = sorted(OrderItem.objects.values_list('order_id', 'id'))
+        self.assertEqual(self.exported(), expected)
+        self.assertEqual(export_orders(self.root.name, settle_seconds=0)['orders'], 0)
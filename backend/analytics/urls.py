@@ -0,0 +1,11 @@
+# analytics/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('restaurants/<int:restaurant_id>/dashboard/', views.dashboard, name='restaurant-dashboard'),
+    path('restaurants/<int:restaurant_id>/combos/', views.combos, name='restaurant-combos'),
+    path('restaurants/<int:restaurant_id>/orders/export.<str:fmt>', views.order_export, name='restaurant-order-export'),
+    path('items/<int:item_id>/also-ordered/', views.also_ordered, name='item-also-ordered'),
+]
@@ -0,0 +1,164 @@
+# analytics/views.py
+
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from django.utils import timezone
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from config.async_api import error_response, validate_query
+from restaurants.models import Restaurant
+from .exports import FORMATS as EXPORT_FORMATS, ExportUnavailable, line_schema, restaurant_lines, stream_lines
+from .models import RestaurantSalesRollup, ItemSalesRollup, ItemNeighbor, ComboSuggestion
+from .rollups import bucket_start
+from .serializers import (
+    DashboardQuerySerializer, AlsoOrderedQuerySerializer, ComboQuerySerializer, OrderExportQuerySerializer,
+)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def dashboard(request, restaurant_id):
+    """
+    Sales dashboard for an owner's restaurant, read only from the rollup tables
+    GET /api/analytics/restaurants/<id>/dashboard/?period=day&days=30&top=10
+    """
+    restaurant = get_object_or_404(Restaurant.objects.only('id', 'user_id', 'name'), pk=restaurant_id)
+    if restaurant.user_id != request.user.pk:
+        raise PermissionDenied('Not your restaurant')
+    
+    params = DashboardQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    period = params.validated_data['period']
+    since = bucket_start(timezone.now() - timedelta(days=params.validated_data['days']), 'day')
+    
+    series = list(
+        RestaurantSalesRollup.objects
+        .filter(restaurant_id=restaurant_id, period=period, period_start__gte=since)
+        .order_by('period_start')
+        .values('period_start', 'order_count', 'item_quantity', 'revenue', 'recommended_count')
+    )
+    totals = {
+        'order_count': sum(row['order_count'] for row in series),
+        'item_quantity': sum(row['item_quantity'] for row in series),
+        'revenue': sum((row['revenue'] for row in series), 0),
+        'recommended_count': sum(row['recommended_count'] for row in series),
+    }
+    totals['recommended_share'] = (
+        round(totals['recommended_count'] / totals['order_count'], 4) if totals['order_count'] else 0
+    )
+    
+    top_items = list(
+        ItemSalesRollup.objects
+        .filter(restaurant_id=restaurant_id, period='day', period_start__gte=since)
+        .values('item_id', 'item__name')
+        .annotate(
+            order_count=Sum('order_count'),
+            quantity=Sum('quantity'),
+            revenue=Sum('revenue'),
+            recommended_count=Sum('recommended_count'),
+        )
+        .order_by('-revenue')[:params.validated_data['top']]
+    )
+    
+    return Response({
+        'restaurant': {'id': restaurant.id, 'name': restaurant.name},
+        'period': period,
+        'since': since,
+        'totals': totals,
+        'series': series,
+        'top_items': top_items,
+    })
+
+
+@api_view(['GET'])
+def also_ordered(request, item_id):
+    """
+    Items most often ordered together with an item, best first
+    GET /api/analytics/items/<id>/also-ordered/?limit=10
+    Served from the precomputed neighbor table (see analytics/cooccurrence.py)
+    """
+    params = AlsoOrderedQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    
+    rows = (
+        ItemNeighbor.objects
+        .filter(item_id=item_id)
+        .order_by('rank')
+        .values('neighbor_id', 'neighbor__name', 'neighbor__price', 'score', 'order_count')
+        [:params.validated_data['limit']]
+    )
+    return Response([
+        {
+            'id': row['neighbor_id'],
+            'name': row['neighbor__name'],
+            'price': str(row['neighbor__price']),
+            'score': round(row['score'], 4),
+            'order_count': row['order_count'],
+        }
+        for row in rows
+    ])
+
+
+@api_view(['GET'])
+def combos(request, restaurant_id):
+    """
+    Suggested combos for a restaurant: item sets often ordered together
+    GET /api/analytics/restaurants/<id>/combos/?limit=5&size=2
+    Read from the precomputed suggestions (see analytics/baskets.py)
+    """
+    params = ComboQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    data = params.validated_data
+    
+    suggestions = ComboSuggestion.objects.filter(restaurant_id=restaurant_id)
+    if 'size' in data:
+        suggestions = suggestions.filter(size=data['size'])
+    rows = suggestions.order_by('rank').values(
+        'items', 'size', 'order_count', 'support', 'avg_totalprice', 'list_price', 'built_at',
+    )[:data['limit']]
+    return Response([
+        {**row, 'support': round(row['support'], 4), 'avg_totalprice': str(row['avg_totalprice']),
+         'list_price': str(row['list_price'])}
+        for row in rows
+    ])
+
+
+_EXPORT_CONTENT_TYPES = {
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+
+@require_GET
+def order_export(request, restaurant_id, fmt):
+    """
+    Stream an owner's order lines (with item nutrition and tags) as Parquet or an Arrow IPC stream
+    GET /api/analytics/restaurants/<id>/orders/export.parquet?since=2026-01-01&until=2026-01-31
+    """
+    if not request.user.is_authenticated:
+        return error_response('Authentication credentials were not provided.', status=403)
+    owner_id = Restaurant.objects.filter(pk=restaurant_id).values_list('user_id', flat=True).first()
+    if owner_id is None or fmt not in EXPORT_FORMATS:
+        return error_response('Not found.', status=404)
+    if owner_id != request.user.pk:
+        return error_response('Not your restaurant', status=403)
+    params, error = validate_query(OrderExportQuerySerializer, request)
+    if error:
+        return error
+    
+    try:
+        line_schema()
+    except ExportUnavailable as exc:
+        return error_response(str(exc), status=501)
+    
+    lines = restaurant_lines(restaurant_id, params.get('since'), params.get('until'))
+    response = StreamingHttpResponse(stream_lines(lines, fmt), content_type=_EXPORT_CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="orders-{restaurant_id}.{fmt}"'
+    return response
@@ -0,0 +1,175 @@
+# config/admin_pagination.py
+
+import base64
+import json
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList, ORDER_VAR
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'after'
+
+# Below this many rows an exact COUNT(*) is cheap enough
+ESTIMATED_COUNT_THRESHOLD = 100_000
+
+
+def estimated_row_count(model, using='default'):
+    """Planner row estimate for a table (PostgreSQL only), or None"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that uses the planner's row estimate for unfiltered querysets
+    on large PostgreSQL tables instead of an exact COUNT(*)
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+def encode_cursor(values):
+    payload = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, model, ordering):
+    """Decode a cursor into field values converted by each model field"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise IncorrectLookupParameters('Invalid cursor')
+    if not isinstance(raw, list) or len(raw) != len(ordering):
+        raise IncorrectLookupParameters('Invalid cursor')
+    values = []
+    for value, field_name in zip(raw, ordering):
+        field = model._meta.get_field(field_name.lstrip('-'))
+        try:
+            values.append(field.to_python(value))
+        except Exception:
+            raise IncorrectLookupParameters('Invalid cursor')
+    return values
+
+
+def keyset_filter(ordering, values):
+    """
+    Q selecting rows strictly after `values` in `ordering`
+    e.g. ('-ordertime', '-id') -> ordertime < t OR (ordertime = t AND id < i)
+    """
+    query = Q()
+    for position, field_name in enumerate(ordering):
+        name = field_name.lstrip('-')
+        lookup = 'lt' if field_name.startswith('-') else 'gt'
+        condition = {f'{name}__{lookup}': values[position]}
+        for previous, previous_value in zip(ordering[:position], values[:position]):
+            condition[previous.lstrip('-')] = previous_value
+        query |= Q(**condition)
+    return query
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist that pages with ?after=<cursor> instead of OFFSET
+
+    Active while the list uses the admin's keyset_ordering (no column sort
+    chosen and not "show all"); otherwise behaves like the stock changelist.
+    Each page is one indexed range scan, so page 1000 costs the same as page 1.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_ordering(self):
+        return self.model_admin.keyset_ordering
+
+    @property
+    def keyset_active(self):
+        return ORDER_VAR not in self.params and not self.show_all
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if not self.keyset_active:
+            return queryset
+        queryset = queryset.order_by(*self.keyset_ordering)
+        # Count against the list without the cursor so the total stays put
+        self.uncursored_queryset = queryset
+        if self.cursor:
+            values = decode_cursor(self.cursor, self.lookup_opts.model, self.keyset_ordering)
+            queryset = queryset.filter(keyset_filter(self.keyset_ordering, values))
+        return queryset
+
+    def get_results(self, request):
+        if not self.keyset_active:
+            return super().get_results(request)
+
+        paginator = self.model_admin.get_paginator(request, self.uncursored_queryset, self.list_per_page)
+        rows = list(self.queryset[:self.list_per_page + 1])
+        has_next = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        if has_next:
+            last = rows[-1]
+            self.next_cursor = encode_cursor(
+                getattr(last, field_name.lstrip('-')) for field_name in self.keyset_ordering
+            )
+
+        self.paginator = paginator
+        self.result_count = paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_next or bool(self.cursor)
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and searching links start again from the first page
+        remove = list(remove or [])
+        if not new_params or CURSOR_VAR not in new_params:
+            remove.append(CURSOR_VAR)
+        return super().get_query_string(new_params, remove)
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    def first_page_url(self):
+        return self.get_query_string()
+
+
+class KeysetPaginationMixin:
+    """
+    ModelAdmin mixin for large tables: keyset pagination, estimated counts
+    and no second unfiltered COUNT(*) per page
+    Set keyset_ordering to a unique, indexed ordering such as ('-ordertime', '-id')
+    (list_editable is not supported: the page is a list, not a queryset)
+    """
+    keyset_ordering = ('-id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
@@ -0,0 +1,23 @@
+# config/async_api.py
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+
+# DRF has no async views, so async endpoints are plain Django views that
+# mirror DRF's JSON shapes: serializer errors as-is, {"detail": ...} otherwise
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=DjangoJSONEncoder)
+
+
+def error_response(detail, status):
+    return json_response({'detail': detail}, status=status)
+
+
+def validate_query(serializer_class, request):
+    """Validate query parameters; returns (validated_data, None) or (None, 400 response)"""
+    params = serializer_class(data=request.GET)
+    if not params.is_valid():
+        return None, json_response(params.errors, status=400)
+    return params.validated_data, None
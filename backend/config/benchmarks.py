@@ -0,0 +1,368 @@
+# config/benchmarks.py
+
+import io
+import json
+import logging
+import math
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from itertools import cycle
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from .profiling import QueryRecorder
+
+# Fixed-size datasets (seed_data --restaurants ... --seed 1); a baseline only
+# compares against runs on the same one
+DATASETS = {
+    'small': {'restaurants': 20, 'items_per': 20, 'customers': 200, 'orders': 5000},
+    'medium': {'restaurants': 100, 'items_per': 30, 'customers': 2000, 'orders': 50000},
+    'large': {'restaurants': 500, 'items_per': 40, 'customers': 20000, 'orders': 500000},
+}
+DATASET_SEED = 1
+
+DEFAULT_ROUNDS = 50
+DEFAULT_WARMUP = 5
+
+# A scenario regresses when p50 or p95 grows by more than THRESHOLD (and by
+# at least MIN_DELTA_MS, so sub-millisecond jitter can't fail a run), or when
+# it issues more queries than the baseline
+THRESHOLD = 0.25
+MIN_DELTA_MS = 1.0
+
+SCENARIOS = {}
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples: the smallest one with pct% of them at or below it"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def scenario(name, rounds=DEFAULT_ROUNDS):
+    """
+    Register a benchmark, pytest-benchmark style
+    The function gets a Benchmark and the Dataset and calls benchmark(target)
+    once; the runner times warmup + rounds calls of target.
+    """
+    def register(func):
+        SCENARIOS[name] = (func, rounds)
+        return func
+    return register
+
+
+class BenchmarkError(Exception):
+    """A scenario's target failed (unexpected status, exception)"""
+
+
+class Benchmark:
+    """Times a target over several rounds, counting its queries on every connection"""
+
+    def __init__(self, name, rounds, warmup):
+        self.name = name
+        self.rounds = rounds
+        self.warmup = warmup
+        self.timings = []
+        self.queries = []
+
+    def __call__(self, target, setup=None):
+        """
+        Run target() warmup + rounds times; setup(), untimed, runs before
+        each call and the tuple it returns (if any) is passed as target's arguments
+        """
+        for index in range(self.warmup + self.rounds):
+            args = (setup() if setup else None) or ()
+            recorder = QueryRecorder()
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(recorder))
+                start = time.perf_counter()
+                target(*args)
+                elapsed = time.perf_counter() - start
+            if index >= self.warmup:
+                self.timings.append(elapsed * 1000)
+                self.queries.append(recorder.count)
+
+    def stats(self):
+        timings = self.timings
+        return {
+            'rounds': len(timings),
+            'queries': max(self.queries),
+            'queries_median': statistics.median(self.queries),
+            'min_ms': round(min(timings), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+        }
+
+
+class Dataset:
+    """Ids the scenarios draw from, read once after seeding"""
+
+    def __init__(self):
+        from orders.models import Order
+        from restaurants.models import Item, Restaurant
+        from users.models import Customer
+
+        self.menus = {}
+        for restaurant_id, item_id in Item.objects.order_by('restaurant_id', 'id').values_list('restaurant_id', 'id'):
+            self.menus.setdefault(restaurant_id, []).append(item_id)
+        self.restaurants = dict(
+            Restaurant.objects.filter(id__in=list(self.menus)).order_by('id').values_list('id', 'user_id')
+        )
+        self.customers = list(Customer.objects.order_by('id').values_list('id', 'user_id'))
+        self.order_ids = list(Order.objects.order_by('id').values_list('id', flat=True))
+        # The busiest restaurant and customer give the longest history pages
+        busiest = Order.objects.values('restaurant_id').annotate(n=Count('id')).order_by('-n', 'restaurant_id').first()
+        self.busy_restaurant_id = busiest['restaurant_id'] if busiest else next(iter(self.restaurants))
+        loyal = Order.objects.values('customer_id').annotate(n=Count('id')).order_by('-n', 'customer_id').first()
+        self.busy_customer_id = loyal['customer_id'] if loyal else self.customers[0][0]
+
+    def client_for(self, user_id):
+        client = Client()
+        client.force_login(get_user_model().objects.get(pk=user_id))
+        return client
+
+
+def _expect(response, status=200):
+    if response.status_code != status:
+        raise BenchmarkError(f'{response.request["PATH_INFO"]} answered {response.status_code}, expected {status}')
+    return response
+
+
+# Scenarios
+
+@scenario('menu')
+def menu(benchmark, data):
+    """GET a restaurant's menu (snapshot read)"""
+    client = Client()
+    restaurant_ids = cycle(data.restaurants)
+    benchmark(lambda: _expect(client.get(f'/api/restaurants/{next(restaurant_ids)}/menu/')))
+
+
+@scenario('menu-build')
+def menu_build(benchmark, data):
+    """Rebuild a menu snapshot from items and their tags, catalog cold"""
+    from restaurants.catalog import catalog
+    from restaurants.snapshots import build_menu_snapshot
+
+    restaurant_ids = cycle(data.restaurants)
+
+    def setup():
+        catalog.invalidate()
+        return (next(restaurant_ids),)
+
+    benchmark(build_menu_snapshot, setup=setup)
+
+
+@scenario('order-create')
+def order_create(benchmark, data):
+    """POST a three-line order as a customer"""
+    _, user_id = data.customers[0]
+    client = data.client_for(user_id)
+    menus = cycle(sorted(data.menus.items()))
+
+    def place():
+        restaurant_id, item_ids = next(menus)
+        lines = [{'item': item_id, 'quantity': 1 + index} for index, item_id in enumerate(item_ids[:3])]
+        _expect(client.post(
+            '/api/orders/', {'restaurant': restaurant_id, 'items': lines}, content_type='application/json',
+        ), status=201)
+
+    benchmark(place)
+
+
+@scenario('preferences-record')
+def preferences_record(benchmark, data):
+    """Fold a batch of 100 orders into customer preference counts"""
+    from orders.preferences import record_order_preferences
+
+    batches = cycle([data.order_ids[start:start + 100] for start in range(0, len(data.order_ids), 100)])
+    benchmark(lambda: record_order_preferences(next(batches)))
+
+
+@scenario('preferences-rebuild', rounds=20)
+def preferences_rebuild(benchmark, data):
+    """Recompute preference counts of 50 customers from their order history"""
+    from orders.preferences import rebuild_customer_preferences
+
+    customer_ids = [customer_id for customer_id, _ in data.customers]
+    batches = cycle([customer_ids[start:start + 50] for start in range(0, len(customer_ids), 50)])
+    benchmark(lambda: rebuild_customer_preferences(next(batches)))
+
+
+@scenario('order-history')
+def order_history(benchmark, data):
+    """First history page of the customer with the most orders, page cache cold"""
+    from orders.history import invalidate_order_history
+
+    user_id = dict(data.customers)[data.busy_customer_id]
+    client = data.client_for(user_id)
+    benchmark(
+        lambda: _expect(client.get('/api/orders/history/')),
+        setup=lambda: invalidate_order_history(customer_ids=[data.busy_customer_id]),
+    )
+
+
+@scenario('restaurant-order-history')
+def restaurant_order_history(benchmark, data):
+    """First history page of the busiest restaurant, page cache cold"""
+    from orders.history import invalidate_order_history
+
+    restaurant_id = data.busy_restaurant_id
+    client = data.client_for(data.restaurants[restaurant_id])
+    benchmark(
+        lambda: _expect(client.get(f'/api/orders/restaurant/{restaurant_id}/history/')),
+        setup=lambda: invalidate_order_history(restaurant_ids=[restaurant_id]),
+    )
+
+
+def _admin_client():
+    User = get_user_model()
+    admin, _ = User.objects.get_or_create(
+        username='benchmark_admin', defaults={'type': 'owner', 'is_staff': True, 'is_superuser': True},
+    )
+    client = Client()
+    client.force_login(admin)
+    return client
+
+
+@scenario('admin-orders', rounds=20)
+def admin_orders(benchmark, data):
+    """Order admin changelist, first page"""
+    client = _admin_client()
+    benchmark(lambda: _expect(client.get('/admin/orders/order/')))
+
+
+@scenario('admin-items', rounds=20)
+def admin_items(benchmark, data):
+    """Item admin changelist, first page"""
+    client = _admin_client()
+    benchmark(lambda: _expect(client.get('/admin/restaurants/item/')))
+
+
+@scenario('admin-customers', rounds=20)
+def admin_customers(benchmark, data):
+    """Customer admin changelist, first page"""
+    client = _admin_client()
+    benchmark(lambda: _expect(client.get('/admin/users/customer/')))
+
+
+# Runner
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    A freshly migrated copy of the configured databases (Django's test
+    databases), destroyed afterwards; the real data is never touched
+    SQLite gets a file instead of the default in-memory test database, which
+    would flatter every timing.
+    """
+    from restaurants.catalog import catalog
+
+    test_settings = connections[DEFAULT_DB_ALIAS].settings_dict['TEST']
+    directory = None
+    if connections[DEFAULT_DB_ALIAS].vendor == 'sqlite' and not test_settings.get('NAME'):
+        directory = tempfile.mkdtemp(prefix='benchmarks-')
+        test_settings['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+    old_config = setup_databases(verbosity, interactive=False, aliases={DEFAULT_DB_ALIAS}, serialized_aliases=set())
+    try:
+        cache.clear()
+        catalog.invalidate()
+        yield
+    finally:
+        teardown_databases(old_config, verbosity)
+        cache.clear()
+        catalog.invalidate()
+        if directory:
+            test_settings['NAME'] = None
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def seed_dataset(size, stdout=None):
+    """Load a fixed-size dataset into the (benchmark) database"""
+    call_command('seed_data', seed=DATASET_SEED, stdout=stdout or io.StringIO(), **DATASETS[size])
+
+
+def run_scenarios(names=None, rounds=None, warmup=DEFAULT_WARMUP, log=None):
+    """Run registered scenarios in order; returns {name: stats}"""
+    data = Dataset()
+    results = {}
+    # Test clients send Host: testserver; query budget warnings are noise here
+    profiling_logger = logging.getLogger('config.profiling')
+    previous_level = profiling_logger.level
+    profiling_logger.setLevel(logging.ERROR)
+    try:
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for name, (func, default_rounds) in SCENARIOS.items():
+                if names and name not in names:
+                    continue
+                benchmark = Benchmark(name, rounds or default_rounds, warmup)
+                func(benchmark, data)
+                results[name] = benchmark.stats()
+                if log:
+                    log(name, results[name])
+    finally:
+        profiling_logger.setLevel(previous_level)
+    return results
+
+
+def report(size, results):
+    """The JSON document stored as a baseline"""
+    return {
+        'dataset': {'name': size, 'seed': DATASET_SEED, **DATASETS[size]},
+        'database': connections[DEFAULT_DB_ALIAS].vendor,
+        'recorded_at': timezone.now().isoformat(),
+        'scenarios': results,
+    }
+
+
+def load_baseline(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_baseline(path, document):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, indent=2, sort_keys=True) + '\n')
+
+
+def compare(baseline, results, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """
+    Regressions of a run against a baseline document
+    Returns a list of (scenario, message); scenarios missing from the
+    baseline are new and not compared.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if current['queries'] > previous['queries']:
+            regressions.append((name, f"queries {previous['queries']} -> {current['queries']}"))
+        for key in ('p50_ms', 'p95_ms'):
+            before, after = previous[key], current[key]
+            if after > before * (1 + threshold) and after - before >= min_delta_ms:
+                # A baseline that rounded to 0.0ms has no meaningful ratio
+                growth = f'+{(after / before - 1) * 100:.0f}%' if before else 'from 0'
+                regressions.append((name, f'{key} {before:.2f} -> {after:.2f} ({growth})'))
+    return regressions
+
+
+def default_baseline_path():
+    return Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
@@ -0,0 +1,102 @@
+# config/db_router.py
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.deprecation import MiddlewareMixin
+
+PIN_COOKIE = 'db_primary_pin'
+
+
+class _Pin:
+    """Whether reads in the current request must use the primary"""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Set per request by PrimaryPinningMiddleware. Outside a request (commands,
+# task workers, thread pools) there is no pin: a shared default would let the
+# first write anywhere send the whole process's reads to the primary for good.
+# Code there that reads back its own writes should do so in transaction.atomic()
+_pin = ContextVar('db_primary_pin', default=None)
+
+
+def pin_to_primary():
+    """Send the rest of this request's reads to the primary (no-op outside a request)"""
+    state = _pin.get()
+    if state is not None:
+        state.pinned = True
+        state.wrote = True
+
+
+def is_pinned():
+    state = _pin.get()
+    return state is not None and state.pinned
+
+
+class PrimaryReplicaRouter:
+    """
+    Reads of REPLICA_READ_APPS models go to a random replica, everything else
+    to the primary
+
+    Reads stay on the primary when:
+    - this request already wrote (read-your-writes), or the client wrote in
+      the last REPLICA_STICKY_SECONDS (see PrimaryPinningMiddleware)
+    - the primary is inside a transaction, so reads see uncommitted rows
+    Migrations only run on the primary; replicas are copies of it.
+    """
+
+    def _replicas(self):
+        return getattr(settings, 'DATABASE_REPLICAS', [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas or model._meta.app_label not in getattr(settings, 'REPLICA_READ_APPS', ()):
+            return DEFAULT_DB_ALIAS
+        if is_pinned() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryPinningMiddleware(MiddlewareMixin):
+    """
+    Scopes the primary pin to a request
+    A request that writes sets a short-lived cookie so the same client's next
+    requests also read from the primary until the replicas have caught up.
+    """
+
+    def process_request(self, request):
+        request._db_pin_token = _pin.set(_Pin(pinned=PIN_COOKIE in request.COOKIES))
+
+    def process_response(self, request, response):
+        state = _pin.get()
+        if state is not None and state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 5),
+                httponly=True,
+                samesite='Lax',
+            )
+        token = getattr(request, '_db_pin_token', None)
+        if token is not None:
+            try:
+                _pin.reset(token)
+            except ValueError:
+                # Set in a different context (async request path); the next request sets its own
+                pass
+        return response
@@ -0,0 +1,161 @@
+# config/profiling.py
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, JsonResponse
+
+logger = logging.getLogger('config.profiling')
+
+# Collapse literals and IN lists so "same query, different ids" share a fingerprint
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+)\s*,?)+\)', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when an endpoint issues more queries than its budget"""
+
+
+def fingerprint(sql):
+    """Normalize SQL so repeated queries that differ only by parameters compare equal"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper that counts queries, sums their time and groups them by fingerprint"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self, threshold):
+        """Fingerprints executed at least `threshold` times (likely N+1 loops)"""
+        return {sql: n for sql, n in self.fingerprints.most_common() if n >= threshold}
+
+
+# Most recent request profiles, newest last
+_buffer_lock = threading.Lock()
+_buffer = deque(maxlen=getattr(settings, 'PROFILING_BUFFER_SIZE', 200))
+
+
+def recent_profiles():
+    with _buffer_lock:
+        return list(_buffer)
+
+
+def clear_profiles():
+    with _buffer_lock:
+        _buffer.clear()
+
+
+def query_budget(url_name):
+    """Configured query budget for a URL name, or None"""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+class ProfilingMiddleware:
+    """
+    Per-request DB query count, SQL time, duplicate-query detection and wall time
+
+    Each request's profile goes to the `config.profiling` logger as JSON and
+    into an in-memory ring buffer served by profiles_view(). When a URL name
+    has an entry in settings.QUERY_BUDGETS and the request exceeds it, a
+    warning is logged, or QueryBudgetExceeded is raised if
+    settings.QUERY_BUDGET_STRICT is set (enable it in tests).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.duplicate_threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', 3)
+        # Stay async under ASGI so async views aren't pushed onto a thread
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with self._recording(recorder):
+            response = self.get_response(request)
+        return self._finish(request, response, recorder, start)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # Connections are per thread: wrap the ones in the thread where this
+        # request's sync_to_async ORM calls run, not the event loop's
+        with await sync_to_async(self._recording)(recorder):
+            response = await self.get_response(request)
+        return self._finish(request, response, recorder, start)
+
+    @staticmethod
+    def _recording(recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def _finish(self, request, response, recorder, start):
+        wall = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        url_name = match.view_name if match else None
+        profile = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.duration * 1000, 2),
+            'wall_ms': round(wall * 1000, 2),
+            'duplicates': recorder.duplicates(self.duplicate_threshold),
+            'timestamp': time.time(),
+        }
+        with _buffer_lock:
+            _buffer.append(profile)
+        logger.info(json.dumps(profile))
+
+        if settings.DEBUG:
+            response['X-DB-Queries'] = str(recorder.count)
+            response['X-DB-Time-Ms'] = str(profile['sql_ms'])
+
+        budget = query_budget(url_name)
+        if budget is not None and recorder.count > budget:
+            message = f'{url_name} issued {recorder.count} queries (budget {budget})'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+def profiles_view(request):
+    """Recent request profiles as JSON (DEBUG or staff only)"""
+    if not (settings.DEBUG or getattr(request.user, 'is_staff', False)):
+        raise Http404
+    return JsonResponse({'profiles': recent_profiles()})
@@ -36,9 +36,13 @@ INSTALLED_APPS = [
     'users',
     'restaurants',
     'orders',
+    'analytics',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
+    'config.profiling.ProfilingMiddleware',  # Outermost so it sees every query
+    'config.db_router.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # Add this for React
@@ -54,7 +58,7 @@ ROOT_URLCONF = 'config.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -68,6 +72,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# Async views (menu browsing, nearby, recommendations) only pay off under ASGI,
+# e.g. uvicorn config.asgi:application
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Database
 # Use PostgreSQL if POSTGRES_* environment variables are provided, otherwise fall back to SQLite for local dev
@@ -77,18 +84,42 @@ POSTGRES_PASSWORD = os.environ.get('POSTGRES_PASSWORD')
 POSTGRES_HOST = os.environ.get('POSTGRES_HOST')
 POSTGRES_PORT = os.environ.get('POSTGRES_PORT', '5432')
 
+# Optional read replicas: comma-separated hosts, same credentials as the primary
+POSTGRES_REPLICA_HOSTS = [host.strip() for host in os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',') if host.strip()]
+
+# Optional psycopg 3 connection pool (pip install "psycopg[pool]"); replaces CONN_MAX_AGE persistence
+POSTGRES_POOL = os.environ.get('POSTGRES_POOL') == '1'
+POSTGRES_POOL_OPTIONS = {
+    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', '2')),
+    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', '10')),
+    'timeout': float(os.environ.get('POSTGRES_POOL_TIMEOUT', '10')),
+}
+
+
+def postgres_database(host, **extra):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': POSTGRES_NAME,
+        'USER': POSTGRES_USER,
+        'PASSWORD': POSTGRES_PASSWORD,
+        'HOST': host,
+        'PORT': POSTGRES_PORT,
+        'CONN_MAX_AGE': 600,
+        **extra,
+    }
+    if POSTGRES_POOL:
+        # Django's pool requires non-persistent connections
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'] = {'pool': dict(POSTGRES_POOL_OPTIONS)}
+    return database
+
+
 if POSTGRES_NAME and POSTGRES_USER and POSTGRES_PASSWORD and POSTGRES_HOST:
     DATABASES = {
-        'default': {
-            'ENGINE': 'django.db.backends.postgresql',
-            'NAME': POSTGRES_NAME,
-            'USER': POSTGRES_USER,
-            'PASSWORD': POSTGRES_PASSWORD,
-            'HOST': POSTGRES_HOST,
-            'PORT': POSTGRES_PORT,
-            'CONN_MAX_AGE': 600,
-        }
+        'default': postgres_database(POSTGRES_HOST),
     }
+    for number, host in enumerate(POSTGRES_REPLICA_HOSTS, start=1):
+        DATABASES[f'replica{number}'] = postgres_database(host, TEST={'MIRROR': 'default'})
 else:
     DATABASES = {
         'default': {
@@ -96,6 +127,43 @@ else:
             'NAME': BASE_DIR / 'db.sqlite3',
         }
     }
+    # SQLITE_READ_REPLICA=1 adds a read-only alias on the same file, to exercise routing locally
+    # (a routed write to it fails with "attempt to write a readonly database")
+    if os.environ.get('SQLITE_READ_REPLICA') == '1':
+        DATABASES['replica1'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': f"file:{BASE_DIR / 'db.sqlite3'}?mode=ro",
+            'TEST': {'MIRROR': 'default'},
+        }
+
+# Read/write splitting (config/db_router.py)
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Apps whose reads may be served by a replica (menu browsing, tag lookups, search)
+REPLICA_READ_APPS = ['restaurants']
+# After a request that wrote, keep that client's reads on the primary this long (replication lag)
+REPLICA_STICKY_SECONDS = 5
+
+# Cache
+# Must be shared by every worker process: it holds the catalog version (restaurants/catalog.py) and the
+# order history generations (orders/history.py), and a bump only reaches the workers that share it.
+# Set REDIS_URL (e.g. redis://localhost:6379/0, needs the redis package) wherever more than one process
+# serves requests; the local-memory fallback is for single-process development, and `manage.py check --deploy`
+# reports it as an error. Optional packages are listed in requirements-optional.txt.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -143,6 +211,82 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Request profiling (config/profiling.py)
+# Max queries per URL name; exceeding logs a warning, or raises when QUERY_BUDGET_STRICT is on (tests)
+QUERY_BUDGETS = {
+    'restaurant-nearby': 3,
+    'restaurant-menu': 5,
+    'item-list': 3,
+    'item-search': 5,
+    'menu-export': 3,
+    'order-create': 12,  # side effects are queued, not run (see orders/tasks.py)
+    'recommendations': 6,
+    'meal-plan': 6,
+    'order-history': 6,
+    'restaurant-order-history': 6,
+    'restaurant-dashboard': 6,
+    'item-also-ordered': 3,
+    'restaurant-combos': 3,
+    'restaurant-order-export': 3,
+}
+QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT') == '1'
+PROFILING_BUFFER_SIZE = 200
+PROFILING_DUPLICATE_THRESHOLD = 3  # Same query fingerprint this many times = likely N+1
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config.profiling': {
+            'handlers': ['console'],
+            'level': os.environ.get('PROFILING_LOG_LEVEL', 'WARNING'),
+        },
+    },
+}
+
+# AI recommendation explanations
+# Set AI_BACKEND=orders.ai.AnthropicBackend (and ANTHROPIC_API_KEY) to call the real model
+AI_EXPLANATION = {
+    'BACKEND': os.environ.get('AI_BACKEND', 'orders.ai.FakeBackend'),
+    'MAX_ENTRIES': 1024,  # LRU size
+    'TTL': 3600,  # seconds
+    'MAX_WORKERS': 4,
+    'TIMEOUT': 10,  # seconds an async view waits before answering without an explanation
+}
+
+# Photo renditions (restaurants/images.py), built by a background pool after upload
+IMAGE_RENDITIONS = {
+    'SIZES': {'thumb': 160, 'card': 480, 'large': 1200},  # longest side in px
+    'FORMATS': ['webp', 'jpeg'],
+    'QUALITY': 80,
+    'MAX_WORKERS': 2,
+    'EAGER': False,  # build inline instead (tests, management commands)
+}
+
+# Background tasks (taskqueue/queue.py), run by `manage.py run_tasks`
+# TASKS_EAGER=1 runs them in-process right after the queuing transaction commits (tests, local dev without a worker)
+TASK_QUEUE = {
+    'EAGER': os.environ.get('TASKS_EAGER') == '1',
+    'CLAIM_SIZE': 200,  # tasks a worker locks per round
+    'RETRY_DELAY_SECONDS': 5,  # doubled after every failed attempt
+    'LOCK_TIMEOUT_SECONDS': 300,  # running tasks older than this are assumed orphaned and requeued
+}
+
+# Order history partitioning and archival (orders/partitions.py, orders/archive.py)
+# `manage.py partition_orders` (PostgreSQL) keeps monthly partitions ahead of time;
+# `manage.py archive_orders` moves months older than the retention window to ARCHIVE_ROOT
+ORDER_ARCHIVE = {
+    'ARCHIVE_ROOT': Path(os.environ.get('ORDER_ARCHIVE_ROOT', BASE_DIR / 'archive' / 'orders')),
+    'RETENTION_MONTHS': 24,
+    'PARTITIONS_AHEAD': 3,  # future months that always have a partition
+}
+
+# Parquet dataset written by `manage.py export_orders` (analytics/exports.py, needs pyarrow)
+ORDER_EXPORT_ROOT = Path(os.environ.get('ORDER_EXPORT_ROOT', BASE_DIR / 'exports' / 'orders'))
+
 # CORS settings (allow React to talk to Django)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",  # React default port
@@ -0,0 +1,69 @@
+# config/tests.py
+
+from django.test import SimpleTestCase
+
+from .benchmarks import compare, percentile
+
+
+class PercentileTests(SimpleTestCase):
+    def test_nearest_rank(self):
+        samples = list(range(1, 11))
+        self.assertEqual(percentile(samples, 50), 5)
+        self.assertEqual(percentile(samples, 95), 10)
+        self.assertEqual(percentile(samples, 99), 10)
+        self.assertEqual(percentile(samples, 100), 10)
+        self.assertEqual(percentile(samples, 1), 1)
+
+    def test_rounds_the_rank_up(self):
+        # 95% of 30 samples is rank 28.5: the 29th sample (round() gave the 28th)
+        samples = list(range(30, 0, -1))
+        self.assertEqual(percentile(samples, 95), 29)
+        self.assertEqual(percentile([3, 1, 2], 50), 2)
+        self.assertEqual(percentile([4, 1, 3, 2], 60), 3)
+
+    def test_single_sample(self):
+        self.assertEqual(percentile([7.5], 0), 7.5)
+        self.assertEqual(percentile([7.5], 95), 7.5)
+
+
+class CompareTests(SimpleTestCase):
+    def stats(self, p50=10.0, p95=20.0, queries=5):
+        return {'p50_ms': p50, 'p95_ms': p95, 'queries': queries}
+
+    def baseline(self, **scenarios):
+        return {'scenarios': scenarios}
+
+    def test_within_threshold(self):
+        baseline = self.baseline(menu=self.stats())
+        self.assertEqual(compare(baseline, {'menu': self.stats(p50=12.4, p95=24.9)}), [])
+
+    def test_latency_regression(self):
+        baseline = self.baseline(menu=self.stats())
+        regressions = compare(baseline, {'menu': self.stats(p50=13.0, p95=20.0)})
+        self.assertEqual(regressions, [('menu', 'p50_ms 10.00 -> 13.00 (+30%)')])
+
+    def test_small_absolute_growth_is_jitter(self):
+        baseline = self.baseline(menu=self.stats(p50=0.5, p95=1.0))
+        self.assertEqual(compare(baseline, {'menu': self.stats(p50=1.2, p95=1.9)}), [])
+        regressions = compare(baseline, {'menu': self.stats(p50=1.2, p95=2.0)})
+        self.assertEqual(regressions, [('menu', 'p95_ms 1.00 -> 2.00 (+100%)')])
+
+    def test_zero_baseline(self):
+        baseline = self.baseline(menu=self.stats(p50=0.0))
+        self.assertEqual(compare(baseline, {'menu': self.stats(p50=1.5)}), [('menu', 'p50_ms 0.00 -> 1.50 (from 0)')])
+
+    def test_extra_queries_regress_at_any_speed(self):
+        baseline = self.baseline(menu=self.stats())
+        regressions = compare(baseline, {'menu': self.stats(p50=5.0, p95=5.0, queries=6)})
+        self.assertEqual(regressions, [('menu', 'queries 5 -> 6')])
+        self.assertEqual(compare(baseline, {'menu': self.stats(queries=4)}), [])
+
+    def test_custom_threshold(self):
+        baseline = self.baseline(menu=self.stats())
+        current = {'menu': self.stats(p50=11.5)}
+        self.assertEqual(compare(baseline, current), [])
+        self.assertEqual(compare(baseline, current, threshold=0.1), [('menu', 'p50_ms 10.00 -> 11.50 (+15%)')])
+
+    def test_new_scenarios_are_not_compared(self):
+        baseline = self.baseline(menu=self.stats())
+        self.assertEqual(compare(baseline, {'menu': self.stats(), 'search': self.stats(p50=999.0)}), [])
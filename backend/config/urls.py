@@ -15,8 +15,14 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path
+from django.urls import include, path
+
+from config.profiling import profiles_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/restaurants/', include('restaurants.urls')),
+    path('api/orders/', include('orders.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('debug/profiling/', profiles_view, name='debug-profiling'),
 ]
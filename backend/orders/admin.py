@@ -1,6 +1,9 @@
 # orders/admin.py
 
 from django.contrib import admin
+from django.db.models import DecimalField, ExpressionWrapper, F
+
+from config.admin_pagination import KeysetPaginationMixin
 from .models import Order, OrderItem, CustomerPreferenceTag
 
 
@@ -9,12 +12,15 @@ class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 1
     fields = ['item', 'quantity']
+    autocomplete_fields = ['item']  # Avoid rendering every menu item per row
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     """Order admin"""
     list_display = ['id', 'customer', 'restaurant', 'totalprice', 'isrecommended', 'ordertime']
+    list_select_related = ['customer', 'restaurant']
+    keyset_ordering = ('-ordertime', '-id')
     list_filter = ['isrecommended', 'ordertime', 'restaurant']
     search_fields = ['customer__firstname', 'customer__lastname', 'restaurant__name']
     inlines = [OrderItemInline]
@@ -33,17 +39,35 @@ class OrderAdmin(admin.ModelAdmin):
 
 
 @admin.register(OrderItem)
-class OrderItemAdmin(admin.ModelAdmin):
+class OrderItemAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     """Order Item admin"""
     list_display = ['order', 'item', 'quantity', 'subtotal']
     list_filter = ['order__ordertime']
     search_fields = ['item__name', 'order__customer__firstname']
+    # Order.__str__ and Item.__str__ read these relations
+    list_select_related = ['order__customer', 'order__restaurant', 'item__restaurant']
+    keyset_ordering = ('-id',)
+    
+    def get_queryset(self, request):
+        # Subtotal computed in SQL instead of the per-row property
+        return super().get_queryset(request).annotate(
+            subtotal_value=ExpressionWrapper(
+                F('price') * F('quantity'),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            )
+        )
+    
+    @admin.display(description='Subtotal', ordering='subtotal_value')
+    def subtotal(self, obj):
+        return obj.subtotal_value
 
 
 @admin.register(CustomerPreferenceTag)
-class CustomerPreferenceTagAdmin(admin.ModelAdmin):
+class CustomerPreferenceTagAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     """Customer Preference Tag admin"""
     list_display = ['customer', 'tag', 'count']
     list_filter = ['tag']
     search_fields = ['customer__firstname', 'customer__lastname', 'tag__name']
-    ordering = ['-count']
\ No newline at end of file
+    ordering = ['-count']
+    list_select_related = ['customer', 'tag']
+    keyset_ordering = ('-count', '-id')
\ No newline at end of file
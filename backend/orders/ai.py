@@ -0,0 +1,333 @@
+# orders/ai.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, transaction
+from django.utils.module_loading import import_string
+
+from restaurants.catalog import catalog
+from .models import Order, CustomerPreferenceTag
+
+logger = logging.getLogger(__name__)
+
+# Item fields build_prompt() reads from a candidate
+CANDIDATE_FIELDS = ('id', 'name', 'price', 'totalcalories', 'totalprotein', 'totalcarb', 'totalfat')
+
+
+class FakeBackend:
+    """
+    Offline stand-in for the model API
+    Sleeps for `latency` seconds and returns a deterministic explanation
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def explain(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._text(prompt)
+
+    async def aexplain(self, prompt):
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._text(prompt)
+
+    def _text(self, prompt):
+        names = ', '.join(item['name'] for item in prompt['candidates']) or 'nothing yet'
+        return f"Based on your past orders and goals, we suggest: {names}."
+
+
+class AnthropicBackend:
+    """
+    Calls the Anthropic Messages API (requires the `anthropic` package)
+    explain() uses the blocking client, aexplain() the asyncio (httpx) one
+    """
+
+    def __init__(self, model=None, max_tokens=300):
+        try:
+            import anthropic
+        except ImportError as exc:
+            raise ImproperlyConfigured(
+                'AI_BACKEND=orders.ai.AnthropicBackend needs the anthropic package (pip install anthropic)'
+            ) from exc
+        self.client = anthropic.Anthropic()
+        self.async_client = anthropic.AsyncAnthropic()
+        self.model = model or getattr(settings, 'AI_MODEL', 'claude-3-5-haiku-latest')
+        self.max_tokens = max_tokens
+
+    def _request(self, prompt):
+        return {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'messages': [{'role': 'user', 'content': render_prompt(prompt)}],
+        }
+
+    @staticmethod
+    def _text(message):
+        return ''.join(block.text for block in message.content if getattr(block, 'type', '') == 'text')
+
+    def explain(self, prompt):
+        return self._text(self.client.messages.create(**self._request(prompt)))
+
+    async def aexplain(self, prompt):
+        return self._text(await self.async_client.messages.create(**self._request(prompt)))
+
+
+def render_prompt(prompt):
+    """Turn the structured prompt into the text sent to the model"""
+    lines = [
+        'You are recommending menu items to a restaurant customer.',
+        f"Customer goals: {prompt['memo'] or 'none given'}",
+        f"Customer favourite tags: {', '.join(prompt['preferences']) or 'none yet'}",
+        'Candidate items (already ranked):',
+    ]
+    for item in prompt['candidates']:
+        lines.append(
+            f"- {item['name']} (${item['price']}): {item['totalcalories']} kcal, "
+            f"{item['totalprotein']}g protein, {item['totalcarb']}g carbs, {item['totalfat']}g fat"
+        )
+    if prompt.get('meals'):
+        lines.append('Combinations that fit the nutrition and budget limits (already solved, totals are exact):')
+        for meal in prompt['meals']:
+            parts = ', '.join(f"{quantity} x {name}" for name, quantity in meal['items'])
+            lines.append(
+                f"- {parts}: ${meal['price']}, {meal['totalcalories']} kcal, {meal['totalprotein']}g protein"
+            )
+    lines.append('In two or three sentences, explain why these items suit this customer.')
+    return '\n'.join(lines)
+
+
+def build_prompt(customer, candidates, meals=()):
+    """
+    Structured model input for a customer and a ranked candidate list
+    candidates: item dicts as returned by recommend_items()
+    meals: optional solved combinations as returned by plan_meals()
+    """
+    preference_vector = sorted(
+        CustomerPreferenceTag.objects.filter(customer=customer).values_list('tag_id', 'count')
+    )
+    top_tags = [tag_id for tag_id, _ in sorted(preference_vector, key=lambda pair: -pair[1])[:10]]
+    return {
+        'memo': customer.memo,
+        'preference_vector': preference_vector,
+        'preferences': catalog.tag_names(top_tags),
+        'candidate_ids': [item['id'] for item in candidates],
+        'candidates': [
+            {
+                'id': item['id'],
+                'name': item['name'],
+                'price': str(item['price']),
+                'totalcalories': item['totalcalories'],
+                'totalprotein': item['totalprotein'],
+                'totalcarb': item['totalcarb'],
+                'totalfat': item['totalfat'],
+            }
+            for item in candidates
+        ],
+        'meals': [
+            {
+                'items': [(item['name'], quantity) for item, quantity in meal['lines']],
+                'item_ids': [(item['id'], quantity) for item, quantity in meal['lines']],
+                'price': str(meal['totals']['price']),
+                'totalcalories': meal['totals']['totalcalories'],
+                'totalprotein': meal['totals']['totalprotein'],
+            }
+            for meal in meals
+        ],
+    }
+
+
+def prompt_key(prompt):
+    """Cache key: hash of the preference vector, candidate ids, solved meals and memo"""
+    payload = json.dumps(
+        [
+            prompt['preference_vector'],
+            prompt['candidate_ids'],
+            [meal['item_ids'] for meal in prompt.get('meals', ())],
+            prompt['memo'],
+        ],
+        separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ExplanationService:
+    """
+    Caching, coalescing front for the explanation backend
+
+    - Responses are kept in an in-process LRU with a TTL
+    - Concurrent requests for the same key share one in-flight backend call
+    - Calls run on a small thread pool so callers can fire and forget
+    - aexplain() awaits the backend's own coroutine when it has one, so
+      async views wait on the upstream without holding a thread
+    """
+
+    def __init__(self, backend, max_entries=1024, ttl=3600, max_workers=4):
+        self.backend = backend
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai-explain')
+        # In-flight asyncio tasks per event loop (tasks can't be awaited from another loop)
+        self._async_inflight = weakref.WeakKeyDictionary()
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def _store(self, key, text):
+        self._cache[key] = (time.monotonic() + self.ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def submit(self, prompt):
+        """Return a Future for the explanation of a prompt"""
+        key = prompt_key(prompt)
+        with self._lock:
+            text = self._cached(key)
+            if text is not None:
+                future = Future()
+                future.set_result(text)
+                return future
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._call, key, prompt)
+            self._inflight[key] = future
+            return future
+
+    def _call(self, key, prompt):
+        try:
+            text = self.backend.explain(prompt)
+            with self._lock:
+                self._store(key, text)
+            return text
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def explain(self, prompt, timeout=None):
+        """Blocking explanation for a prompt"""
+        return self.submit(prompt).result(timeout=timeout)
+
+    async def aexplain(self, prompt, timeout=None):
+        """Explanation for a prompt, awaited without blocking the event loop"""
+        key = prompt_key(prompt)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            text = self._cached(key)
+            if text is not None:
+                return text
+            thread_future = self._inflight.get(key)
+            inflight = self._async_inflight.setdefault(loop, {})
+            task = inflight.get(key)
+            if thread_future is None and task is None:
+                if hasattr(self.backend, 'aexplain'):
+                    task = loop.create_task(self._acall(key, prompt, inflight))
+                    inflight[key] = task
+                else:
+                    thread_future = self._executor.submit(self._call, key, prompt)
+                    self._inflight[key] = thread_future
+        # Shield the shared call so one caller timing out doesn't cancel it for the others
+        waiter = asyncio.shield(asyncio.wrap_future(thread_future) if task is None else task)
+        return await asyncio.wait_for(waiter, timeout)
+
+    async def _acall(self, key, prompt, inflight):
+        try:
+            text = await self.backend.aexplain(prompt)
+            with self._lock:
+                self._store(key, text)
+            return text
+        finally:
+            with self._lock:
+                inflight.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Process-wide ExplanationService built from settings.AI_EXPLANATION"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                config = dict(getattr(settings, 'AI_EXPLANATION', {}))
+                backend_class = import_string(config.pop('BACKEND', 'orders.ai.FakeBackend'))
+                backend = backend_class(**config.pop('OPTIONS', {}))
+                _service = ExplanationService(
+                    backend,
+                    max_entries=config.get('MAX_ENTRIES', 1024),
+                    ttl=config.get('TTL', 3600),
+                    max_workers=config.get('MAX_WORKERS', 4),
+                )
+    return _service
+
+
+def order_candidates(order):
+    """An order's items as build_prompt() candidates (prefetch items__item first)"""
+    return [{field: getattr(line.item, field) for field in CANDIDATE_FIELDS} for line in order.items.all()]
+
+
+def explain_order_async(order, candidates, meals=()):
+    """
+    Request an explanation for a recommended order without blocking the caller
+    The prompt is built and sent once the surrounding transaction commits
+    (right away outside one), and Order.aiexplanation is filled in when the
+    backend answers. Failures are logged; the order keeps an empty explanation.
+    """
+    order_id = order.pk
+    customer = order.customer
+    caller = threading.get_ident()
+
+    def save(done):
+        try:
+            error = done.exception()
+            if error is not None:
+                logger.error('Explanation for order %s failed', order_id, exc_info=error)
+                return
+            Order.objects.filter(pk=order_id).update(aiexplanation=done.result())
+        except Exception:
+            logger.exception('Saving the explanation for order %s failed', order_id)
+        finally:
+            if threading.get_ident() != caller:
+                # Ran on a pool thread, which has its own connections; don't leak them
+                connections.close_all()
+
+    def submit():
+        prompt = build_prompt(customer, candidates, meals)
+        get_service().submit(prompt).add_done_callback(save)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,221 @@
+# orders/archive.py
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .history import invalidate_order_history
+from .models import Order, OrderItem
+from .partitions import add_months, drop_partitions, is_partitioned, month_range, month_start
+
+ORDERS_PER_CHUNK = 2000
+
+_ORDER_FIELDS = ('id', 'customer_id', 'restaurant_id', 'totalprice', 'ordertime', 'isrecommended', 'aiexplanation')
+
+
+class ArchiveError(Exception):
+    """An export didn't match the rows it was meant to replace"""
+
+
+def _config():
+    return getattr(settings, 'ORDER_ARCHIVE', {})
+
+
+def archive_root():
+    return Path(_config().get('ARCHIVE_ROOT', Path(settings.BASE_DIR) / 'archive' / 'orders'))
+
+
+def month_directory(month):
+    return archive_root() / f'{month:%Y-%m}'
+
+
+def archived_months():
+    """Months with archive files, oldest first"""
+    root = archive_root()
+    if not root.is_dir():
+        return []
+    months = []
+    for path in sorted(root.iterdir()):
+        try:
+            months.append(datetime.strptime(path.name, '%Y-%m').replace(tzinfo=dt_timezone.utc))
+        except ValueError:
+            continue
+    return months
+
+
+def archive_cutoff(retention_months=None, now=None):
+    """Start of the oldest month that stays in the database"""
+    retention_months = _config().get('RETENTION_MONTHS', 24) if retention_months is None else retention_months
+    return add_months(month_start(now or timezone.now()), -retention_months)
+
+
+def months_to_archive(retention_months=None, using=DEFAULT_DB_ALIAS):
+    """Months older than the retention window that still have orders, oldest first"""
+    cutoff = archive_cutoff(retention_months)
+    oldest = Order.objects.using(using).filter(ordertime__lt=cutoff).aggregate(oldest=Min('ordertime'))['oldest']
+    if oldest is None:
+        return []
+    months = []
+    month = month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def order_documents(start, end, using=DEFAULT_DB_ALIAS):
+    """
+    Yield the orders placed in [start, end) as dicts with their lines nested
+    Orders and lines are streamed by two id-ordered queries and merged, so
+    memory stays flat whatever the month's size.
+    """
+    orders = (
+        Order.objects.using(using)
+        .filter(ordertime__gte=start, ordertime__lt=end)
+        .order_by('id')
+        .values(*_ORDER_FIELDS)
+        .iterator(chunk_size=ORDERS_PER_CHUNK)
+    )
+    lines = iter(
+        OrderItem.objects.using(using)
+        .filter(ordertime__gte=start, ordertime__lt=end)
+        .order_by('order_id', 'id')
+        .values_list('order_id', 'id', 'item_id', 'quantity', 'price')
+        .iterator(chunk_size=ORDERS_PER_CHUNK * 4)
+    )
+    line = next(lines, None)
+    for order in orders:
+        while line is not None and line[0] < order['id']:
+            line = next(lines, None)
+        items = []
+        while line is not None and line[0] == order['id']:
+            items.append({'id': line[1], 'item_id': line[2], 'quantity': line[3], 'price': str(line[4])})
+            line = next(lines, None)
+        # Full precision: DjangoJSONEncoder would cut timestamps to milliseconds
+        order['ordertime'] = order['ordertime'].isoformat()
+        order['totalprice'] = str(order['totalprice'])
+        order['items'] = items
+        yield order
+
+
+def write_archive(month, documents):
+    """
+    Write documents to a new gzipped JSON-lines part file of a month
+    Written under a temporary name and renamed, so readers never see a
+    partial file. Returns (path, orders, lines).
+    """
+    directory = month_directory(month)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'orders-{timezone.now():%Y%m%dT%H%M%S%f}.jsonl.gz'
+    temporary = path.with_name(f'.{path.name}.tmp')
+    orders = lines = 0
+    with gzip.open(temporary, 'wt', encoding='utf-8') as handle:
+        for document in documents:
+            handle.write(json.dumps(document, separators=(',', ':')) + '\n')
+            orders += 1
+            lines += len(document['items'])
+    os.replace(temporary, path)
+    return path, orders, lines
+
+
+def archive_month(month, using=DEFAULT_DB_ALIAS):
+    """
+    Move one month of orders out of the database into the archive
+
+    The month is exported first and the counts checked against the database;
+    only then is it removed, in one transaction: on a partitioned PostgreSQL
+    database its partitions are detached and dropped, elsewhere (and for rows
+    in the default partition) its rows are deleted. Aggregates built from the
+    orders (preferences, rollups, item neighbors) are left as they are.
+    Returns {'month', 'orders', 'lines', 'path'}.
+    """
+    start, end = month_range(month)
+    customers, restaurants = set(), set()
+
+    def documents():
+        for document in order_documents(start, end, using):
+            customers.add(document['customer_id'])
+            restaurants.add(document['restaurant_id'])
+            yield document
+
+    if not _counts(start, end, using)[0]:
+        return {'month': month, 'orders': 0, 'lines': 0, 'path': None}
+
+    path, written_orders, written_lines = write_archive(month, documents())
+    try:
+        with transaction.atomic(using=using):
+            # Counted again right before removal: rows backdated into the month
+            # since the export would otherwise be dropped without a copy
+            expected_orders, expected_lines = _counts(start, end, using)
+            if (written_orders, written_lines) != (expected_orders, expected_lines):
+                raise ArchiveError(
+                    f'{month:%Y-%m}: exported {written_orders} orders / {written_lines} lines, '
+                    f'the database has {expected_orders} / {expected_lines}'
+                )
+            if is_partitioned(using):
+                drop_partitions(month, using)
+            _delete_rows(start, end, using)
+    except BaseException:
+        # The rows are still in the database; don't leave a second copy behind
+        path.unlink(missing_ok=True)
+        raise
+    invalidate_order_history(customer_ids=customers, restaurant_ids=restaurants)
+    return {'month': month, 'orders': written_orders, 'lines': written_lines, 'path': path}
+
+
+def _counts(start, end, using):
+    """(orders, lines) placed in [start, end)"""
+    return (
+        Order.objects.using(using).filter(ordertime__gte=start, ordertime__lt=end).count(),
+        OrderItem.objects.using(using).filter(ordertime__gte=start, ordertime__lt=end).count(),
+    )
+
+
+def _delete_rows(start, end, using):
+    """Delete a month's lines and orders with two range statements (no per-row cascade collection)"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    params = [connection.ops.adapt_datetimefield_value(value) for value in (start, end)]
+    with connection.cursor() as cursor:
+        for table in (OrderItem._meta.db_table, Order._meta.db_table):
+            cursor.execute(f'DELETE FROM {quote(table)} WHERE ordertime >= %s AND ordertime < %s', params)
+
+
+def archive_orders(retention_months=None, using=DEFAULT_DB_ALIAS):
+    """Archive every month older than the retention window; returns one report per month"""
+    return [archive_month(month, using) for month in months_to_archive(retention_months, using)]
+
+
+def read_archive(since=None, until=None, customer_id=None, restaurant_id=None):
+    """
+    Yield archived orders (dicts as written by order_documents) placed in
+    [since, until), optionally for one customer or restaurant
+    Only the part files of the months in range are opened.
+    """
+    first = month_start(since) if since else None
+    for month in archived_months():
+        if first and month < first:
+            continue
+        if until and month >= until:
+            break
+        for path in sorted(month_directory(month).glob('orders-*.jsonl.gz')):
+            with gzip.open(path, 'rt', encoding='utf-8') as handle:
+                for line in handle:
+                    order = json.loads(line)
+                    if customer_id is not None and order['customer_id'] != customer_id:
+                        continue
+                    if restaurant_id is not None and order['restaurant_id'] != restaurant_id:
+                        continue
+                    if since or until:
+                        ordertime = parse_datetime(order['ordertime'])
+                        if (since and ordertime < since) or (until and ordertime >= until):
+                            continue
+                    yield order
@@ -0,0 +1,51 @@
+# orders/history.py
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from .models import Order, OrderItem
+
+
+def history_queryset():
+    """Orders with their line items and item names, newest first"""
+    lines = OrderItem.objects.select_related('item').only('id', 'order_id', 'quantity', 'item__id', 'item__name')
+    return (
+        Order.objects
+        .only('id', 'customer_id', 'restaurant_id', 'totalprice', 'ordertime', 'isrecommended', 'aiexplanation')
+        .prefetch_related(Prefetch('items', queryset=lines))
+        .order_by('-ordertime', '-id')
+    )
+
+
+def _generation_key(scope, owner_id):
+    return f'order-history:generation:{scope}:{owner_id}'
+
+
+def history_generation(scope, owner_id):
+    return cache.get(_generation_key(scope, owner_id), 0)
+
+
+def invalidate_order_history(customer_ids=(), restaurant_ids=()):
+    """Drop cached history pages for customers and restaurants that got new orders"""
+    keys = [_generation_key('customer', pk) for pk in customer_ids]
+    keys += [_generation_key('restaurant', pk) for pk in restaurant_ids]
+    for key in keys:
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cached_page(scope, owner_id, cursor, build):
+    """
+    Cache a serialized history page per (scope, owner, cursor)
+    New orders bump the owner's generation, which retires every cached page
+    """
+    key = f'order-history:{scope}:{owner_id}:{history_generation(scope, owner_id)}:{cursor or ""}'
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, getattr(settings, 'ORDER_HISTORY_CACHE_SECONDS', 300))
+    return data
@@ -0,0 +1,41 @@
+# orders/management/commands/archive_orders.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from orders import archive
+
+
+class Command(BaseCommand):
+    help = 'Move orders older than the retention window into the compressed JSON-lines archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-months', type=int, help='Months kept in the database (default: settings)')
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months that would be archived')
+        parser.add_argument('--list', action='store_true', help='List archived months and exit')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for month in archive.archived_months():
+                files = sorted(archive.month_directory(month).glob('orders-*.jsonl.gz'))
+                size = sum(path.stat().st_size for path in files)
+                self.stdout.write(f'{month:%Y-%m}: {len(files)} files, {size / 1024:,.0f} KiB')
+            return
+
+        months = archive.months_to_archive(options['retention_months'])
+        cutoff = archive.archive_cutoff(options['retention_months'])
+        if options['dry_run'] or not months:
+            listed = ', '.join(f'{month:%Y-%m}' for month in months) or 'none'
+            self.stdout.write(f'Months before {cutoff:%Y-%m} to archive: {listed}')
+            return
+
+        start = time.perf_counter()
+        orders = 0
+        for month in months:
+            report = archive.archive_month(month)
+            orders += report['orders']
+            if report['path']:
+                self.stdout.write(f"  {month:%Y-%m}: {report['orders']:,} orders, {report['lines']:,} lines -> {report['path']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Archived {orders:,} orders from {len(months)} months in {time.perf_counter() - start:.1f}s'
+        ))
@@ -0,0 +1,144 @@
+# orders/management/commands/bench_asgi.py
+
+import asyncio
+import logging
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client, override_settings
+from config.benchmarks import percentile
+from orders import ai
+from orders.ai import ExplanationService, FakeBackend
+from restaurants.models import Item
+from users.models import Customer
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test the recommendation endpoint with a slow stubbed model under '
+        'WSGI (fixed worker threads) and ASGI (one event loop)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per mode')
+        parser.add_argument('--concurrency', type=int, default=50, help='Concurrent clients')
+        parser.add_argument('--wsgi-workers', type=int, default=8, help='Threads of the simulated WSGI server')
+        parser.add_argument('--latency', type=float, default=0.2, help='Stubbed model latency in seconds')
+        parser.add_argument('--restaurant', type=int, help='Restaurant id (default: first with items)')
+
+    def handle(self, *args, **options):
+        restaurant_id = options['restaurant'] or Item.objects.order_by('restaurant_id').values_list(
+            'restaurant_id', flat=True,
+        ).first()
+        if restaurant_id is None:
+            raise CommandError('No restaurant with items, run seed_data first')
+        self.url = f'/api/orders/recommendations/?restaurant={restaurant_id}&explain=true'
+
+        # One customer per concurrent client, each with its own memo, so no two
+        # in-flight requests share a prompt and coalescing can't flatter either mode
+        tag = uuid.uuid4().hex[:8]
+        users = []
+        for index in range(options['concurrency']):
+            user = User.objects.create(username=f'bench_asgi_{tag}_{index}', type='customer')
+            Customer.objects.create(user=user, firstname='Bench', lastname=str(index), memo=f'bench {tag} {index}')
+            users.append(user)
+
+        previous_service = ai._service
+        # No caching (ttl 0) and a pool as large as the WSGI server, so the
+        # stubbed upstream's latency is the only thing being waited on
+        ai._service = ExplanationService(
+            FakeBackend(latency=options['latency']), ttl=0, max_workers=options['wsgi_workers'],
+        )
+        try:
+            cookies = []
+            for user in users:
+                client = Client()
+                client.force_login(user)
+                cookies.append(client.cookies)
+
+            self.stdout.write(
+                f"{options['requests']} requests, {options['concurrency']} clients, "
+                f"model latency {options['latency'] * 1000:.0f}ms"
+            )
+            # The test clients always send Host: testserver; query budget warnings are noise here
+            profiling_logger = logging.getLogger('config.profiling')
+            previous_level = profiling_logger.level
+            profiling_logger.setLevel(logging.ERROR)
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self.report(f"WSGI ({options['wsgi_workers']} threads)", *self.run_wsgi(cookies, options))
+                self.report('ASGI (event loop)', *self.run_asgi(cookies, options))
+        finally:
+            profiling_logger.setLevel(previous_level)
+            ai._service = previous_service
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def run_wsgi(self, cookies, options):
+        """
+        A threaded WSGI server: each request holds one of the server's worker
+        threads until the model answers, and the other clients queue for one
+        """
+        server = threading.BoundedSemaphore(options['wsgi_workers'])
+        results = []
+
+        def client_loop(index, request_ids):
+            client = Client()
+            client.cookies = cookies[index]
+            for _ in request_ids:
+                start = time.perf_counter()
+                with server:
+                    response = client.get(self.url)
+                results.append((time.perf_counter() - start, response.status_code))
+
+        clients = min(options['concurrency'], len(cookies))
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            futures = [
+                pool.submit(client_loop, index, range(index, options['requests'], clients))
+                for index in range(clients)
+            ]
+            for future in futures:
+                future.result()
+        return time.perf_counter() - start, results
+
+    def run_asgi(self, cookies, options):
+        """One event loop: waiting on the model holds no thread"""
+
+        async def client_loop(index, request_ids, results):
+            client = AsyncClient()
+            client.cookies = cookies[index]
+            for _ in request_ids:
+                start = time.perf_counter()
+                # Like ASGIHandler, give each request its own thread for sync ORM calls
+                async with ThreadSensitiveContext():
+                    response = await client.get(self.url)
+                results.append((time.perf_counter() - start, response.status_code))
+
+        async def main():
+            results = []
+            clients = min(options['concurrency'], len(cookies))
+            await asyncio.gather(*(
+                client_loop(index, range(index, options['requests'], clients), results)
+                for index in range(clients)
+            ))
+            return results
+
+        start = time.perf_counter()
+        results = asyncio.run(main())
+        return time.perf_counter() - start, results
+
+    def report(self, label, elapsed, results):
+        timings = [duration * 1000 for duration, _ in results]
+        errors = sum(1 for _, status in results if status != 200)
+        self.stdout.write(
+            f'{label:>22}: {len(results) / elapsed:7.1f} req/s  '
+            f'p50={percentile(timings, 50):.0f}ms p95={percentile(timings, 95):.0f}ms '
+            f'mean={statistics.mean(timings):.0f}ms errors={errors}'
+        )
@@ -0,0 +1,55 @@
+# orders/management/commands/bench_explanations.py
+
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from orders.ai import ExplanationService, FakeBackend
+
+
+def make_prompt(i):
+    return {
+        'memo': 'I want to keep fit and build muscle',
+        'preference_vector': [(1, i % 7), (2, 3)],
+        'preferences': [],
+        'candidate_ids': [i],
+        'candidates': [],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the explanation cache and request coalescing against a fake slow backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--distinct', type=int, default=20, help='Distinct prompts among the requests')
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--latency', type=float, default=0.5, help='Fake backend latency in seconds')
+
+    def handle(self, *args, **options):
+        backend = FakeBackend(latency=options['latency'])
+        service = ExplanationService(backend, max_workers=options['concurrency'])
+        prompts = [make_prompt(i % options['distinct']) for i in range(options['requests'])]
+        
+        def timed(prompt):
+            start = time.perf_counter()
+            service.explain(prompt)
+            return (time.perf_counter() - start) * 1000
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            timings = sorted(pool.map(timed, prompts))
+        elapsed = time.perf_counter() - start
+        
+        naive = options['requests'] * options['latency']
+        self.stdout.write(f"Requests: {options['requests']} ({options['distinct']} distinct)")
+        self.stdout.write(f'Backend calls: {backend.calls}')
+        self.stdout.write(
+            f'Latency: p50={timings[len(timings) // 2]:.1f}ms '
+            f'p99={timings[int(len(timings) * 0.99) - 1]:.1f}ms '
+            f'mean={statistics.mean(timings):.1f}ms'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Wall time {elapsed:.2f}s (uncached sequential would be {naive:.1f}s)'
+        ))
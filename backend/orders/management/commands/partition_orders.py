@@ -0,0 +1,43 @@
+# orders/management/commands/partition_orders.py
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from orders import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Monthly range partitions of order/orderitem on PostgreSQL: convert the tables once (--convert), '
+        'then run regularly (e.g. daily) to create partitions ahead of time'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true', help='Rebuild the tables as partitioned tables (locks them)')
+        parser.add_argument('--ahead', type=int, help='Future months to keep partitions for (default: settings)')
+        parser.add_argument('--list', action='store_true', help='List the partitions and exit')
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'postgresql':
+            raise CommandError('Order partitioning needs PostgreSQL (archive_orders works on every backend)')
+
+        if options['list']:
+            for table in partitions.TABLES:
+                names = partitions.partitions(table)
+                self.stdout.write(f'{table}: {len(names)} partitions')
+                for month in sorted(names, key=lambda month: (month is not None, month)):
+                    self.stdout.write(f'  {names[month]}')
+            return
+
+        if options['convert']:
+            if partitions.is_partitioned():
+                self.stdout.write('Already partitioned')
+            else:
+                months = partitions.convert_to_partitioned(options['ahead'])
+                self.stdout.write(self.style.SUCCESS(f'✅ Converted order/orderitem into {len(months)} monthly partitions'))
+                return
+        elif not partitions.is_partitioned():
+            raise CommandError('order is not partitioned yet, run with --convert first')
+
+        created = partitions.create_partitions(options['ahead'])
+        months = ', '.join(f'{month:%Y-%m}' for month in created) or 'none needed'
+        self.stdout.write(self.style.SUCCESS(f'✅ Created partitions: {months}'))
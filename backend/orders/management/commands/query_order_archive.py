@@ -0,0 +1,37 @@
+# orders/management/commands/query_order_archive.py
+
+import json
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from orders.archive import read_archive
+
+
+def parse_day(value):
+    try:
+        return datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), time.min, tzinfo=dt_timezone.utc)
+    except ValueError:
+        raise CommandError(f'Expected a YYYY-MM-DD date, got {value!r}')
+
+
+class Command(BaseCommand):
+    help = 'Print archived orders as JSON lines, filtered by date range, customer or restaurant'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=parse_day, help='First day (UTC, YYYY-MM-DD)')
+        parser.add_argument('--until', type=parse_day, help='Day after the last one (UTC, YYYY-MM-DD)')
+        parser.add_argument('--customer', type=int, help='Customer id')
+        parser.add_argument('--restaurant', type=int, help='Restaurant id')
+        parser.add_argument('--limit', type=int, help='Stop after this many orders')
+
+    def handle(self, *args, **options):
+        orders = read_archive(
+            since=options['since'],
+            until=options['until'],
+            customer_id=options['customer'],
+            restaurant_id=options['restaurant'],
+        )
+        for count, order in enumerate(orders, start=1):
+            self.stdout.write(json.dumps(order, separators=(',', ':')))
+            if options['limit'] and count >= options['limit']:
+                break
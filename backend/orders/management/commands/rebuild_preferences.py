@@ -0,0 +1,38 @@
+# orders/management/commands/rebuild_preferences.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from orders.preferences import rebuild_customer_preferences
+from users.models import Customer
+
+
+class Command(BaseCommand):
+    help = 'Rebuild CustomerPreferenceTag counts from order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Customers per batch')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+        customers = 0
+        rows = 0
+        
+        # Stream customer ids so memory stays flat however many customers exist
+        batch = []
+        for customer_id in Customer.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=batch_size):
+            batch.append(customer_id)
+            if len(batch) >= batch_size:
+                rows += rebuild_customer_preferences(batch)
+                customers += len(batch)
+                batch = []
+                self.stdout.write(f'  ✓ {customers} customers, {rows} preference rows')
+        if batch:
+            rows += rebuild_customer_preferences(batch)
+            customers += len(batch)
+        
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Rebuilt {rows} preference rows for {customers} customers in {elapsed:.1f}s'
+        ))
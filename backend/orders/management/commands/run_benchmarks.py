@@ -0,0 +1,84 @@
+# orders/management/commands/run_benchmarks.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from config import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a fixed-size dataset into a throwaway database, time the core data paths '
+        '(menus, orders, preferences, history, admin) and compare against a JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run (default: all of {', '.join(benchmarks.SCENARIOS)})")
+        parser.add_argument('--dataset', choices=sorted(benchmarks.DATASETS), default='small')
+        parser.add_argument('--rounds', type=int, help='Timed calls per scenario (default: per scenario)')
+        parser.add_argument('--warmup', type=int, default=benchmarks.DEFAULT_WARMUP, help='Untimed calls first')
+        parser.add_argument('--baseline', default=str(benchmarks.default_baseline_path()), help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Write this run as the new baseline')
+        parser.add_argument('--output', help='Also write this run to a JSON file')
+        parser.add_argument('--threshold', type=float, default=benchmarks.THRESHOLD,
+                            help='Allowed p50/p95 growth, as a fraction')
+        parser.add_argument('--min-delta-ms', type=float, default=benchmarks.MIN_DELTA_MS,
+                            help='Ignore latency growth smaller than this')
+
+    def handle(self, *args, **options):
+        unknown = sorted(set(options['scenarios']) - set(benchmarks.SCENARIOS))
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(unknown)}")
+
+        baseline = None
+        if not options['save_baseline']:
+            try:
+                baseline = benchmarks.load_baseline(options['baseline'])
+            except FileNotFoundError:
+                self.stdout.write(f"No baseline at {options['baseline']}, nothing to compare against")
+            if baseline and baseline['dataset']['name'] != options['dataset']:
+                raise CommandError(
+                    f"Baseline was recorded on the {baseline['dataset']['name']!r} dataset, "
+                    f"not {options['dataset']!r}"
+                )
+
+        with benchmarks.benchmark_database(verbosity=max(options['verbosity'] - 1, 0)):
+            started = time.perf_counter()
+            benchmarks.seed_dataset(options['dataset'], stdout=self.stdout if options['verbosity'] > 1 else None)
+            self.stdout.write(f"Seeded the {options['dataset']!r} dataset in {time.perf_counter() - started:.1f}s")
+            try:
+                results = benchmarks.run_scenarios(
+                    names=options['scenarios'],
+                    rounds=options['rounds'],
+                    warmup=options['warmup'],
+                    log=self.log,
+                )
+            except benchmarks.BenchmarkError as exc:
+                raise CommandError(str(exc))
+            document = benchmarks.report(options['dataset'], results)
+
+        if options['output']:
+            benchmarks.save_baseline(options['output'], document)
+        if options['save_baseline']:
+            benchmarks.save_baseline(options['baseline'], document)
+            self.stdout.write(self.style.SUCCESS(f"✅ Baseline written to {options['baseline']}"))
+            return
+        if baseline is None:
+            return
+
+        if baseline['database'] != document['database']:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded on {baseline['database']}, this run used {document['database']}"
+            ))
+        regressions = benchmarks.compare(baseline, results, options['threshold'], options['min_delta_ms'])
+        if regressions:
+            for name, message in regressions:
+                self.stdout.write(self.style.ERROR(f'❌ {name}: {message}'))
+            raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+        self.stdout.write(self.style.SUCCESS(f'✅ No regressions against {options["baseline"]}'))
+
+    def log(self, name, stats):
+        self.stdout.write(
+            f"{name:>26}: queries={stats['queries']:<3} p50={stats['p50_ms']:.2f}ms "
+            f"p95={stats['p95_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms mean={stats['mean_ms']:.2f}ms"
+        )
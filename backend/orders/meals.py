@@ -0,0 +1,201 @@
+# orders/meals.py
+
+import heapq
+import itertools
+from decimal import Decimal
+
+from restaurants.catalog import catalog
+from restaurants.tagbits import mask_from_bits
+from .recommendations import score_items
+
+# Safety valve for very large menus: stop exploring and return the best found so far
+DEFAULT_NODE_LIMIT = 200_000
+
+NUTRIENTS = ('totalcalories', 'totalprotein', 'totalcarb', 'totalfat', 'totalgreens')
+
+
+def _cents(amount):
+    return int((Decimal(str(amount)) * 100).to_integral_value())
+
+
+def excluded_item_ids(items, exclude_tags):
+    """Ids of menu items carrying any of the named tags (unknown names are ignored)"""
+    if not exclude_tags:
+        return set()
+    found, _ = catalog.tag_entries(exclude_tags)
+    mask = mask_from_bits(bit for _, bit in found.values() if bit is not None)
+    # Tags past the bitmask limit have no bit, so check their ids directly
+    unbitted = {tag_id for tag_id, bit in found.values() if bit is None}
+    return {
+        item['id'] for item in items
+        if item['tag_mask'] & mask or unbitted.intersection(item['tag_ids'])
+    }
+
+
+def solve_meals(items, values, max_calories=None, min_protein=None, budget=None,
+                max_units=3, max_quantity=2, top_n=5, node_limit=DEFAULT_NODE_LIMIT):
+    """
+    Best item combinations under nutrition and budget constraints
+    items: menu dicts (see Catalog.menu), values: objective value per item (same order)
+    Returns up to top_n (value, [(item, quantity), ...]) pairs, best first.
+
+    Depth-first branch and bound over multisets of items: each combination is
+    reached once (items are added in index order), and a branch is cut as soon as
+    its optimistic value cannot beat the current n-th best or the protein floor
+    becomes unreachable. The bound is the tightest of three relaxations: the
+    remaining unit slots, calories and budget, each spent at the best remaining
+    value density.
+    """
+    budget_cents = _cents(budget) if budget is not None else None
+    candidates = []
+    for item, value in zip(items, values):
+        price = _cents(item['price'])
+        if max_calories is not None and item['totalcalories'] > max_calories:
+            continue
+        if budget_cents is not None and price > budget_cents:
+            continue
+        candidates.append((float(value), price, item))
+    # Best value first so good incumbents are found early and prune more
+    candidates.sort(key=lambda entry: (-entry[0], entry[1], entry[2]['id']))
+    count = len(candidates)
+    if not count or max_units < 1:
+        return []
+
+    values = [entry[0] for entry in candidates]
+    prices = [entry[1] for entry in candidates]
+    calories = [entry[2]['totalcalories'] for entry in candidates]
+    protein = [entry[2]['totalprotein'] for entry in candidates]
+
+    # Suffix maxima: the most any single remaining unit can contribute
+    best_value = [0.0] * (count + 1)
+    best_per_calorie = [0.0] * (count + 1)
+    best_per_cent = [0.0] * (count + 1)
+    best_protein = [0] * (count + 1)
+    best_protein_per_calorie = [0.0] * (count + 1)
+    for index in range(count - 1, -1, -1):
+        gain = max(values[index], 0.0)
+        best_value[index] = max(best_value[index + 1], gain)
+        best_per_calorie[index] = max(
+            best_per_calorie[index + 1],
+            gain / calories[index] if calories[index] else (float('inf') if gain else 0.0),
+        )
+        best_per_cent[index] = max(
+            best_per_cent[index + 1],
+            gain / prices[index] if prices[index] else (float('inf') if gain else 0.0),
+        )
+        best_protein[index] = max(best_protein[index + 1], protein[index])
+        best_protein_per_calorie[index] = max(
+            best_protein_per_calorie[index + 1],
+            protein[index] / calories[index] if calories[index] else (float('inf') if protein[index] else 0.0),
+        )
+
+    heap = []  # min-heap of (value, -price, tiebreak, quantities)
+    tiebreak = itertools.count()
+    quantities = [0] * count
+    nodes = 0
+
+    def threshold():
+        return heap[0][0] if len(heap) >= top_n else float('-inf')
+
+    def optimistic(start, units_left, calories_left, cents_left):
+        bound = units_left * best_value[start]
+        if calories_left is not None:
+            bound = min(bound, calories_left * best_per_calorie[start])
+        if cents_left is not None:
+            bound = min(bound, cents_left * best_per_cent[start])
+        return bound
+
+    def protein_reachable(start, units_left, calories_left, protein_so_far):
+        if min_protein is None or protein_so_far >= min_protein:
+            return True
+        reachable = units_left * best_protein[start]
+        if calories_left is not None:
+            reachable = min(reachable, calories_left * best_protein_per_calorie[start])
+        return protein_so_far + reachable >= min_protein
+
+    def visit(start, units, value, cents, kcal, grams):
+        nonlocal nodes
+        nodes += 1
+        if units and (min_protein is None or grams >= min_protein):
+            entry = (value, -cents, next(tiebreak), tuple(quantities))
+            if len(heap) < top_n:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+
+        units_left = max_units - units
+        calories_left = max_calories - kcal if max_calories is not None else None
+        cents_left = budget_cents - cents if budget_cents is not None else None
+        for index in range(start, count):
+            if nodes >= node_limit or not units_left:
+                return
+            if value + optimistic(index, units_left, calories_left, cents_left) <= threshold():
+                return
+            if not protein_reachable(index, units_left, calories_left, grams):
+                return
+            if quantities[index] >= max_quantity:
+                continue
+            if calories_left is not None and calories[index] > calories_left:
+                continue
+            if cents_left is not None and prices[index] > cents_left:
+                continue
+            quantities[index] += 1
+            visit(
+                index, units + 1, value + values[index], cents + prices[index],
+                kcal + calories[index], grams + protein[index],
+            )
+            quantities[index] -= 1
+
+    visit(0, 0, 0.0, 0, 0, 0)
+
+    results = []
+    for value, _, _, chosen in sorted(heap, reverse=True):
+        lines = [(candidates[index][2], quantity) for index, quantity in enumerate(chosen) if quantity]
+        results.append((value, lines))
+    return results
+
+
+def meal_totals(lines):
+    """Price and nutrition totals for [(item, quantity), ...]"""
+    totals = {'price': Decimal('0.00')}
+    totals.update({field: 0 for field in NUTRIENTS})
+    for item, quantity in lines:
+        totals['price'] += item['price'] * quantity
+        for field in NUTRIENTS:
+            totals[field] += item[field] * quantity
+    return totals
+
+
+def plan_meals(restaurant_id, customer=None, max_calories=None, min_protein=None, budget=None,
+               exclude_tags=(), max_units=3, max_quantity=2, top_n=5):
+    """
+    Shortlist of meal combinations at a restaurant that satisfy the constraints
+    With a customer, items are valued by their recommendation score (tag
+    affinity plus memo goals); otherwise by protein.
+    Returns [{'score', 'lines': [(item, quantity)], 'totals'}], best first.
+    """
+    if customer is not None:
+        matrix, scores = score_items(customer, restaurant_id)
+        items, values = matrix.items, [float(score) for score in scores]
+    else:
+        items = catalog.menu(restaurant_id)
+        values = [float(item['totalprotein']) for item in items]
+
+    excluded = excluded_item_ids(items, exclude_tags)
+    if excluded:
+        kept = [(item, value) for item, value in zip(items, values) if item['id'] not in excluded]
+        items, values = [item for item, _ in kept], [value for _, value in kept]
+
+    solutions = solve_meals(
+        items, values,
+        max_calories=max_calories,
+        min_protein=min_protein,
+        budget=budget,
+        max_units=max_units,
+        max_quantity=max_quantity,
+        top_n=top_n,
+    )
+    return [
+        {'score': round(value, 4), 'lines': lines, 'totals': meal_totals(lines)}
+        for value, lines in solutions
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_initial'),
+        ('restaurants', '0004_tag_bitmask'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customerpreferencetag',
+            index=models.Index(fields=['-count', '-id'], name='custpref_count_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['-ordertime', '-id'], name='order_ordertime_id_idx'),
+        ),
+    ]
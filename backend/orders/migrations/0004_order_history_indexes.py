@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_admin_keyset_indexes'),
+        ('restaurants', '0004_tag_bitmask'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-ordertime', '-id'], name='order_customer_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['restaurant', '-ordertime', '-id'], name='order_restaurant_time_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+def copy_ordertime(apps, schema_editor):
+    quote = schema_editor.connection.ops.quote_name
+    schema_editor.execute(
+        f'UPDATE {quote("orderitem")} SET {quote("ordertime")} = ('
+        f'SELECT o.{quote("ordertime")} FROM {quote("order")} o WHERE o.{quote("id")} = {quote("orderitem")}.{quote("order_id")})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0004_order_history_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='ordertime',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(copy_ordertime, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='ordertime',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['ordertime'], name='orderitem_ordertime_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_orderitem_ordertime'),
+    ]
+
+    operations = [
+        # Existing rows get the migration time: later than their real insert, which only delays them
+        migrations.AddField(
+            model_name='order',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, editable=False),
+            preserve_default=False,
+        ),
+    ]
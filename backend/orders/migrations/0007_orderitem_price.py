@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+def copy_item_price(apps, schema_editor):
+    # Best available for existing lines: the price the item has now
+    quote = schema_editor.connection.ops.quote_name
+    schema_editor.execute(
+        f'UPDATE {quote("orderitem")} SET {quote("price")} = ('
+        f'SELECT i.{quote("price")} FROM {quote("item")} i WHERE i.{quote("id")} = {quote("orderitem")}.{quote("item_id")})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_created_at'),
+        ('restaurants', '0007_menu_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=6, null=True),
+        ),
+        migrations.RunPython(copy_item_price, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=2, max_digits=6),
+        ),
+    ]
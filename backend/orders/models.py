@@ -21,6 +21,8 @@ class Order(models.Model):
     )
     totalprice = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     ordertime = models.DateTimeField(auto_now_add=True)
+    # When the row was inserted: imports backdate ordertime, never this, so incremental jobs bound their runs on it
+    created_at = models.DateTimeField(auto_now_add=True, editable=False)
     
     # AI recommendation fields
     isrecommended = models.BooleanField(default=False, help_text="Was this AI-recommended?")
@@ -33,6 +35,13 @@ class Order(models.Model):
     class Meta:
         db_table = 'order'
         ordering = ['-ordertime']  # Newest first
+        indexes = [
+            # Admin keyset pagination walks this
+            models.Index(fields=['-ordertime', '-id'], name='order_ordertime_id_idx'),
+            # Per-customer / per-restaurant order history pages
+            models.Index(fields=['customer', '-ordertime', '-id'], name='order_customer_time_idx'),
+            models.Index(fields=['restaurant', '-ordertime', '-id'], name='order_restaurant_time_idx'),
+        ]
 
 
 class OrderItem(models.Model):
@@ -50,17 +59,32 @@ class OrderItem(models.Model):
         on_delete=models.CASCADE
     )
     quantity = models.PositiveIntegerField(default=1)
+    # Unit price when ordered: Item.price may change later, sales figures must not
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    # Copy of order.ordertime: the partition and archival key (orders/partitions.py)
+    ordertime = models.DateTimeField(editable=False)
     
     def __str__(self):
         return f"{self.quantity}x {self.item.name}"
     
+    def save(self, *args, **kwargs):
+        if self.ordertime is None:
+            self.ordertime = self.order.ordertime
+        if self.price is None:
+            self.price = self.item.price
+        super().save(*args, **kwargs)
+    
     @property
     def subtotal(self):
         """Calculate subtotal for this order item"""
-        return self.item.price * self.quantity
+        return self.price * self.quantity
     
     class Meta:
         db_table = 'orderitem'
+        indexes = [
+            # Archival deletes a month of lines at a time (unpartitioned backends)
+            models.Index(fields=['ordertime'], name='orderitem_ordertime_idx'),
+        ]
 
 
 class CustomerPreferenceTag(models.Model):
@@ -85,4 +109,7 @@ class CustomerPreferenceTag(models.Model):
     class Meta:
         db_table = 'customerpreferencetag'
         unique_together = ('customer', 'tag')  # Each customer-tag pair is unique
-        ordering = ['-count']  # Most frequent first
\ No newline at end of file
+        ordering = ['-count']  # Most frequent first
+        indexes = [
+            models.Index(fields=['-count', '-id'], name='custpref_count_id_idx'),
+        ]
\ No newline at end of file
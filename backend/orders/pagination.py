@@ -0,0 +1,106 @@
+# orders/pagination.py
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from config.admin_pagination import decode_cursor, encode_cursor, keyset_filter
+
+# First character of a cursor: which way it pages from the row it carries
+_FORWARD, _BACKWARD = 'n', 'p'
+
+
+class OrderHistoryPagination(BasePagination):
+    """
+    Keyset pagination ordered by (ordertime, id), newest first
+
+    A cursor carries the (ordertime, id) of the row a page ends (or, for the
+    previous link, starts) at, and the page is the rows strictly past it:
+    (ordertime, id) < (t, i). Each page is one range scan on the
+    (customer|restaurant, ordertime, id) index, however deep, and orders
+    sharing a timestamp or placed meanwhile never shift a page.
+    Responses have the same next/previous/results shape as DRF's CursorPagination.
+    """
+    ordering = ('-ordertime', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        token = request.query_params.get(self.cursor_query_param)
+        backward, values = self.decode(token, queryset.model) if token else (False, None)
+
+        ordering = self.ordering
+        if backward:
+            ordering = tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+        if values is not None:
+            queryset = queryset.filter(keyset_filter(ordering, values))
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backward:
+            rows.reverse()
+        # Paging back from a page means that page still follows
+        self.has_next = backward or more
+        self.has_previous = more if backward else values is not None
+        self.page = rows
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(size, self.max_page_size) if size > 0 else self.page_size
+
+    def encode(self, row, backward):
+        values = [getattr(row, name.lstrip('-')) for name in self.ordering]
+        return (_BACKWARD if backward else _FORWARD) + encode_cursor(values)
+
+    def decode(self, token, model):
+        """(backward, [ordertime, id]) from a cursor"""
+        direction, body = token[:1], token[1:]
+        if direction not in (_FORWARD, _BACKWARD):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            values = decode_cursor(body, model, self.ordering)
+        except IncorrectLookupParameters:
+            raise NotFound(self.invalid_cursor_message)
+        return direction == _BACKWARD, values
+
+    def link(self, token):
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.link(self.encode(self.page[-1], backward=False))
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.link(self.encode(self.page[0], backward=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
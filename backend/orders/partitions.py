@@ -0,0 +1,231 @@
+# orders/partitions.py
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+# Partitioned tables, parents first: orderitem's foreign key points at order
+TABLES = ('order', 'orderitem')
+DEFAULT_SUFFIX = 'default'
+
+
+def _config():
+    return getattr(settings, 'ORDER_ARCHIVE', {})
+
+
+def month_start(value):
+    """First instant (UTC) of the month a datetime falls in"""
+    return value.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=index + 1)
+
+
+def month_range(month):
+    """[start, end) of a month, as UTC datetimes"""
+    return month, add_months(month, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{DEFAULT_SUFFIX}' if month is None else f'{table}_p{month:%Y_%m}'
+
+
+def _month_of(table, name):
+    suffix = name[len(table) + 2:]
+    if suffix == DEFAULT_SUFFIX:
+        return None
+    year, month = suffix.split('_')
+    return datetime(int(year), int(month), 1, tzinfo=dt_timezone.utc)
+
+
+def _literal(value):
+    # Partition bounds must be literals; values only ever come from month_range()
+    return f"'{value.isoformat()}'"
+
+
+def is_partitioned(using=DEFAULT_DB_ALIAS):
+    """True when order is a partitioned table (PostgreSQL after convert_to_partitioned())"""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [connection.ops.quote_name('order')])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def partitions(table='order', using=DEFAULT_DB_ALIAS):
+    """{month (None for the default partition): partition name} of a partitioned table"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)',
+            [connection.ops.quote_name(table)],
+        )
+        return {_month_of(table, name): name for name, in cursor.fetchall()}
+
+
+def _create_partitions(cursor, quote, tables, month):
+    """
+    Create and attach one month's partition of each table
+    Rows of that month that landed in the default partition meanwhile are
+    moved into it first, since attaching checks the default holds none.
+    Lines move before their orders, so that no order leaves the default
+    partition while a line there still references it.
+    """
+    start, end = month_range(month)
+    for table in tables:
+        cursor.execute(f'CREATE TABLE {quote(partition_name(table, month))} (LIKE {quote(table)} INCLUDING DEFAULTS)')
+    for table in reversed(tables):
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(partition_name(table, None))} '
+            f'WHERE ordertime >= %s AND ordertime < %s RETURNING *) '
+            f'INSERT INTO {quote(partition_name(table, month))} SELECT * FROM moved',
+            [start, end],
+        )
+    for table in tables:
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ATTACH PARTITION {quote(partition_name(table, month))} '
+            f'FOR VALUES FROM ({_literal(start)}) TO ({_literal(end)})'
+        )
+
+
+def create_partitions(ahead=None, first=None, using=DEFAULT_DB_ALIAS):
+    """
+    Make sure every month from `first` (default: this one) through `ahead`
+    months from now has a partition in both tables; returns the months created
+    """
+    ahead = _config().get('PARTITIONS_AHEAD', 3) if ahead is None else ahead
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    current = month_start(timezone.now())
+    month = month_start(first) if first else current
+    last = add_months(current, ahead)
+    created = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        # A deferred check on an order moved out of the default partition runs
+        # at commit, finds its lines and fails: check while the rows move instead
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        existing = {table: set(partitions(table, using)) for table in TABLES}
+        while month <= last:
+            missing = [table for table in TABLES if month not in existing[table]]
+            if missing:
+                _create_partitions(cursor, quote, missing, month)
+                created.append(month)
+            month = add_months(month, 1)
+        cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+    return created
+
+
+def drop_partitions(month, using=DEFAULT_DB_ALIAS):
+    """Detach and drop one month's partitions (lines first, they reference orders); False if there were none"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    existing = {table: partitions(table, using) for table in TABLES}
+    dropped = False
+    with connection.cursor() as cursor:
+        for table in reversed(TABLES):
+            name = existing[table].get(month)
+            if name:
+                cursor.execute(f'ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}')
+                cursor.execute(f'DROP TABLE {quote(name)}')
+                dropped = True
+    return dropped
+
+
+def convert_to_partitioned(ahead=None, using=DEFAULT_DB_ALIAS):
+    """
+    Rebuild order and orderitem as tables range-partitioned by month of ordertime
+
+    PostgreSQL 12+ only. Runs in one transaction holding exclusive locks, and
+    copies every row, so schedule it in a maintenance window. Afterwards:
+    - primary keys are (id, ordertime), as partitioned tables require the key
+      to include the partition column; ids still come from one sequence
+    - orderitem references order on (order_id, ordertime)
+    - rows outside every monthly range land in a default partition until
+      create_partitions() covers their month
+    Django keeps treating id as the primary key; queries don't change.
+    """
+    from restaurants.models import Item, Restaurant
+    from users.models import Customer
+    from .models import Order, OrderItem
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        raise ValueError('Order partitioning needs PostgreSQL')
+    if is_partitioned(using):
+        return []
+    quote = connection.ops.quote_name
+    models = {'order': Order, 'orderitem': OrderItem}
+
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {quote("order")}, {quote("orderitem")} IN ACCESS EXCLUSIVE MODE')
+            cursor.execute(f'SELECT min(ordertime) FROM {quote("order")}')
+            oldest = cursor.fetchone()[0]
+            for table in TABLES:
+                old = quote(f'{table}_unpartitioned')
+                cursor.execute(f'ALTER TABLE {quote(table)} RENAME TO {old}')
+                # Frees the key's name for the new table
+                cursor.execute(
+                    f'ALTER TABLE {old} RENAME CONSTRAINT {quote(f"{table}_pkey")} '
+                    f'TO {quote(f"{table}_unpartitioned_pkey")}'
+                )
+                cursor.execute(f'CREATE TABLE {quote(table)} (LIKE {old}) PARTITION BY RANGE (ordertime)')
+                cursor.execute(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(f"{table}_pkey")} PRIMARY KEY (id, ordertime)'
+                )
+                cursor.execute(
+                    f'CREATE TABLE {quote(partition_name(table, None))} PARTITION OF {quote(table)} DEFAULT'
+                )
+
+        months = create_partitions(ahead, first=oldest, using=using)
+
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                columns = ', '.join(quote(field.column) for field in models[table]._meta.local_concrete_fields)
+                cursor.execute(
+                    f'INSERT INTO {quote(table)} ({columns}) SELECT {columns} FROM {quote(f"{table}_unpartitioned")}'
+                )
+            # Drops the old identity sequences, indexes and foreign keys too
+            for table in reversed(TABLES):
+                cursor.execute(f'DROP TABLE {quote(f"{table}_unpartitioned")}')
+
+            for table in TABLES:
+                sequence = quote(f'{table}_id_seq')
+                cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {quote(table)}.id')
+                cursor.execute(f'SELECT setval(%s, coalesce((SELECT max(id) FROM {quote(table)}), 0) + 1, false)', [
+                    f'{table}_id_seq',
+                ])
+                cursor.execute(f"ALTER TABLE {quote(table)} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
+
+            foreign_keys = [
+                ('order', 'customer_id', Customer._meta.db_table),
+                ('order', 'restaurant_id', Restaurant._meta.db_table),
+                ('orderitem', 'item_id', Item._meta.db_table),
+            ]
+            for table, column, target in foreign_keys:
+                cursor.execute(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(f"{table}_{column}_fk")} '
+                    f'FOREIGN KEY ({column}) REFERENCES {quote(target)} (id) DEFERRABLE INITIALLY DEFERRED'
+                )
+            cursor.execute(
+                f'ALTER TABLE {quote("orderitem")} ADD CONSTRAINT {quote("orderitem_order_fk")} '
+                f'FOREIGN KEY (order_id, ordertime) REFERENCES {quote("order")} (id, ordertime) '
+                'DEFERRABLE INITIALLY DEFERRED'
+            )
+            for table, column in (('order', 'customer_id'), ('order', 'restaurant_id'),
+                                  ('orderitem', 'order_id'), ('orderitem', 'item_id')):
+                cursor.execute(f'CREATE INDEX {quote(f"{table}_{column}_idx")} ON {quote(table)} ({column})')
+
+        # The model's composite indexes, created on the parents and so on every partition
+        with connection.schema_editor(atomic=False) as editor:
+            for model in models.values():
+                for index in model._meta.indexes:
+                    editor.add_index(model, index)
+    return months
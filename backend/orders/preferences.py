@@ -0,0 +1,94 @@
+# orders/preferences.py
+
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+
+from .models import OrderItem, CustomerPreferenceTag
+
+
+def tag_counts_for_orders(order_ids):
+    """
+    Tag multiset for a set of orders in one query
+    Returns Counter({(customer_id, tag_id): n}), weighted by item quantity
+    """
+    rows = (
+        OrderItem.objects
+        .filter(order_id__in=order_ids, item__tags__isnull=False)
+        .values_list('order__customer_id', 'item__tags')
+        .annotate(n=Sum('quantity'))
+        .order_by()
+    )
+    return Counter({(customer_id, tag_id): n for customer_id, tag_id, n in rows})
+
+
+def apply_preference_counts(counts):
+    """
+    Add counts to CustomerPreferenceTag with a single upsert
+    counts: {(customer_id, tag_id): n}
+    """
+    counts = {key: n for key, n in counts.items() if n}
+    if not counts:
+        return
+
+    if connection.vendor in ('postgresql', 'sqlite'):
+        _upsert_counts(counts)
+        return
+
+    # Other backends: increment what exists, insert the rest
+    with transaction.atomic():
+        for (customer_id, tag_id), n in counts.items():
+            updated = CustomerPreferenceTag.objects.filter(
+                customer_id=customer_id, tag_id=tag_id,
+            ).update(count=F('count') + n)
+            if not updated:
+                CustomerPreferenceTag.objects.create(customer_id=customer_id, tag_id=tag_id, count=n)
+
+
+def _upsert_counts(counts):
+    """INSERT ... ON CONFLICT (customer_id, tag_id) DO UPDATE SET count = count + excluded.count"""
+    table = connection.ops.quote_name(CustomerPreferenceTag._meta.db_table)
+    count_column = connection.ops.quote_name('count')
+    rows = list(counts.items())
+
+    # Stay under SQLite's bound-parameter limit
+    batch_size = 300
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            placeholders = ', '.join(['(%s, %s, %s)'] * len(batch))
+            params = []
+            for (customer_id, tag_id), n in batch:
+                params.extend([customer_id, tag_id, n])
+            cursor.execute(
+                f'INSERT INTO {table} (customer_id, tag_id, {count_column}) VALUES {placeholders} '
+                f'ON CONFLICT (customer_id, tag_id) '
+                f'DO UPDATE SET {count_column} = {table}.{count_column} + excluded.{count_column}',
+                params,
+            )
+
+
+def record_order_preferences(order_ids):
+    """Fold the tags of newly placed orders into their customers' preference counts"""
+    apply_preference_counts(tag_counts_for_orders(order_ids))
+
+
+def rebuild_customer_preferences(customer_ids):
+    """Recompute preference counts from order history for a set of customers"""
+    rows = (
+        OrderItem.objects
+        .filter(order__customer_id__in=customer_ids, item__tags__isnull=False)
+        .values_list('order__customer_id', 'item__tags')
+        .annotate(n=Sum('quantity'))
+        .order_by()
+    )
+    preferences = [
+        CustomerPreferenceTag(customer_id=customer_id, tag_id=tag_id, count=n)
+        for customer_id, tag_id, n in rows
+        if n
+    ]
+    with transaction.atomic():
+        CustomerPreferenceTag.objects.filter(customer_id__in=customer_ids).delete()
+        CustomerPreferenceTag.objects.bulk_create(preferences, batch_size=1000)
+    return len(preferences)
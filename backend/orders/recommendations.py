@@ -0,0 +1,146 @@
+# orders/recommendations.py
+
+import re
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from restaurants.catalog import catalog
+from .models import CustomerPreferenceTag
+
+# How much tag affinity vs nutrition fit contributes to the final score
+PREFERENCE_WEIGHT = 0.7
+NUTRITION_WEIGHT = 0.3
+
+# Memo keywords -> weights on the (protein density, calories, carbs) z-scores
+GOAL_PATTERNS = [
+    (re.compile(r'muscle|protein|bulk|gain', re.I), np.array([1.0, 0.0, 0.0])),
+    (re.compile(r'lose weight|weight loss|low cal|diet|slim|lean', re.I), np.array([0.3, -1.0, 0.0])),
+    (re.compile(r'low carb|keto|diabet', re.I), np.array([0.0, 0.0, -1.0])),
+    (re.compile(r'fit|healthy|health', re.I), np.array([0.3, -0.3, -0.2])),
+]
+
+
+class MenuMatrix:
+    """Dense item x tag matrix plus nutrition features for one restaurant menu"""
+
+    def __init__(self, items):
+        self.items = items
+        self.item_ids = np.array([item['id'] for item in items], dtype=np.int64)
+
+        tag_ids = sorted({tag_id for item in items for tag_id in item['tag_ids']})
+        self.tag_index = {tag_id: column for column, tag_id in enumerate(tag_ids)}
+
+        tags = np.zeros((len(items), len(tag_ids)), dtype=np.float32)
+        for row, item in enumerate(items):
+            for tag_id in item['tag_ids']:
+                tags[row, self.tag_index[tag_id]] = 1.0
+        # Row-normalize so items with many tags don't win by volume
+        norms = np.linalg.norm(tags, axis=1, keepdims=True)
+        self.tags = np.divide(tags, norms, out=np.zeros_like(tags), where=norms > 0)
+
+        protein = np.array([item['totalprotein'] for item in items], dtype=np.float32)
+        calories = np.array([item['totalcalories'] for item in items], dtype=np.float32)
+        carbs = np.array([item['totalcarb'] for item in items], dtype=np.float32)
+        protein_density = protein * 100.0 / np.maximum(calories, 1.0)
+        self.nutrition = _zscore(np.stack([protein_density, calories, carbs], axis=1))
+
+
+def _zscore(features):
+    """Column-wise z-score, zero for constant columns"""
+    if len(features) == 0:
+        return features
+    std = features.std(axis=0)
+    return np.divide(features - features.mean(axis=0), std, out=np.zeros_like(features), where=std > 0)
+
+
+_matrix_lock = threading.Lock()
+_matrices = {}
+
+
+def menu_matrix(restaurant_id):
+    """MenuMatrix for a restaurant, rebuilt when the catalog version changes"""
+    version = catalog.version
+    key = (restaurant_id, version)
+    matrix = _matrices.get(key)
+    if matrix is None:
+        matrix = MenuMatrix(catalog.menu(restaurant_id))
+        with _matrix_lock:
+            # Drop matrices built from older catalog versions
+            for stale in [k for k in _matrices if k[1] != version]:
+                del _matrices[stale]
+            _matrices[key] = matrix
+    return matrix
+
+
+def goal_weights(memo):
+    """Nutrition goal weights parsed from a customer's memo"""
+    weights = np.zeros(3, dtype=np.float32)
+    for pattern, goal in GOAL_PATTERNS:
+        if memo and pattern.search(memo):
+            weights += goal
+    return weights
+
+
+def preference_vector(customer_id, matrix):
+    """L2-normalized tag count vector aligned with the matrix columns"""
+    vector = np.zeros(len(matrix.tag_index), dtype=np.float32)
+    rows = CustomerPreferenceTag.objects.filter(customer_id=customer_id).values_list('tag_id', 'count')
+    for tag_id, count in rows:
+        column = matrix.tag_index.get(tag_id)
+        if column is not None:
+            vector[column] = count
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def score_items(customer, restaurant_id):
+    """Score every item on a restaurant menu for a customer, returns (matrix, scores)"""
+    matrix = menu_matrix(restaurant_id)
+    if not matrix.items:
+        return matrix, np.zeros(0, dtype=np.float32)
+    affinity = matrix.tags @ preference_vector(customer.pk, matrix)
+    fit = np.tanh(matrix.nutrition @ goal_weights(customer.memo))
+    return matrix, PREFERENCE_WEIGHT * affinity + NUTRITION_WEIGHT * fit
+
+
+def _generation(customer_id):
+    return cache.get(f'recommendations:generation:{customer_id}', 0)
+
+
+def invalidate_recommendations(customer_id):
+    """Drop cached rankings for a customer (called when they place an order)"""
+    key = f'recommendations:generation:{customer_id}'
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def recommend_items(customer, restaurant_id, k=5):
+    """
+    Top-k candidate items for a customer at a restaurant, best first
+    Returns a list of (item dict, score). This is the short list handed to
+    the AI model, so it never has to see the full menu.
+    """
+    cache_key = (
+        f'recommendations:{customer.pk}:{restaurant_id}:{k}:'
+        f'{catalog.version}:{_generation(customer.pk)}'
+    )
+    ranked = cache.get(cache_key)
+    if ranked is None:
+        matrix, scores = score_items(customer, restaurant_id)
+        top = min(k, len(scores))
+        if top:
+            indexes = np.argpartition(-scores, top - 1)[:top]
+            indexes = indexes[np.argsort(-scores[indexes], kind='stable')]
+        else:
+            indexes = []
+        ranked = [(int(matrix.item_ids[i]), float(scores[i])) for i in indexes]
+        cache.set(cache_key, ranked, getattr(settings, 'RECOMMENDATION_CACHE_SECONDS', 3600))
+
+    items = {item['id']: item for item in catalog.menu(restaurant_id)}
+    return [(items[item_id], score) for item_id, score in ranked if item_id in items]
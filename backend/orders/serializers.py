@@ -0,0 +1,72 @@
+# orders/serializers.py
+
+from rest_framework import serializers
+from .models import Order, OrderItem
+
+
+class OrderLineSerializer(serializers.Serializer):
+    """One cart line"""
+    item = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class PlaceOrderSerializer(serializers.Serializer):
+    """Order placement payload"""
+    restaurant = serializers.IntegerField()
+    items = OrderLineSerializer(many=True, allow_empty=False)
+    isrecommended = serializers.BooleanField(default=False)
+
+
+class RecommendationQuerySerializer(serializers.Serializer):
+    """Query parameters for item recommendations"""
+    restaurant = serializers.IntegerField()
+    k = serializers.IntegerField(min_value=1, max_value=20, default=5)
+    explain = serializers.BooleanField(default=False)
+
+
+class MealPlanQuerySerializer(serializers.Serializer):
+    """Query parameters for meal combination planning (exclude is comma separated tag names)"""
+    restaurant = serializers.IntegerField()
+    max_calories = serializers.IntegerField(min_value=1, required=False)
+    min_protein = serializers.IntegerField(min_value=0, required=False)
+    budget = serializers.DecimalField(max_digits=8, decimal_places=2, min_value=0, required=False)
+    exclude = serializers.CharField(required=False, default='')
+    max_units = serializers.IntegerField(min_value=1, max_value=6, default=3)
+    max_quantity = serializers.IntegerField(min_value=1, max_value=6, default=2)
+    count = serializers.IntegerField(min_value=1, max_value=20, default=5)
+
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    """Order line with item name"""
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'item', 'item_name', 'quantity']
+
+
+class OrderHistoryItemSerializer(serializers.ModelSerializer):
+    """Order line for history listings (item name from the prefetched item)"""
+    item_name = serializers.CharField(source='item.name', read_only=True)
+    
+    class Meta:
+        model = OrderItem
+        fields = ['item', 'item_name', 'quantity']
+
+
+class OrderHistorySerializer(serializers.ModelSerializer):
+    """Order in a history listing"""
+    items = OrderHistoryItemSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Order
+        fields = ['id', 'customer', 'restaurant', 'totalprice', 'ordertime', 'isrecommended', 'items']
+
+
+class OrderSerializer(serializers.ModelSerializer):
+    """Order with its line items"""
+    items = OrderItemSerializer(many=True, read_only=True)
+    
+    class Meta:
+        model = Order
+        fields = ['id', 'customer', 'restaurant', 'totalprice', 'ordertime', 'isrecommended', 'aiexplanation', 'items']
@@ -0,0 +1,130 @@
+# orders/services.py
+
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from restaurants.models import Item
+from .models import Order, OrderItem
+from .side_effects import queue_order_side_effects
+
+
+def _merge_lines(lines):
+    """Collapse [(item_id, qty), ...] into an ordered {item_id: qty}, validating quantities"""
+    merged = OrderedDict()
+    for item_id, quantity in lines:
+        quantity = int(quantity)
+        if quantity < 1:
+            raise ValidationError(f'Quantity for item {item_id} must be at least 1')
+        merged[int(item_id)] = merged.get(int(item_id), 0) + quantity
+    if not merged:
+        raise ValidationError('An order needs at least one item')
+    return merged
+
+
+def _price_lines(merged, prices, restaurant_id):
+    """Total price for merged lines given {item_id: (restaurant_id, price)}"""
+    total = Decimal('0.00')
+    for item_id, quantity in merged.items():
+        entry = prices.get(item_id)
+        if entry is None or entry[0] != restaurant_id:
+            raise ValidationError(f'Item {item_id} is not on the menu of restaurant {restaurant_id}')
+        total += entry[1] * quantity
+    return total
+
+
+def _fetch_prices(item_ids):
+    return {
+        item_id: (restaurant_id, price)
+        for item_id, restaurant_id, price in Item.objects.filter(id__in=item_ids).values_list('id', 'restaurant_id', 'price')
+    }
+
+
+def place_order(customer, restaurant, lines, isrecommended=False, aiexplanation=''):
+    """
+    Create an order and its items atomically
+    lines: [(item_id, quantity), ...]
+
+    Prices come from one query, OrderItems from one bulk insert, and the
+    total is summed in Decimal, so pricing a cart never loads items one by one
+    """
+    merged = _merge_lines(lines)
+    restaurant_id = getattr(restaurant, 'pk', restaurant)
+
+    with transaction.atomic():
+        prices = _fetch_prices(merged.keys())
+        total = _price_lines(merged, prices, restaurant_id)
+        order = Order.objects.create(
+            customer=customer,
+            restaurant_id=restaurant_id,
+            totalprice=total,
+            isrecommended=isrecommended,
+            aiexplanation=aiexplanation,
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, item_id=item_id, quantity=quantity, price=prices[item_id][1], ordertime=order.ordertime,
+            )
+            for item_id, quantity in merged.items()
+        ])
+    return order
+
+
+def place_orders_bulk(orders, batch_size=1000):
+    """
+    Import many orders at once
+    orders: iterable of dicts with customer_id, restaurant_id, lines and
+    optionally ordertime, isrecommended and aiexplanation
+
+    Orders are processed in batches: one price query, one Order insert and
+    one OrderItem insert per batch. Side effects (preferences, rollups, cache
+    invalidation) are queued per batch since bulk inserts skip the post_save hook.
+    """
+    created = 0
+    batch = []
+    for spec in orders:
+        batch.append(spec)
+        if len(batch) >= batch_size:
+            created += _place_batch(batch)
+            batch = []
+    if batch:
+        created += _place_batch(batch)
+    return created
+
+
+def _place_batch(specs):
+    merged_lines = [_merge_lines(spec['lines']) for spec in specs]
+
+    with transaction.atomic():
+        prices = _fetch_prices({item_id for merged in merged_lines for item_id in merged})
+        orders = []
+        for spec, merged in zip(specs, merged_lines):
+            orders.append(Order(
+                customer_id=spec['customer_id'],
+                restaurant_id=spec['restaurant_id'],
+                totalprice=_price_lines(merged, prices, spec['restaurant_id']),
+                isrecommended=spec.get('isrecommended', False),
+                aiexplanation=spec.get('aiexplanation', ''),
+            ))
+        Order.objects.bulk_create(orders)
+
+        # auto_now_add overwrites ordertime on insert, so restore imported timestamps
+        backdated = []
+        for order, spec in zip(orders, specs):
+            if spec.get('ordertime'):
+                order.ordertime = spec['ordertime']
+                backdated.append(order)
+        if backdated:
+            Order.objects.bulk_update(backdated, ['ordertime'])
+
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order, item_id=item_id, quantity=quantity, price=prices[item_id][1], ordertime=order.ordertime,
+            )
+            for order, merged in zip(orders, merged_lines)
+            for item_id, quantity in merged.items()
+        ])
+        queue_order_side_effects(orders)
+    return len(orders)
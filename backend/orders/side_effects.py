@@ -0,0 +1,43 @@
+# orders/side_effects.py
+
+from django.db import transaction
+
+from analytics.rollups import apply_order_rollups
+from taskqueue.queue import enqueue_many
+from .history import invalidate_order_history
+from .preferences import record_order_preferences
+from .recommendations import invalidate_recommendations
+
+
+def queue_order_side_effects(orders):
+    """
+    Queue the follow-up work for new orders; call in the transaction that creates them
+    Only the task rows are inserted here. Order history caches are dropped as
+    soon as it commits, so customers see their own order at once; the rest
+    runs in a task worker (see orders/tasks.py).
+    """
+    orders = list(orders)
+    enqueue_many(
+        'orders.side_effects',
+        [{'order': order.pk, 'customer': order.customer_id, 'restaurant': order.restaurant_id} for order in orders],
+        keys=[f'orders.side_effects:{order.pk}' for order in orders],
+    )
+    customer_ids = {order.customer_id for order in orders}
+    restaurant_ids = {order.restaurant_id for order in orders}
+    transaction.on_commit(lambda: invalidate_order_history(customer_ids, restaurant_ids))
+
+
+def run_order_side_effects(order_ids, customer_ids):
+    """
+    Everything that follows a committed order: preference learning,
+    recommendation cache invalidation and sales rollups
+    """
+    record_order_preferences(order_ids)
+    apply_order_rollups(order_ids)
+    
+    def invalidate():
+        for customer_id in customer_ids:
+            invalidate_recommendations(customer_id)
+    
+    # Rankings cached before the new preferences commit would outlive them
+    transaction.on_commit(invalidate)
@@ -0,0 +1,19 @@
+# orders/signals.py
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Order
+from .side_effects import queue_order_side_effects
+
+
+@receiver(post_save, sender=Order)
+def after_order_created(sender, instance, created, raw=False, **kwargs):
+    """
+    Queue preference, cache and rollup updates for a new order
+    Workers only pick the task up once the transaction commits, so OrderItems
+    created in the same transaction (admin inlines, order services) are included
+    """
+    if not created or raw:
+        return
+    queue_order_side_effects([instance])
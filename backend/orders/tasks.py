@@ -0,0 +1,13 @@
+# orders/tasks.py
+
+from taskqueue.queue import task
+from .side_effects import run_order_side_effects
+
+
+@task('orders.side_effects', batch_size=500)
+def order_side_effects(payloads):
+    """Preferences, recommendation caches and rollups for a batch of committed orders"""
+    run_order_side_effects(
+        [payload['order'] for payload in payloads],
+        {payload['customer'] for payload in payloads},
+    )
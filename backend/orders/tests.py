@@ -1,3 +1,381 @@
-from django.test import TestCase
+# orders/tests.py
 
-# Create your tests here.
+import itertools
+import random
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from restaurants.models import Item, Restaurant, Tag
+from taskqueue.queue import drain
+from users.models import Customer, User
+from . import ai
+from .meals import _cents, solve_meals
+from .archive import archive_orders, read_archive
+from .models import CustomerPreferenceTag, Order, OrderItem
+from .partitions import (
+    add_months, convert_to_partitioned, create_partitions, drop_partitions, is_partitioned, month_start,
+    partition_name, partitions,
+)
+from .preferences import rebuild_customer_preferences
+from .services import place_order, place_orders_bulk
+
+
+def brute_force_meals(items, values, max_calories, min_protein, budget, max_units, max_quantity, top_n):
+    """Top values of every feasible combination, by exhaustive enumeration: [(value, cents)]"""
+    found = []
+    for quantities in itertools.product(range(max_quantity + 1), repeat=len(items)):
+        units = sum(quantities)
+        if not 1 <= units <= max_units:
+            continue
+        chosen = [(item, value, quantity) for item, value, quantity in zip(items, values, quantities) if quantity]
+        kcal = sum(item['totalcalories'] * quantity for item, _, quantity in chosen)
+        grams = sum(item['totalprotein'] * quantity for item, _, quantity in chosen)
+        cents = sum(_cents(item['price']) * quantity for item, _, quantity in chosen)
+        if max_calories is not None and kcal > max_calories:
+            continue
+        if min_protein is not None and grams < min_protein:
+            continue
+        if budget is not None and cents > _cents(budget):
+            continue
+        found.append((sum(value * quantity for _, value, quantity in chosen), cents))
+    found.sort(key=lambda pair: (-pair[0], pair[1]))
+    return found[:top_n]
+
+
+class SolveMealsTests(SimpleTestCase):
+    """Branch and bound returns exactly the brute-force optimum"""
+
+    def random_case(self, rng):
+        items = [
+            {
+                'id': index + 1,
+                'price': Decimal(rng.randint(100, 2500)) / 100,
+                'totalcalories': rng.choice([0, rng.randint(50, 900)]),
+                'totalprotein': rng.randint(0, 60),
+            }
+            for index in range(rng.randint(1, 7))
+        ]
+        # Whole numbers keep sums exact, so ties rank the same in both
+        values = [float(rng.randint(-5, 40)) for _ in items]
+        limits = {
+            'max_calories': rng.choice([None, rng.randint(200, 2000)]),
+            'min_protein': rng.choice([None, rng.randint(10, 120)]),
+            'budget': rng.choice([None, Decimal(rng.randint(500, 6000)) / 100]),
+            'max_units': rng.randint(1, 4),
+            'max_quantity': rng.randint(1, 3),
+            'top_n': rng.randint(1, 6),
+        }
+        return items, values, limits
+
+    def test_matches_brute_force(self):
+        rng = random.Random(13)
+        for case in range(300):
+            items, values, limits = self.random_case(rng)
+            with self.subTest(case=case, limits=limits):
+                solved = solve_meals(items, values, **limits)
+                expected = brute_force_meals(items, values, **limits)
+                # Equal values may tie-break differently at the cut-off, so compare the values
+                self.assertEqual([value for value, _ in solved], [value for value, _ in expected])
+                for value, lines in solved:
+                    self.assertEqual(value, sum(values[item['id'] - 1] * quantity for item, quantity in lines))
+                    self.assertTrue(self.feasible(lines, **limits))
+
+    @staticmethod
+    def feasible(lines, max_calories, min_protein, budget, max_units, max_quantity, top_n):
+        return (
+            1 <= sum(quantity for _, quantity in lines) <= max_units
+            and all(quantity <= max_quantity for _, quantity in lines)
+            and (max_calories is None or sum(item['totalcalories'] * q for item, q in lines) <= max_calories)
+            and (min_protein is None or sum(item['totalprotein'] * q for item, q in lines) >= min_protein)
+            and (budget is None or sum(_cents(item['price']) * q for item, q in lines) <= _cents(budget))
+        )
+
+
+@override_settings(ORDER_HISTORY_CACHE_SECONDS=0)
+class OrderHistoryPaginationTests(TestCase):
+    """History pages key on (ordertime, id), so orders sharing a timestamp page exactly once"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Tie Tavern', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.user = User.objects.create_user(username='eater', password='x')
+        cls.customer = Customer.objects.create(user=cls.user, firstname='Ada', lastname='Eats')
+        cls.tied = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        cls.add_orders(45, cls.tied)
+        cls.add_orders(3, cls.tied + timedelta(hours=1))
+        cls.add_orders(3, cls.tied - timedelta(hours=1))
+
+    @classmethod
+    def add_orders(cls, count, ordertime):
+        orders = Order.objects.bulk_create(
+            [Order(customer=cls.customer, restaurant=cls.restaurant) for _ in range(count)]
+        )
+        # auto_now_add stamps bulk_create too
+        Order.objects.filter(pk__in=[order.pk for order in orders]).update(ordertime=ordertime)
+
+    def expected(self):
+        return list(Order.objects.order_by('-ordertime', '-id').values_list('id', flat=True))
+
+    def page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, page_size, between_pages=None):
+        ids, url, params = [], reverse('order-history'), {'page_size': page_size}
+        while url:
+            data = self.page(url, **params)
+            ids += [order['id'] for order in data['results']]
+            url, params = data['next'], {}
+            if between_pages:
+                between_pages()
+        return ids
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_every_order_once_across_tied_pages(self):
+        for page_size in (1, 7, 10, 20, 100):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), self.expected())
+
+    def test_orders_added_at_the_boundary_timestamp_dont_shift_pages(self):
+        before = self.expected()
+        # New orders get higher ids, so at the tied timestamp they sort ahead of every page already served
+        ids = self.walk(10, between_pages=lambda: self.add_orders(2, self.tied))
+        self.assertEqual([order_id for order_id in ids if order_id in set(before)], before)
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_previous_returns_the_page_before(self):
+        first = self.page(reverse('order-history'), page_size=10)
+        second = self.page(first['next'])
+        third = self.page(second['next'])
+        back = self.page(third['previous'])
+        self.assertEqual(back['results'], second['results'])
+        self.assertEqual(self.page(back['previous'])['results'], first['results'])
+        self.assertIsNone(first['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('order-history'), {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 404)
+
+
+class PreferenceCountTests(TestCase):
+    """Preference counts grow by tag x quantity with every order, and match a rebuild from history"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Taste Test', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.thai, cls.spicy, cls.vegan = [Tag.objects.create(name=name) for name in ('Thai', 'Spicy', 'Vegan')]
+        cls.curry, cls.wings, cls.bread = [
+            Item.objects.create(restaurant=cls.restaurant, name=name, price=Decimal('8.00'))
+            for name in ('Curry', 'Wings', 'Bread')
+        ]
+        cls.curry.tags.set([cls.thai, cls.spicy])
+        cls.wings.tags.set([cls.spicy])
+        cls.ada, cls.bob = [
+            Customer.objects.create(user=User.objects.create_user(username=name, password='x'), firstname=name)
+            for name in ('ada', 'bob')
+        ]
+
+    def counts(self, customer):
+        return dict(CustomerPreferenceTag.objects.filter(customer=customer).values_list('tag__name', 'count'))
+
+    def test_counts_after_repeated_orders(self):
+        place_order(self.ada, self.restaurant, [(self.curry.pk, 2)])
+        place_order(self.ada, self.restaurant, [(self.curry.pk, 1), (self.wings.pk, 3)])
+        place_order(self.bob, self.restaurant, [(self.wings.pk, 1)])
+        drain()
+        self.assertEqual(self.counts(self.ada), {'Thai': 3, 'Spicy': 6})
+        self.assertEqual(self.counts(self.bob), {'Spicy': 1})
+
+        place_order(self.ada, self.restaurant, [(self.wings.pk, 1), (self.bread.pk, 5)])
+        place_orders_bulk([
+            {'customer_id': self.ada.pk, 'restaurant_id': self.restaurant.pk, 'lines': [(self.curry.pk, 1)]},
+            {'customer_id': self.ada.pk, 'restaurant_id': self.restaurant.pk, 'lines': [(self.curry.pk, 2)]},
+        ])
+        drain()
+        self.assertEqual(self.counts(self.ada), {'Thai': 6, 'Spicy': 10})
+        self.assertEqual(self.counts(self.bob), {'Spicy': 1})
+
+        incremental = self.counts(self.ada), self.counts(self.bob)
+        rebuild_customer_preferences([self.ada.pk, self.bob.pk])
+        self.assertEqual((self.counts(self.ada), self.counts(self.bob)), incremental)
+
+    def test_untagged_items_add_nothing(self):
+        place_order(self.ada, self.restaurant, [(self.bread.pk, 4)])
+        drain()
+        self.assertFalse(CustomerPreferenceTag.objects.exists())
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'order partitioning needs PostgreSQL')
+class PartitionRoundTripTests(TestCase):
+    """
+    Convert to monthly partitions, keep creating them ahead, then archive old
+    months by detaching theirs; the test transaction rolls the DDL back
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Partition Palace', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.soup, cls.bread = [
+            Item.objects.create(restaurant=cls.restaurant, name=name, price=Decimal('5.00'))
+            for name in ('Soup', 'Bread')
+        ]
+        cls.customer = Customer.objects.create(user=User.objects.create_user(username='eater', password='x'))
+        cls.this_month = month_start(timezone.now())
+        cls.old_month = add_months(cls.this_month, -30)
+
+    def setUp(self):
+        self.archive = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive.cleanup)
+        settings = override_settings(ORDER_ARCHIVE={'ARCHIVE_ROOT': self.archive.name, 'RETENTION_MONTHS': 24})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def place(self, ordertime, count=1):
+        place_orders_bulk([
+            {'customer_id': self.customer.pk, 'restaurant_id': self.restaurant.pk, 'ordertime': ordertime,
+             'lines': [(self.soup.pk, 1), (self.bread.pk, 2)]}
+            for _ in range(count)
+        ])
+
+    def rows(self, table, month):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {connection.ops.quote_name(partition_name(table, month))}')
+            return cursor.fetchone()[0]
+
+    def test_round_trip(self):
+        self.place(self.old_month + timedelta(days=3), count=2)
+        self.place(add_months(self.old_month, 1) + timedelta(days=9))
+        self.place(timezone.now() - timedelta(minutes=5))
+        before = sorted(Order.objects.values_list('id', 'ordertime', 'totalprice'))
+
+        months = convert_to_partitioned(ahead=1)
+        self.assertTrue(is_partitioned())
+        self.assertEqual((months[0], months[-1]), (self.old_month, add_months(self.this_month, 1)))
+        self.assertEqual(set(partitions('order')), set(partitions('orderitem')))
+        self.assertEqual(set(partitions('order')), {None, *months})
+        self.assertEqual(sorted(Order.objects.values_list('id', 'ordertime', 'totalprice')), before)
+        self.assertEqual((self.rows('order', self.old_month), self.rows('orderitem', self.old_month)), (2, 4))
+        self.assertEqual(convert_to_partitioned(), [])
+
+        # New orders keep the id sequence and land in their month's partition
+        order = place_order(self.customer, self.restaurant, [(self.soup.pk, 1)])
+        self.assertGreater(order.pk, max(order_id for order_id, _, _ in before))
+        self.assertEqual(self.rows('order', self.this_month), 2)
+
+        # Past the last partition: held in the default one until its month is created
+        later = add_months(self.this_month, 3)
+        self.place(later + timedelta(days=1))
+        self.assertEqual((self.rows('order', None), self.rows('orderitem', None)), (1, 2))
+        self.assertEqual(create_partitions(ahead=3), [add_months(self.this_month, 2), later])
+        self.assertEqual((self.rows('order', None), self.rows('orderitem', None)), (0, 0))
+        self.assertEqual((self.rows('order', later), self.rows('orderitem', later)), (1, 2))
+
+        # Archiving detaches and drops the old months' partitions
+        reports = archive_orders()
+        self.assertEqual(
+            [(report['month'], report['orders'], report['lines']) for report in reports if report['orders']],
+            [(self.old_month, 2, 4), (add_months(self.old_month, 1), 1, 2)],
+        )
+        self.assertNotIn(self.old_month, partitions('order'))
+        self.assertNotIn(self.old_month, partitions('orderitem'))
+        self.assertFalse(drop_partitions(self.old_month))
+        self.assertFalse(Order.objects.filter(ordertime__lt=add_months(self.old_month, 2)).exists())
+        self.assertEqual(OrderItem.objects.count(), 2 * Order.objects.count() - 1)
+
+        archived = list(read_archive())
+        self.assertEqual(sorted(order['id'] for order in archived), sorted(order_id for order_id, _, _ in before[:3]))
+        self.assertEqual(
+            {(line['item_id'], line['quantity'], line['price']) for line in archived[0]['items']},
+            {(self.soup.pk, 1, '5.00'), (self.bread.pk, 2, '5.00')},
+        )
+
+
+class AnthropicBackendTests(SimpleTestCase):
+    def test_missing_package_is_a_configuration_error(self):
+        with mock.patch.dict(sys.modules, {'anthropic': None}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'pip install anthropic'):
+                ai.AnthropicBackend()
+
+
+class FailingBackend(ai.FakeBackend):
+    def explain(self, prompt):
+        raise RuntimeError('model unavailable')
+
+
+class OrderExplanationTests(TransactionTestCase):
+    """A recommended order gets its explanation after the response, from the service's pool"""
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        restaurant = Restaurant.objects.create(
+            user=owner, name='Explain Eatery', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        self.item = Item.objects.create(restaurant=restaurant, name='Pho', price=Decimal('11.00'), totalprotein=30)
+        self.user = User.objects.create_user(username='eater', password='x')
+        Customer.objects.create(user=self.user, firstname='Ada', lastname='Eats')
+        self.client.force_login(self.user)
+        self.saved_service = ai._service
+
+    def tearDown(self):
+        ai._service = self.saved_service
+
+    def place(self, isrecommended):
+        response = self.client.post(
+            reverse('order-create'),
+            {'restaurant': self.item.restaurant_id, 'items': [{'item': self.item.pk, 'quantity': 1}],
+             'isrecommended': isrecommended},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail('Timed out waiting for the explanation')
+            time.sleep(0.01)
+
+    def test_recommended_order_gets_an_explanation(self):
+        ai._service = ai.ExplanationService(ai.FakeBackend(latency=0.05))
+        order_id = self.place(isrecommended=True)
+        self.wait_for(lambda: Order.objects.get(pk=order_id).aiexplanation)
+        self.assertIn('Pho', Order.objects.get(pk=order_id).aiexplanation)
+
+    def test_other_orders_dont_call_the_model(self):
+        backend = ai.FakeBackend()
+        ai._service = ai.ExplanationService(backend)
+        self.place(isrecommended=False)
+        self.assertEqual(backend.calls, 0)
+
+    def test_backend_failure_is_logged(self):
+        ai._service = ai.ExplanationService(FailingBackend())
+        with self.assertLogs('orders.ai', 'ERROR') as logs:
+            order_id = self.place(isrecommended=True)
+            self.wait_for(lambda: logs.records)
+        self.assertIn(f'Explanation for order {order_id} failed', logs.output[0])
+        self.assertIn('model unavailable', logs.output[0])
+        self.assertEqual(Order.objects.get(pk=order_id).aiexplanation, '')
@@ -0,0 +1,12 @@
+# orders/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.create_order, name='order-create'),
+    path('recommendations/', views.recommendations, name='recommendations'),
+    path('meals/', views.meal_plans, name='meal-plan'),
+    path('history/', views.CustomerOrderHistory.as_view(), name='order-history'),
+    path('restaurant/<int:restaurant_id>/history/', views.RestaurantOrderHistory.as_view(), name='restaurant-order-history'),
+]
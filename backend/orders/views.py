@@ -1,3 +1,198 @@
-from django.shortcuts import render
+# orders/views.py
 
-# Create your views here.
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from config.async_api import error_response, json_response, validate_query
+from restaurants.models import Restaurant
+from users.models import Customer
+from .ai import build_prompt, explain_order_async, get_service, order_candidates
+from .history import cached_page, history_queryset
+from .meals import plan_meals
+from .models import Order
+from .pagination import OrderHistoryPagination
+from .recommendations import recommend_items
+from .serializers import (
+    PlaceOrderSerializer, OrderSerializer, OrderHistorySerializer, MealPlanQuerySerializer,
+    RecommendationQuerySerializer,
+)
+from .services import place_order
+
+
+def _customer_for(request):
+    customer = getattr(request.user, 'customer_profile', None)
+    if customer is None:
+        raise PermissionDenied('Only customers can place orders')
+    return customer
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create_order(request):
+    """
+    Place an order for the logged-in customer
+    POST /api/orders/ {"restaurant": 1, "items": [{"item": 3, "quantity": 2}]}
+    """
+    customer = _customer_for(request)
+    payload = PlaceOrderSerializer(data=request.data)
+    payload.is_valid(raise_exception=True)
+    data = payload.validated_data
+    
+    try:
+        order = place_order(
+            customer,
+            data['restaurant'],
+            [(line['item'], line['quantity']) for line in data['items']],
+            isrecommended=data['isrecommended'],
+        )
+    except ValidationError as exc:
+        return Response({'detail': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+    
+    order = Order.objects.select_related('customer').prefetch_related('items__item').get(pk=order.pk)
+    if order.isrecommended:
+        # Filled in on the order when the model answers; the response doesn't wait for it
+        explain_order_async(order, order_candidates(order))
+    return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+
+
+@require_GET
+async def recommendations(request):
+    """
+    Top-k items for the logged-in customer at a restaurant, optionally with an AI explanation
+    GET /api/orders/recommendations/?restaurant=1&k=5&explain=true
+
+    Async so that waiting on the model holds no worker thread: the ORM calls
+    use the async API and the explanation awaits the backend's async client
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return error_response('Authentication credentials were not provided.', status=403)
+    customer = await Customer.objects.filter(user_id=user.pk).afirst()
+    if customer is None:
+        return error_response('Only customers get recommendations', status=403)
+    data, error = validate_query(RecommendationQuerySerializer, request)
+    if error:
+        return error
+    if not await Restaurant.objects.filter(pk=data['restaurant']).aexists():
+        return error_response('Not found.', status=404)
+    
+    ranked = await sync_to_async(recommend_items)(customer, data['restaurant'], k=data['k'])
+    payload = {
+        'items': [
+            {
+                'id': item['id'],
+                'name': item['name'],
+                'price': str(item['price']),
+                'totalcalories': item['totalcalories'],
+                'totalprotein': item['totalprotein'],
+                'score': round(score, 4),
+            }
+            for item, score in ranked
+        ],
+    }
+    if data['explain']:
+        prompt = await sync_to_async(build_prompt)(customer, [item for item, _ in ranked])
+        timeout = settings.AI_EXPLANATION.get('TIMEOUT')
+        try:
+            payload['explanation'] = await get_service().aexplain(prompt, timeout=timeout)
+        except asyncio.TimeoutError:
+            payload['explanation'] = None
+    return json_response(payload)
+
+
+@api_view(['GET'])
+def meal_plans(request):
+    """
+    Best item combinations at a restaurant under nutrition and budget limits
+    Personalized for a logged-in customer, otherwise ranked by protein
+    GET /api/orders/meals/?restaurant=1&max_calories=800&min_protein=40&budget=25&exclude=Peanuts
+    """
+    params = MealPlanQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    data = params.validated_data
+    
+    get_object_or_404(Restaurant.objects.only('id'), pk=data['restaurant'])
+    plans = plan_meals(
+        data['restaurant'],
+        customer=getattr(request.user, 'customer_profile', None),
+        max_calories=data.get('max_calories'),
+        min_protein=data.get('min_protein'),
+        budget=data.get('budget'),
+        exclude_tags=[part.strip() for part in data['exclude'].split(',') if part.strip()],
+        max_units=data['max_units'],
+        max_quantity=data['max_quantity'],
+        top_n=data['count'],
+    )
+    payload = []
+    for plan in plans:
+        totals = dict(plan['totals'], price=str(plan['totals']['price']))
+        payload.append({
+            'score': plan['score'],
+            'items': [
+                {'item': item['id'], 'name': item['name'], 'price': str(item['price']), 'quantity': quantity}
+                for item, quantity in plan['lines']
+            ],
+            'totals': totals,
+        })
+    return Response(payload)
+
+
+class OrderHistoryView(generics.ListAPIView):
+    """Keyset-paginated order history, cached per page until the next order"""
+    serializer_class = OrderHistorySerializer
+    pagination_class = OrderHistoryPagination
+    permission_classes = [IsAuthenticated]
+    history_scope = None
+    
+    def history_owner_id(self):
+        raise NotImplementedError
+    
+    def list(self, request, *args, **kwargs):
+        owner_id = self.history_owner_id()
+        page_key = f"{request.query_params.get('cursor', '')}:{request.query_params.get('page_size', '')}"
+        
+        def build():
+            return super(OrderHistoryView, self).list(request, *args, **kwargs).data
+        
+        return Response(cached_page(self.history_scope, owner_id, page_key, build))
+
+
+class CustomerOrderHistory(OrderHistoryView):
+    """
+    The logged-in customer's orders
+    GET /api/orders/history/?cursor=...
+    """
+    history_scope = 'customer'
+    
+    def history_owner_id(self):
+        return _customer_for(self.request).pk
+    
+    def get_queryset(self):
+        return history_queryset().filter(customer_id=self.history_owner_id())
+
+
+class RestaurantOrderHistory(OrderHistoryView):
+    """
+    Orders received by one of the logged-in owner's restaurants
+    GET /api/orders/restaurant/<id>/history/?cursor=...
+    """
+    history_scope = 'restaurant'
+    
+    def history_owner_id(self):
+        restaurant = get_object_or_404(Restaurant.objects.only('id', 'user_id'), pk=self.kwargs['restaurant_id'])
+        if restaurant.user_id != self.request.user.pk:
+            raise PermissionDenied('Not your restaurant')
+        return restaurant.pk
+    
+    def get_queryset(self):
+        return history_queryset().filter(restaurant_id=self.kwargs['restaurant_id'])
@@ -1,7 +1,10 @@
 # restaurants/admin.py
 
 from django.contrib import admin
+
+from config.admin_pagination import KeysetPaginationMixin
 from .models import Restaurant, Tag, Item
+from .search import matching_item_ids
 
 
 @admin.register(Restaurant)
@@ -33,9 +36,11 @@ class TagAdmin(admin.ModelAdmin):
 
 
 @admin.register(Item)
-class ItemAdmin(admin.ModelAdmin):
+class ItemAdmin(KeysetPaginationMixin, admin.ModelAdmin):
     """Menu Item admin"""
     list_display = ['name', 'restaurant', 'price', 'totalcalories', 'created_at']
+    list_select_related = ['restaurant']
+    keyset_ordering = ('-id',)
     list_filter = ['restaurant', 'created_at']
     search_fields = ['name', 'description']
     filter_horizontal = ['tags']  # Nice interface for selecting tags
@@ -50,4 +55,11 @@ class ItemAdmin(admin.ModelAdmin):
         ('Tags', {
             'fields': ('tags',)
         }),
-    )
\ No newline at end of file
+    )
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of icontains scans when it exists
+        matches = matching_item_ids(search_term)
+        if matches is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(pk__in=matches), False
\ No newline at end of file
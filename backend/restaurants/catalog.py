@@ -0,0 +1,180 @@
+# restaurants/catalog.py
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+VERSION_KEY = 'restaurants:catalog:version'
+
+
+class Catalog:
+    """
+    Process-local cache of tag reference data and per-restaurant menus
+
+    Every worker keeps its own maps, tagged with the catalog version they were
+    built from. The version lives in the Django cache and is bumped by signals
+    once a transaction changing an Item or Tag commits, so other workers
+    notice on their next version check and rebuild from rows they can already
+    see. Maps built while the version moved are discarded, not stored.
+
+    The cache must be shared by all workers (REDIS_URL in settings): with the
+    local-memory fallback, a bump never leaves the worker that made it.
+    `manage.py check --deploy` flags that setup (restaurants.E001).
+
+    Bulk writes (bulk_create, queryset.update) bypass signals: call
+    invalidate() after them.
+
+    Snapshots are read from the primary even when replicas are configured:
+    they are cached until the next change, so a lagging replica would pin a
+    stale menu in every worker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+        self._tags_by_name = None
+        self._tags_by_id = None
+        self._menus = {}
+
+    # Versioning
+
+    def _check_interval(self):
+        return getattr(settings, 'CATALOG_VERSION_CHECK_SECONDS', 1.0)
+
+    def _shared_version(self):
+        cache.add(VERSION_KEY, 1, timeout=None)
+        return cache.get(VERSION_KEY, 1)
+
+    def _sync(self):
+        """Drop local state if another worker bumped the version"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self._check_interval():
+            return
+        version = self._shared_version()
+        with self._lock:
+            self._checked_at = now
+            if version != self._version:
+                self._version = version
+                self._clear()
+
+    @property
+    def version(self):
+        self._sync()
+        return self._version
+
+    def invalidate(self):
+        """Bump the shared version and drop this worker's maps immediately"""
+        cache.add(VERSION_KEY, 1, timeout=None)
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            # Key was evicted between add() and incr()
+            cache.set(VERSION_KEY, 1, timeout=None)
+            version = 1
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+            self._clear()
+
+    def invalidate_on_commit(self, using=DEFAULT_DB_ALIAS):
+        """
+        invalidate() once the current transaction commits (right away outside one)
+        Bumping earlier would let another worker rebuild from the old rows under
+        the new version. This worker's maps are dropped now, so the rest of the
+        transaction reads its own changes.
+        """
+        with self._lock:
+            self._clear()
+        transaction.on_commit(self.invalidate, using=using)
+
+    def _clear(self):
+        self._tags_by_name = None
+        self._tags_by_id = None
+        self._menus = {}
+
+    # Tags
+
+    def _load_tags(self):
+        self._sync()
+        with self._lock:
+            version, by_name, by_id = self._version, self._tags_by_name, self._tags_by_id
+        if by_name is None:
+            from .models import Tag
+            rows = list(Tag.objects.using(DEFAULT_DB_ALIAS).values_list('id', 'name', 'bit'))
+            by_name = {name: (tag_id, bit) for tag_id, name, bit in rows}
+            by_id = {tag_id: name for tag_id, name, _ in rows}
+            with self._lock:
+                # Rows read before an invalidation must not be kept under the newer version
+                if self._version == version:
+                    self._tags_by_name = by_name
+                    self._tags_by_id = by_id
+        return by_name, by_id
+
+    def tag_id(self, name):
+        """Tag id for a name, or None"""
+        entry = self._load_tags()[0].get(name)
+        return entry[0] if entry else None
+
+    def tag_ids(self, names):
+        """Tag ids for the known names (unknown names are skipped)"""
+        by_name = self._load_tags()[0]
+        return [by_name[name][0] for name in names if name in by_name]
+
+    def tag_name(self, tag_id):
+        """Tag name for an id, or None"""
+        return self._load_tags()[1].get(tag_id)
+
+    def tag_names(self, tag_ids):
+        """Tag names for the known ids (unknown ids are skipped)"""
+        by_id = self._load_tags()[1]
+        return [by_id[tag_id] for tag_id in tag_ids if tag_id in by_id]
+
+    def tag_entries(self, names):
+        """Return ({name: (id, bit)} for known names, set of unknown names)"""
+        by_name = self._load_tags()[0]
+        names = set(names)
+        found = {name: by_name[name] for name in names if name in by_name}
+        return found, names - found.keys()
+
+    # Menus
+
+    def menu(self, restaurant_id):
+        """
+        Snapshot of a restaurant's menu as a list of plain dicts
+        Treat the result as read-only: it is shared between callers
+        """
+        self._sync()
+        with self._lock:
+            version, menu = self._version, self._menus.get(restaurant_id)
+        if menu is None:
+            menu = self._build_menu(restaurant_id)
+            with self._lock:
+                if self._version == version:
+                    self._menus[restaurant_id] = menu
+        return menu
+
+    def _build_menu(self, restaurant_id):
+        from .models import Item
+
+        items = list(Item.objects.using(DEFAULT_DB_ALIAS).filter(restaurant_id=restaurant_id).order_by('id').values(
+            'id', 'name', 'description', 'photo', 'photo_renditions', 'price',
+            'totalprotein', 'totalgreens', 'totalcarb', 'totalfat', 'totalcalories', 'tag_mask',
+        ))
+        tag_ids = {item['id']: [] for item in items}
+        rows = (
+            Item.tags.through.objects.using(DEFAULT_DB_ALIAS)
+            .filter(item__restaurant_id=restaurant_id)
+            .values_list('item_id', 'tag_id')
+        )
+        for item_id, tag_id in rows:
+            tag_ids.setdefault(item_id, []).append(tag_id)
+        for item in items:
+            item['tag_ids'] = sorted(tag_ids[item['id']])
+        return items
+
+
+catalog = Catalog()
@@ -0,0 +1,39 @@
+# restaurants/checks.py
+
+import importlib.util
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries live in one process only
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """The catalog version must reach every worker, so production needs a shared default cache"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        f'The default cache ({backend}) is local to one process, so a catalog change in one worker '
+        'never reaches the others and they keep serving stale tags and menus.',
+        hint='Set REDIS_URL (see CACHES in config/settings.py) or configure another shared cache backend.',
+        id='restaurants.E001',
+    )]
+
+
+@register(Tags.caches)
+def check_cache_client(app_configs, **kwargs):
+    """RedisCache imports redis on first use; report a missing client at startup instead"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend != 'django.core.cache.backends.redis.RedisCache' or importlib.util.find_spec('redis') is not None:
+        return []
+    return [Error(
+        'REDIS_URL selects the Redis cache, but the redis package is not installed.',
+        hint='pip install redis (see requirements-optional.txt), or unset REDIS_URL for single-process development.',
+        id='restaurants.E002',
+    )]
@@ -0,0 +1,192 @@
+# restaurants/geo.py
+
+import math
+
+from django.db.models import Q
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Geohash base32 alphabet (no a, i, l, o)
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Stored precision: 9 chars is roughly a 5m x 5m cell
+GEOHASH_PRECISION = 9
+
+# Sorts after every alphabet character, so [prefix, prefix + END) is a prefix range
+_PREFIX_END = '{'
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Encode a coordinate as a geohash string"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    latitude = float(latitude)
+    longitude = float(longitude)
+
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # Geohash interleaves bits starting with longitude
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lng_lo = mid
+            else:
+                bits <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_lo = mid
+            else:
+                bits <<= 1
+                lat_hi = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return ''.join(chars)
+
+
+def cell_size_degrees(precision):
+    """Return the (lat, lng) size in degrees of a geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lng_bits)
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two coordinates in kilometers"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    Return (min_lat, max_lat, min_lng, max_lng) enclosing a radius
+    Longitudes may fall outside [-180, 180] when the box crosses the antimeridian
+    """
+    latitude = float(latitude)
+    longitude = float(longitude)
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(-90.0, latitude - dlat)
+    max_lat = min(90.0, latitude + dlat)
+
+    # Near the poles the box covers every longitude
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat < 1e-9 or max_lat >= 90.0 or min_lat <= -90.0:
+        return min_lat, max_lat, -180.0, 180.0
+    dlng = min(180.0, dlat / cos_lat)
+    return min_lat, max_lat, longitude - dlng, longitude + dlng
+
+
+def covering_precision(latitude, radius_km):
+    """
+    Pick the finest geohash precision whose cells are at least as large as the radius,
+    so the search circle is covered by a 3x3 block of cells at most
+    """
+    km_per_degree = math.pi * EARTH_RADIUS_KM / 180.0
+    cos_lat = max(math.cos(math.radians(float(latitude))), 1e-9)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_deg, lng_deg = cell_size_degrees(precision)
+        if lat_deg * km_per_degree >= radius_km and lng_deg * km_per_degree * cos_lat >= radius_km:
+            return precision
+    return 1
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Return the set of geohash prefixes that together cover the search radius"""
+    precision = covering_precision(latitude, radius_km)
+    lat_step, lng_step = cell_size_degrees(precision)
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            wrapped = ((lng + 180.0) % 360.0) - 180.0
+            cells.add(encode_geohash(lat, wrapped, precision))
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_step, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+    return cells
+
+
+def cells_filter(cells):
+    """
+    Build a Q object matching rows whose geohash starts with any of the cells
+    Uses range comparisons instead of LIKE so the btree index is used on both
+    SQLite (case-insensitive LIKE) and PostgreSQL (non-C collations)
+    """
+    query = Q()
+    for cell in cells:
+        query |= Q(geohash__gte=cell, geohash__lt=cell + _PREFIX_END)
+    return query
+
+
+def _nearby_candidates(latitude, longitude, radius_km, queryset=None):
+    """Restaurants in the covering cells and bounding box (a superset of the radius)"""
+    from .models import Restaurant
+
+    if queryset is None:
+        queryset = Restaurant.objects.all()
+
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    candidates = queryset.filter(
+        cells_filter(covering_cells(latitude, longitude, radius_km)),
+        latitude__gte=min_lat,
+        latitude__lte=max_lat,
+    )
+    # Skip the longitude prefilter when the box wraps around the antimeridian
+    if min_lng >= -180.0 and max_lng <= 180.0:
+        candidates = candidates.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+    return candidates
+
+
+def _within_radius(latitude, longitude, radius_km, restaurant, results):
+    distance = haversine_km(latitude, longitude, restaurant.latitude, restaurant.longitude)
+    if distance <= radius_km:
+        results.append((restaurant, distance))
+
+
+def _nearest_first(results, limit):
+    results.sort(key=lambda pair: pair[1])
+    if limit is not None:
+        results = results[:limit]
+    return results
+
+
+def nearby_restaurants(latitude, longitude, radius_km, limit=None, queryset=None):
+    """
+    Find restaurants within radius_km of a point
+    Returns a list of (restaurant, distance_km) tuples, nearest first
+
+    The geohash cells narrow the index scan, the bounding box drops the cell
+    corners, and only the surviving candidates get an exact haversine check
+    """
+    results = []
+    for restaurant in _nearby_candidates(latitude, longitude, radius_km, queryset):
+        _within_radius(latitude, longitude, radius_km, restaurant, results)
+    return _nearest_first(results, limit)
+
+
+async def anearby_restaurants(latitude, longitude, radius_km, limit=None, queryset=None):
+    """Async version of nearby_restaurants() for async views"""
+    results = []
+    async for restaurant in _nearby_candidates(latitude, longitude, radius_km, queryset):
+        _within_radius(latitude, longitude, radius_km, restaurant, results)
+    return _nearest_first(results, limit)
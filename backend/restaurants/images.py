@@ -0,0 +1,184 @@
+# restaurants/images.py
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = {'thumb': 160, 'card': 480, 'large': 1200}
+DEFAULT_FORMATS = ['webp', 'jpeg']
+
+_PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def _config():
+    return getattr(settings, 'IMAGE_RENDITIONS', {})
+
+
+def content_hash(field_file):
+    """sha256 of a stored file, read in chunks"""
+    digest = hashlib.sha256()
+    with field_file.open('rb') as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rendition_name(digest, label, fmt):
+    """Storage path of a rendition; content-addressed, so URLs change whenever the image does"""
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return f'renditions/{digest[:2]}/{digest}/{label}.{extension}'
+
+
+def _encode(image, fmt, quality):
+    buffer = io.BytesIO()
+    if fmt == 'jpeg':
+        image.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+    else:
+        image.save(buffer, _PIL_FORMATS[fmt], quality=quality, method=4)
+    return buffer.getvalue()
+
+
+def build_renditions(field_file):
+    """
+    Resize an uploaded photo into every configured size and format
+    Returns the photo_renditions dict stored on the model:
+    {'source', 'hash', 'width', 'height', 'sizes': {label: {'width', 'height', fmt: storage name}}}
+    Files that already exist (same content hash) are not re-encoded.
+    """
+    from PIL import Image, ImageOps
+
+    config = _config()
+    sizes = config.get('SIZES', DEFAULT_SIZES)
+    formats = config.get('FORMATS', DEFAULT_FORMATS)
+    quality = config.get('QUALITY', 80)
+
+    digest = content_hash(field_file)
+    with field_file.open('rb') as handle:
+        with Image.open(handle) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode not in ('RGB', 'RGBA'):
+                source = source.convert('RGBA' if 'transparency' in source.info else 'RGB')
+            width, height = source.size
+
+            renditions = {'source': field_file.name, 'hash': digest, 'width': width, 'height': height, 'sizes': {}}
+            for label, max_side in sorted(sizes.items(), key=lambda pair: pair[1]):
+                image = source.copy()
+                # Never upscale: small originals are served as-is at every size
+                image.thumbnail((max_side, max_side), Image.LANCZOS)
+                entry = {'width': image.width, 'height': image.height}
+                for fmt in formats:
+                    name = rendition_name(digest, label, fmt)
+                    if not default_storage.exists(name):
+                        encoded = image.convert('RGB') if fmt == 'jpeg' else image
+                        default_storage.save(name, ContentFile(_encode(encoded, fmt, quality)))
+                    entry[fmt] = name
+                renditions['sizes'][label] = entry
+    return renditions
+
+
+def needs_renditions(instance):
+    """True when the photo changed since its renditions were built"""
+    name = instance.photo.name if instance.photo else ''
+    return name != (instance.photo_renditions or {}).get('source', '')
+
+
+def process_photo(model_label, pk):
+    """Build renditions for one object's current photo and store them (worker side)"""
+    model = apps.get_model(model_label)
+    try:
+        instance = model.objects.using(DEFAULT_DB_ALIAS).only('pk', 'photo', 'photo_renditions').get(pk=pk)
+        if not needs_renditions(instance):
+            return
+        if instance.photo:
+            renditions = build_renditions(instance.photo)
+            fields = {
+                'photo_hash': renditions['hash'],
+                'photo_width': renditions['width'],
+                'photo_height': renditions['height'],
+                'photo_renditions': renditions,
+            }
+        else:
+            fields = {'photo_hash': '', 'photo_width': None, 'photo_height': None, 'photo_renditions': {}}
+        # Only store the result if the photo wasn't replaced meanwhile
+        if instance.photo:
+            unchanged = Q(photo=instance.photo.name)
+        else:
+            unchanged = Q(photo='') | Q(photo__isnull=True)
+        updated = model.objects.filter(unchanged, pk=pk).update(**fields)
+        if updated and model._meta.model_name == 'item':
+            from .catalog import catalog
+            from .snapshots import refresh_menu_snapshots
+            # update() skips the catalog and snapshot signals
+            catalog.invalidate()
+            refresh_menu_snapshots(model.objects.filter(pk=pk).values_list('restaurant_id', flat=True))
+    except model.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception('Building renditions for %s %s failed', model_label, pk)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _run_in_worker(model_label, pk):
+    try:
+        process_photo(model_label, pk)
+    finally:
+        # Worker threads have their own connections; don't leak them
+        connections.close_all()
+
+
+def get_executor():
+    """Process-wide pool that builds renditions off the request thread"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=_config().get('MAX_WORKERS', 2),
+                    thread_name_prefix='image-renditions',
+                )
+    return _executor
+
+
+def schedule_renditions(instance):
+    """
+    Queue rendition building for an object whose photo changed
+    Runs after the surrounding transaction commits, so the worker sees the
+    new photo; IMAGE_RENDITIONS['EAGER'] builds inline (tests, commands).
+    """
+    model_label = instance._meta.label
+    pk = instance.pk
+
+    def submit():
+        if _config().get('EAGER'):
+            process_photo(model_label, pk)
+        else:
+            get_executor().submit(_run_in_worker, model_label, pk)
+
+    transaction.on_commit(submit)
+
+
+def rendition_urls(renditions):
+    """Public URLs for a photo_renditions dict, keyed by size label"""
+    if not renditions:
+        return {}
+    urls = {}
+    for label, entry in renditions.get('sizes', {}).items():
+        urls[label] = {
+            key: (default_storage.url(value) if key not in ('width', 'height') else value)
+            for key, value in entry.items()
+        }
+    return urls
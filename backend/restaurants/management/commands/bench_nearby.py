@@ -0,0 +1,98 @@
+# restaurants/management/commands/bench_nearby.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from config.benchmarks import percentile
+from restaurants.geo import encode_geohash, haversine_km, nearby_restaurants
+from restaurants.models import Restaurant
+
+User = get_user_model()
+
+# Seattle metro area
+CENTER_LAT = 47.6062
+CENTER_LNG = -122.3321
+SPREAD_DEG = 0.5
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark geohash nearby search against a naive full-table scan (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=20000, help='Restaurants to seed')
+        parser.add_argument('--queries', type=int, default=200, help='Radius queries per strategy')
+        parser.add_argument('--radius', type=float, default=2.0, help='Search radius in km')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write('Benchmark data rolled back')
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        radius = options['radius']
+
+        self.stdout.write(f"Seeding {options['restaurants']} restaurants...")
+        owner = User.objects.create(username=f'bench_owner_{rng.randrange(10**9)}', type='owner')
+        rows = []
+        for i in range(options['restaurants']):
+            lat = round(CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6)
+            lng = round(CENTER_LNG + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6)
+            rows.append(Restaurant(
+                user=owner,
+                name=f'Bench Restaurant {i}',
+                latitude=lat,
+                longitude=lng,
+                geohash=encode_geohash(lat, lng),  # bulk_create skips save()
+            ))
+        Restaurant.objects.bulk_create(rows, batch_size=2000)
+
+        points = [
+            (CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG), CENTER_LNG + rng.uniform(-SPREAD_DEG, SPREAD_DEG))
+            for _ in range(options['queries'])
+        ]
+
+        def naive(lat, lng):
+            results = []
+            for restaurant in Restaurant.objects.all():
+                distance = haversine_km(lat, lng, restaurant.latitude, restaurant.longitude)
+                if distance <= radius:
+                    results.append((restaurant, distance))
+            results.sort(key=lambda pair: pair[1])
+            return results
+
+        def indexed(lat, lng):
+            return nearby_restaurants(lat, lng, radius)
+
+        for label, search in (('geohash', indexed), ('naive scan', naive)):
+            timings = []
+            for lat, lng in points:
+                start = time.perf_counter()
+                search(lat, lng)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.stdout.write(
+                f'{label:>12}: p50={percentile(timings, 50):.2f}ms '
+                f'p99={percentile(timings, 99):.2f}ms '
+                f'mean={statistics.mean(timings):.2f}ms'
+            )
+
+        # Sanity check: both strategies agree
+        lat, lng = points[0]
+        expected = {r.id for r, _ in naive(lat, lng)}
+        actual = {r.id for r, _ in indexed(lat, lng)}
+        if expected != actual:
+            self.stdout.write(self.style.ERROR('❌ Result mismatch between strategies'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Results match ({len(actual)} restaurants)'))
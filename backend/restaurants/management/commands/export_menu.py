@@ -0,0 +1,28 @@
+# restaurants/management/commands/export_menu.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from restaurants.menu_io import FORMATS, export_menu, format_for_name
+from restaurants.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Write a restaurant\'s menu as CSV or JSON lines, in the format import_menu reads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int)
+        parser.add_argument('path', nargs='?', default='-', help="File to write (default: stdout)")
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv')
+
+    def handle(self, *args, **options):
+        if not Restaurant.objects.filter(pk=options['restaurant_id']).exists():
+            raise CommandError(f"Restaurant {options['restaurant_id']} does not exist")
+        fmt = options['format'] or format_for_name(options['path'])
+        
+        if options['path'] == '-':
+            sys.stdout.writelines(export_menu(options['restaurant_id'], fmt))
+            return
+        with open(options['path'], 'w', encoding='utf-8', newline='') as stream:
+            stream.writelines(export_menu(options['restaurant_id'], fmt))
+        self.stderr.write(f"Wrote {options['path']}")
@@ -0,0 +1,52 @@
+# restaurants/management/commands/import_menu.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from restaurants.menu_io import DEFAULT_BATCH_SIZE, FORMATS, format_for_name, import_menu
+from restaurants.models import Restaurant
+
+
+class Command(BaseCommand):
+    help = 'Create or update a restaurant\'s menu items from a CSV or JSON-lines file (matched by name)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('restaurant_id', type=int)
+        parser.add_argument('path', help="File to read, or '-' for stdin")
+        parser.add_argument('--format', choices=FORMATS, help='Default: from the file extension, else csv')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per bulk write')
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without saving')
+
+    def handle(self, *args, **options):
+        if not Restaurant.objects.filter(pk=options['restaurant_id']).exists():
+            raise CommandError(f"Restaurant {options['restaurant_id']} does not exist")
+        fmt = options['format'] or format_for_name(options['path'])
+        
+        if options['path'] == '-':
+            report = self.run(sys.stdin, fmt, options)
+        else:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = self.run(stream, fmt, options)
+        
+        for error in report['errors']:
+            details = '; '.join(
+                f"{field}: {' '.join(str(message) for message in messages)}"
+                for field, messages in error['errors'].items()
+            )
+            self.stderr.write(f"  line {error['line']}: {details}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"  ... and {report['error_count'] - len(report['errors'])} more errors")
+        summary = (
+            f"{report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+            f"{report['error_count']} invalid in {report['seconds']:.2f}s ({report['rows_per_second'] or 0} rows/s)"
+        )
+        if report['dry_run']:
+            summary += ' (dry run, nothing saved)'
+        self.stdout.write(self.style.SUCCESS(f'✅ {summary}'))
+
+    def run(self, stream, fmt, options):
+        return import_menu(
+            options['restaurant_id'], stream, fmt,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
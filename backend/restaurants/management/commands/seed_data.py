@@ -1,27 +1,90 @@
 # restaurants/management/commands/seed_data.py
 
-from django.core.management.base import BaseCommand
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
 from users.models import Customer
+from orders.models import Order, OrderItem
+from restaurants.catalog import catalog
+from restaurants.search import rebuild_search_index
+from restaurants.snapshots import rebuild_menu_snapshots
+from restaurants.geo import encode_geohash
 from restaurants.models import Restaurant, Tag, Item
 
 User = get_user_model()
 
+# The 58 predefined tags by category (see TagDesign.txt)
+TAG_GROUPS = {
+    'Cuisine': [
+        'Chinese', 'Japanese', 'Korean', 'Thai', 'Indian',
+        'Italian', 'Mexican', 'American', 'Mediterranean', 'French',
+        'Vietnamese', 'Greek', 'Eastern Europe', 'African', 'Latin American',
+    ],
+    'ProteinType': [
+        'Chicken', 'Beef', 'Pork', 'Lamb', 'Fish',
+        'Shrimp', 'Crab', 'Egg', 'Tofu', 'Gluten',
+        'Beans', 'Dairy', 'Nuts', 'Mainly Vegetable',
+    ],
+    'Spiciness': ['None', 'Mild', 'Medium', 'Hot', 'Extra Hot'],
+    'MealType': ['Combo', 'Drink', 'Main Course', 'Side Dish'],
+    'Flavor': ['Sweet', 'Sour', 'Umami', 'Savory', 'Spicy'],
+    'Allergen': [
+        'Milk', 'Eggs', 'Fish', 'Crustacean Shellfish', 'Tree Nuts',
+        'Peanuts', 'Wheat', 'Soybeans', 'Sesame',
+    ],
+    'Nutrition': [
+        'High Protein', 'Low Carb', 'Low Sugar', 'Low Fat',
+        'High Fiber', 'Low Calorie',
+    ],
+}
+
+# Words for synthetic restaurant and item names
+NAME_ADJECTIVES = ['Golden', 'Happy', 'Green', 'Spicy', 'Royal', 'Little', 'Urban', 'Rustic', 'Lucky', 'Fresh']
+NAME_NOUNS = ['Kitchen', 'Bowl', 'Garden', 'Table', 'Wok', 'Grill', 'Bistro', 'House', 'Corner', 'Spoon']
+DISH_WORDS = ['Noodles', 'Rice Bowl', 'Salad', 'Curry', 'Wrap', 'Soup', 'Tacos', 'Burger', 'Skewers', 'Platter']
+
+# Synthetic restaurants are scattered around Seattle
+CENTER_LAT = 47.6062
+CENTER_LNG = -122.3321
+SPREAD_DEG = 0.5
+
 
 class Command(BaseCommand):
-    help = 'Seed database with tags and sample data'
+    help = 'Seed database with tags and sample data, or synthetic load-test data with --restaurants etc.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=0, help='Synthetic restaurants to generate')
+        parser.add_argument('--items-per', type=int, default=20, help='Menu items per synthetic restaurant')
+        parser.add_argument('--customers', type=int, default=0, help='Synthetic customers to generate')
+        parser.add_argument('--orders', type=int, default=0, help='Synthetic orders to generate')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed (same seed, same data)')
+        parser.add_argument('--skip-preferences', action='store_true', help="Don't rebuild preference counts")
+        parser.add_argument('--skip-rollups', action='store_true', help="Don't rebuild sales rollups")
+        parser.add_argument('--skip-neighbors', action='store_true', help="Don't build \"also ordered\" item neighbors")
+        parser.add_argument('--skip-combos', action='store_true', help="Don't mine combo suggestions")
 
-    def handle(self, *args, **kwargs):
+    def handle(self, *args, **options):
         self.stdout.write('Starting database seeding...')
         
         # 1. Create Tags (58 total)
         self.create_tags()
         
-        # 2. Create sample owner and restaurants
-        self.create_sample_restaurants()
-        
-        # 3. Create sample customer
-        self.create_sample_customer()
+        if options['restaurants'] or options['customers'] or options['orders']:
+            self.create_synthetic_data(options)
+        else:
+            # 2. Create sample owner and restaurants
+            self.create_sample_restaurants()
+            
+            # 3. Create sample customer
+            self.create_sample_customer()
         
         self.stdout.write(self.style.SUCCESS('✅ Database seeding completed!'))
 
@@ -29,34 +92,7 @@ class Command(BaseCommand):
         """Create all 58 predefined tags"""
         self.stdout.write('Creating tags...')
         
-        tags = [
-            # Cuisine (15 tags)
-            'Chinese', 'Japanese', 'Korean', 'Thai', 'Indian',
-            'Italian', 'Mexican', 'American', 'Mediterranean', 'French',
-            'Vietnamese', 'Greek', 'Eastern Europe', 'African', 'Latin American',
-            
-            # ProteinType (14 tags)
-            'Chicken', 'Beef', 'Pork', 'Lamb', 'Fish',
-            'Shrimp', 'Crab', 'Egg', 'Tofu', 'Gluten',
-            'Beans', 'Dairy', 'Nuts', 'Mainly Vegetable',
-            
-            # Spiciness (5 tags)
-            'None', 'Mild', 'Medium', 'Hot', 'Extra Hot',
-            
-            # MealType (4 tags)
-            'Combo', 'Drink', 'Main Course', 'Side Dish',
-            
-            # Flavor (5 tags)
-            'Sweet', 'Sour', 'Umami', 'Savory', 'Spicy',
-            
-            # Allergen (9 tags)
-            'Milk', 'Eggs', 'Fish', 'Crustacean Shellfish', 'Tree Nuts',
-            'Peanuts', 'Wheat', 'Soybeans', 'Sesame',
-            
-            # Nutrition (6 tags)
-            'High Protein', 'Low Carb', 'Low Sugar', 'Low Fat',
-            'High Fiber', 'Low Calorie',
-        ]
+        tags = [name for group in TAG_GROUPS.values() for name in group]
         
         for tag_name in tags:
             tag, created = Tag.objects.get_or_create(name=tag_name)
@@ -221,8 +257,7 @@ class Command(BaseCommand):
             
             if created:
                 # Add tags
-                tags = Tag.objects.filter(name__in=tag_names)
-                item.tags.set(tags)
+                item.tags.set(catalog.tag_ids(tag_names))
                 self.stdout.write(f'    ✓ Created item: {item.name}')
 
     def create_sample_customer(self):
@@ -250,4 +285,239 @@ class Command(BaseCommand):
                 weight=70,
                 memo='I want to keep fit and build muscle'
             )
-            self.stdout.write(self.style.SUCCESS('  ✓ Created sample customer'))
\ No newline at end of file
+            self.stdout.write(self.style.SUCCESS('  ✓ Created sample customer'))
+
+    # Synthetic load-test data
+
+    def report(self, label, rows, started):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(f'  ✓ {label}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+
+    def bulk_insert(self, model, rows, batch_size):
+        """Insert an iterable of unsaved instances in batches, returning them with ids"""
+        created = []
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                created.extend(model.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created.extend(model.objects.bulk_create(batch))
+        return created
+
+    def create_synthetic_data(self, options):
+        """Generate restaurants, menus, customers and orders with bulk inserts"""
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        prefix = f"synth{options['seed']}"
+        if User.objects.filter(username__startswith=f'{prefix}_').exists():
+            raise CommandError(f'Synthetic data for --seed {options["seed"]} already exists, pick another seed')
+        
+        started_all = time.perf_counter()
+        with transaction.atomic():
+            menus = self.create_synthetic_restaurants(rng, prefix, options['restaurants'], options['items_per'], batch_size)
+            customer_ids = self.create_synthetic_customers(rng, prefix, options['customers'], batch_size)
+        catalog.invalidate()  # bulk inserts skip the catalog, search index and snapshot signals
+        rebuild_search_index()
+        rebuild_menu_snapshots([restaurant_id for restaurant_id, _ in menus])
+        
+        if options['orders']:
+            if not menus:
+                menus = self.load_menus()
+            if not customer_ids:
+                customer_ids = list(Customer.objects.values_list('id', flat=True))
+            if not menus or not customer_ids:
+                raise CommandError('Orders need at least one restaurant with items and one customer')
+            self.create_synthetic_orders(rng, menus, customer_ids, options['orders'], batch_size)
+            if not options['skip_preferences']:
+                call_command('rebuild_preferences', batch_size=1000, stdout=self.stdout)
+            if not options['skip_rollups']:
+                call_command('rebuild_rollups', stdout=self.stdout)
+            if not options['skip_neighbors']:
+                call_command('build_item_neighbors', settle_seconds=0, stdout=self.stdout)
+            if not options['skip_combos']:
+                call_command('mine_combos', *[str(restaurant_id) for restaurant_id, _ in menus], stdout=self.stdout)
+        
+        self.stdout.write(f'  Total time {time.perf_counter() - started_all:.1f}s')
+
+    def create_synthetic_restaurants(self, rng, prefix, count, items_per, batch_size):
+        """Owners, restaurants, items and item tags; returns [(restaurant_id, [(item_id, price)])]"""
+        if not count:
+            return []
+        
+        started = time.perf_counter()
+        owners = self.bulk_insert(User, (
+            User(username=f'{prefix}_owner_{i}', type='owner', password='!')
+            for i in range(count)
+        ), batch_size)
+        self.report('owners', len(owners), started)
+        
+        started = time.perf_counter()
+        
+        def restaurants():
+            for i, owner in enumerate(owners):
+                lat = round(CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6)
+                lng = round(CENTER_LNG + rng.uniform(-SPREAD_DEG, SPREAD_DEG), 6)
+                yield Restaurant(
+                    user=owner,
+                    name=f'{rng.choice(NAME_ADJECTIVES)} {rng.choice(NAME_NOUNS)} #{i}',
+                    google_place_id=f'{prefix}_place_{i}',
+                    latitude=lat,
+                    longitude=lng,
+                    geohash=encode_geohash(lat, lng),  # bulk_create skips save()
+                    address=f'{rng.randint(100, 9999)} Synthetic Ave, Seattle, WA',
+                )
+        restaurant_rows = self.bulk_insert(Restaurant, restaurants(), batch_size)
+        self.report('restaurants', len(restaurant_rows), started)
+        
+        # {name: (tag_id, bit)}
+        tag_entries, _ = catalog.tag_entries([name for group in TAG_GROUPS.values() for name in group])
+        Through = Item.tags.through
+        menus = []
+        item_count = 0
+        tag_count = 0
+        restaurants_per_batch = max(1, batch_size // max(items_per, 1))
+        started = time.perf_counter()
+        for start in range(0, len(restaurant_rows), restaurants_per_batch):
+            chunk = restaurant_rows[start:start + restaurants_per_batch]
+            items = []
+            item_tags = []
+            for restaurant in chunk:
+                cuisine = rng.choice(TAG_GROUPS['Cuisine'])
+                for j in range(items_per):
+                    names = self.random_item_tags(rng, cuisine)
+                    protein = rng.randint(2, 60)
+                    carb = rng.randint(5, 120)
+                    fat = rng.randint(2, 50)
+                    item = Item(
+                        restaurant=restaurant,
+                        name=f'{cuisine} {rng.choice(DISH_WORDS)} {j}',
+                        price=Decimal(rng.randint(299, 3999)) / 100,
+                        totalprotein=protein,
+                        totalgreens=rng.randint(0, 250),
+                        totalcarb=carb,
+                        totalfat=fat,
+                        totalcalories=protein * 4 + carb * 4 + fat * 9,
+                        tag_mask=sum(1 << tag_entries[name][1] for name in names if tag_entries[name][1] is not None),
+                    )
+                    items.append(item)
+                    item_tags.append(names)
+            with transaction.atomic():
+                Item.objects.bulk_create(items)
+                Through.objects.bulk_create([
+                    Through(item_id=item.id, tag_id=tag_entries[name][0])
+                    for item, names in zip(items, item_tags)
+                    for name in names
+                ], batch_size=batch_size)
+            item_count += len(items)
+            tag_count += sum(len(names) for names in item_tags)
+            by_restaurant = {}
+            for item in items:
+                by_restaurant.setdefault(item.restaurant_id, []).append((item.id, item.price))
+            menus.extend(by_restaurant.items())
+        self.report('items', item_count, started)
+        self.stdout.write(f'    with {tag_count:,} item tags')
+        return menus
+
+    def random_item_tags(self, rng, cuisine):
+        """A plausible tag set for a synthetic menu item"""
+        names = {
+            cuisine,
+            rng.choice(TAG_GROUPS['ProteinType']),
+            rng.choice(TAG_GROUPS['Spiciness']),
+            rng.choice(TAG_GROUPS['MealType']),
+        }
+        names.update(rng.sample(TAG_GROUPS['Flavor'], rng.randint(0, 2)))
+        names.update(rng.sample(TAG_GROUPS['Allergen'], rng.randint(0, 2)))
+        names.update(rng.sample(TAG_GROUPS['Nutrition'], rng.randint(0, 1)))
+        return sorted(names)
+
+    def create_synthetic_customers(self, rng, prefix, count, batch_size):
+        """Customer users and profiles; returns customer ids"""
+        if not count:
+            return []
+        
+        started = time.perf_counter()
+        users = self.bulk_insert(User, (
+            User(username=f'{prefix}_customer_{i}', type='customer', password='!')
+            for i in range(count)
+        ), batch_size)
+        self.report('customer users', len(users), started)
+        
+        started = time.perf_counter()
+        memos = [
+            'I want to keep fit and build muscle',
+            'Trying to lose weight',
+            'Low carb diet',
+            'No special requirements',
+            '',
+        ]
+        customers = self.bulk_insert(Customer, (
+            Customer(
+                user=user,
+                firstname=f'Customer{i}',
+                lastname=rng.choice(NAME_NOUNS),
+                age=rng.randint(18, 75),
+                gender=rng.choice(['Male', 'Female', '']),
+                weight=rng.randint(45, 120),
+                memo=rng.choice(memos),
+            )
+            for i, user in enumerate(users)
+        ), batch_size)
+        self.report('customers', len(customers), started)
+        return [customer.id for customer in customers]
+
+    def load_menus(self):
+        """Existing menus as [(restaurant_id, [(item_id, price)])]"""
+        menus = {}
+        for item_id, restaurant_id, price in Item.objects.values_list('id', 'restaurant_id', 'price').iterator(chunk_size=10000):
+            menus.setdefault(restaurant_id, []).append((item_id, price))
+        return list(menus.items())
+
+    def create_synthetic_orders(self, rng, menus, customer_ids, count, batch_size):
+        """Orders over the last year with 1-4 lines each, streamed in batches"""
+        started = time.perf_counter()
+        now = timezone.now()
+        year_seconds = 365 * 24 * 3600
+        created = 0
+        line_count = 0
+        
+        while created < count:
+            size = min(batch_size, count - created)
+            orders = []
+            ordertimes = []
+            lines = []
+            for _ in range(size):
+                restaurant_id, menu = rng.choice(menus)
+                picks = rng.sample(menu, min(len(menu), rng.randint(1, 4)))
+                order_lines = [(item_id, price, rng.randint(1, 3)) for item_id, price in picks]
+                orders.append(Order(
+                    customer_id=rng.choice(customer_ids),
+                    restaurant_id=restaurant_id,
+                    totalprice=sum(price * quantity for _, price, quantity in order_lines),
+                    isrecommended=rng.random() < 0.3,
+                ))
+                ordertimes.append(now - timedelta(seconds=rng.randint(0, year_seconds)))
+                lines.append(order_lines)
+            with transaction.atomic():
+                Order.objects.bulk_create(orders)
+                # auto_now_add overwrites ordertime on insert, so backdate afterwards (as place_orders_bulk does)
+                for order, ordertime in zip(orders, ordertimes):
+                    order.ordertime = ordertime
+                Order.objects.bulk_update(orders, ['ordertime'])
+                order_items = [
+                    OrderItem(
+                        order_id=order.id, item_id=item_id, quantity=quantity, price=price, ordertime=order.ordertime,
+                    )
+                    for order, order_lines in zip(orders, lines)
+                    for item_id, price, quantity in order_lines
+                ]
+                OrderItem.objects.bulk_create(order_items)
+            created += size
+            line_count += len(order_items)
+            if created % (batch_size * 20) < size:
+                self.report('orders so far', created, started)
+        
+        self.report('orders', created, started)
+        self.stdout.write(f'    with {line_count:,} order items')
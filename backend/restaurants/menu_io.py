@@ -0,0 +1,329 @@
+# restaurants/menu_io.py
+
+import csv
+import io
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .catalog import catalog
+from .search import index_items
+from .serializers import MenuImportRowSerializer
+from .snapshots import refresh_menu_snapshots
+from .tagbits import mask_from_bits
+
+FORMATS = ('csv', 'jsonl')
+
+# Columns of an exported menu, in order; import accepts any subset that includes name and price.
+# Updated items only change the columns a row supplies.
+COLUMNS = [
+    'name', 'description', 'price',
+    'totalprotein', 'totalgreens', 'totalcarb', 'totalfat', 'totalcalories',
+    'tags',
+]
+
+# Separator for tag names inside one CSV cell
+CSV_TAG_SEPARATOR = '|'
+
+DEFAULT_BATCH_SIZE = 500
+
+# Only the first errors are returned, the rest are counted
+MAX_REPORTED_ERRORS = 50
+
+_ITEM_COLUMNS = [column for column in COLUMNS if column != 'tags']
+
+
+def format_for_name(filename, default='csv'):
+    """Import/export format from a file name's extension (.csv, .jsonl, .ndjson)"""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension == 'ndjson':
+        return 'jsonl'
+    return extension if extension in FORMATS else default
+
+
+def read_rows(stream, fmt):
+    """
+    Yield (line_number, row dict) from a text stream, one row at a time
+    Empty CSV cells are dropped, so they count as missing: new items get the
+    serializer defaults, existing items keep their values. The tags cell is
+    the exception: it is split on CSV_TAG_SEPARATOR whenever the column is
+    present, and an empty one clears the item's tags.
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            cleaned = {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            if 'tags' in row and row['tags'] is not None:
+                cleaned['tags'] = [name.strip() for name in row['tags'].split(CSV_TAG_SEPARATOR) if name.strip()]
+            yield reader.line_num, cleaned
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, exc
+                continue
+            yield line_number, row
+    else:
+        raise ValueError(f'Unknown menu format {fmt!r}, expected one of {", ".join(FORMATS)}')
+
+
+def _batches(iterable, size):
+    batch = []
+    for entry in iterable:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MenuImport:
+    """
+    Upsert a restaurant's items from CSV or JSON-lines rows, keyed by (restaurant, name)
+
+    Rows are validated one by one and applied in batches: one lookup of the
+    existing items, a multi-row UPDATE, one bulk_create and bulk inserts of the
+    item_tags rows per batch. Tag names resolve against a single map fetched up
+    front, which also gives each row's tag_mask directly. Invalid rows are
+    skipped and reported; the valid ones are written in one transaction. An
+    existing item only has the columns its row supplies rewritten (rows
+    without a tags value keep their current tags), so a name,price file
+    doesn't reset descriptions and nutrition to the defaults.
+
+    Bulk writes skip the model signals, so the search index, the catalog and
+    the menu snapshot are brought up to date at the end.
+    """
+
+    def __init__(self, restaurant_id, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        from .models import Tag
+
+        self.restaurant_id = restaurant_id
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.tags = {
+            name: (tag_id, bit)
+            for name, tag_id, bit in Tag.objects.using(DEFAULT_DB_ALIAS).values_list('name', 'id', 'bit')
+        }
+        # One serializer for every row: building its fields dominates per-row validation
+        self.validator = MenuImportRowSerializer()
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.error_count = 0
+        self.touched_ids = set()
+
+    def error(self, line_number, detail):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'errors': detail})
+
+    def validate(self, line_number, row):
+        """
+        Validated row dict, or None if invalid, with 'tag_ids' (None when tags
+        weren't given) and 'columns', the item columns the row supplied
+        """
+        if isinstance(row, ValueError):
+            self.error(line_number, {'non_field_errors': [f'Invalid JSON: {row}']})
+            return None
+        if not isinstance(row, dict):
+            self.error(line_number, {'non_field_errors': ['Expected a JSON object']})
+            return None
+        try:
+            data = dict(self.validator.run_validation(row))
+        except ValidationError as exc:
+            self.error(line_number, exc.detail)
+            return None
+        tag_names = data.pop('tags', None)
+        data['columns'] = tuple(column for column in _ITEM_COLUMNS if column in row)
+        data['tag_ids'] = None
+        if tag_names is not None:
+            unknown = sorted({name for name in tag_names if name not in self.tags})
+            if unknown:
+                self.error(line_number, {'tags': [f'Unknown tags: {", ".join(unknown)}']})
+                return None
+            entries = {self.tags[name] for name in tag_names}
+            data['tag_ids'] = sorted(tag_id for tag_id, _ in entries)
+            data['tag_mask'] = mask_from_bits(bit for _, bit in entries)
+        return data
+
+    def run(self, rows):
+        """Import (line_number, row) pairs (see read_rows); returns the report"""
+        start = time.perf_counter()
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            for batch in _batches(rows, self.batch_size):
+                valid = []
+                for line_number, row in batch:
+                    self.rows += 1
+                    data = self.validate(line_number, row)
+                    if data is not None:
+                        valid.append(data)
+                if valid:
+                    self.apply(valid)
+            if self.touched_ids:
+                index_items(self.touched_ids)
+                # Queued first: on_commit callbacks run in order, so the snapshot is built from fresh maps
+                catalog.invalidate_on_commit(DEFAULT_DB_ALIAS)
+                refresh_menu_snapshots([self.restaurant_id])
+            if self.dry_run:
+                transaction.set_rollback(True, using=DEFAULT_DB_ALIAS)
+        return self.report(time.perf_counter() - start)
+
+    def apply(self, rows):
+        from .models import Item
+
+        # Later rows for the same name win
+        by_name = {row['name']: row for row in rows}
+        existing = {}
+        for item_id, name in (
+            Item.objects.using(DEFAULT_DB_ALIAS)
+            .filter(restaurant_id=self.restaurant_id, name__in=list(by_name))
+            .order_by('-id')
+            .values_list('id', 'name')
+        ):
+            # Duplicate names already in the menu: the oldest item is the one updated
+            existing[name] = item_id
+
+        now = timezone.now()
+        to_update, to_create = [], []
+        # Existing items grouped by the columns their rows supplied (one group per file, usually)
+        updates = {}
+        for name, row in by_name.items():
+            fields = {key: value for key, value in row.items() if key not in ('tag_ids', 'columns')}
+            if name in existing:
+                item = Item(id=existing[name], restaurant_id=self.restaurant_id, updated_at=now, **fields)
+                columns = row['columns'] + ('updated_at',) + (('tag_mask',) if row['tag_ids'] is not None else ())
+                updates.setdefault(columns, []).append(item)
+                to_update.append(item)
+            else:
+                to_create.append(Item(restaurant_id=self.restaurant_id, **fields))
+
+        for columns, items in updates.items():
+            update_items(items, columns)
+        if to_create:
+            Item.objects.using(DEFAULT_DB_ALIAS).bulk_create(to_create)
+        self.updated += len(to_update)
+        self.created += len(to_create)
+
+        through = Item.tags.through
+        tagged = {item.id: by_name[item.name]['tag_ids'] for item in to_update + to_create}
+        retagged = [item_id for item_id, tag_ids in tagged.items() if tag_ids is not None]
+        if retagged:
+            through.objects.using(DEFAULT_DB_ALIAS).filter(item_id__in=retagged).delete()
+            through.objects.using(DEFAULT_DB_ALIAS).bulk_create([
+                through(item_id=item_id, tag_id=tag_id)
+                for item_id in retagged
+                for tag_id in tagged[item_id]
+            ])
+        self.touched_ids.update(tagged)
+
+    def report(self, seconds):
+        return {
+            'restaurant': self.restaurant_id,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+            'seconds': round(seconds, 4),
+            'rows_per_second': round(self.rows / seconds) if seconds else None,
+        }
+
+
+def _update_from_values_supported(connection):
+    if connection.vendor == 'postgresql':
+        return True
+    # UPDATE ... FROM arrived in SQLite 3.33
+    return connection.vendor == 'sqlite' and connection.Database.sqlite_version_info >= (3, 33)
+
+
+def update_items(items, columns):
+    """
+    Write the given columns of existing items with UPDATE ... FROM (VALUES ...)
+    Django's bulk_update builds a CASE per column and row, which costs more
+    than the database work at menu sizes; it remains the fallback on other
+    backends.
+    """
+    from .models import Item
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not _update_from_values_supported(connection):
+        Item.objects.using(DEFAULT_DB_ALIAS).bulk_update(items, list(columns))
+        return
+
+    quote = connection.ops.quote_name
+    table = quote(Item._meta.db_table)
+    fields = [Item._meta.get_field(name) for name in columns]
+    # VALUES columns are named column1, column2, ... on both backends; 1 is the id
+    assignments = [f'{quote(field.column)} = v.column{index}' for index, field in enumerate(fields, start=2)]
+    placeholders = ['%s'] * (len(fields) + 1)
+    if connection.vendor == 'postgresql':
+        # Column types of a VALUES list come from its first row
+        first_row = (
+            [f'CAST(%s AS {Item._meta.pk.rel_db_type(connection)})']
+            + [f'CAST(%s AS {field.db_type(connection)})' for field in fields]
+        )
+    else:
+        first_row = placeholders
+
+    # Stay under SQLite's bound-parameter limit
+    batch_size = max(1, 900 // len(placeholders))
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            rows = ['(' + ', '.join(first_row) + ')'] + ['(' + ', '.join(placeholders) + ')'] * (len(batch) - 1)
+            params = []
+            for item in batch:
+                params.append(item.id)
+                params.extend(field.get_db_prep_save(getattr(item, field.attname), connection) for field in fields)
+            cursor.execute(
+                f'UPDATE {table} SET {", ".join(assignments)} '
+                f'FROM (VALUES {", ".join(rows)}) AS v WHERE {table}.{quote("id")} = v.column1',
+                params,
+            )
+
+
+def import_menu(restaurant_id, stream, fmt, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Import a CSV or JSON-lines menu from a text stream; returns the report dict"""
+    return MenuImport(restaurant_id, batch_size=batch_size, dry_run=dry_run).run(read_rows(stream, fmt))
+
+
+def export_rows(restaurant_id):
+    """A restaurant's menu as import-ready row dicts (name, price, nutrition, tag names)"""
+    for item in catalog.menu(restaurant_id):
+        row = {column: item[column] for column in COLUMNS if column != 'tags'}
+        row['tags'] = catalog.tag_names(item['tag_ids'])
+        yield row
+
+
+def export_menu(restaurant_id, fmt):
+    """Yield a restaurant's menu as CSV or JSON-lines text chunks, one per row"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+
+        def flush():
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        writer.writeheader()
+        yield flush()
+        for row in export_rows(restaurant_id):
+            writer.writerow({**row, 'tags': CSV_TAG_SEPARATOR.join(row['tags'])})
+            yield flush()
+    elif fmt == 'jsonl':
+        for row in export_rows(restaurant_id):
+            yield json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')) + '\n'
+    else:
+        raise ValueError(f'Unknown menu format {fmt!r}, expected one of {", ".join(FORMATS)}')
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:24
+
+from django.db import migrations, models
+
+MAX_TAG_BITS = 63
+
+
+def backfill_tag_bits(apps, schema_editor):
+    Tag = apps.get_model('restaurants', 'Tag')
+    Item = apps.get_model('restaurants', 'Item')
+    
+    tags = list(Tag.objects.order_by('id')[:MAX_TAG_BITS])
+    for bit, tag in enumerate(tags):
+        tag.bit = bit
+    Tag.objects.bulk_update(tags, ['bit'])
+    
+    masks = {}
+    rows = Item.tags.through.objects.filter(tag__bit__isnull=False).values_list('item_id', 'tag__bit')
+    for item_id, bit in rows:
+        masks[item_id] = masks.get(item_id, 0) | (1 << bit)
+    items = [Item(id=item_id, tag_mask=mask) for item_id, mask in masks.items()]
+    Item.objects.bulk_update(items, ['tag_mask'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0003_restaurant_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='tag_mask',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='bit',
+            field=models.SmallIntegerField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_tag_bits, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['restaurant', 'tag_mask'], name='item_restaurant_tagmask_idx'),
+        ),
+    ]
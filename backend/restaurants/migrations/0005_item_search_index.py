@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from restaurants.search import create_search_index, rebuild_search_index
+    
+    create_search_index(schema_editor.connection)
+    rebuild_search_index(schema_editor.connection.alias)
+
+
+def drop_index(apps, schema_editor):
+    from restaurants.search import drop_search_index
+    
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0004_tag_bitmask'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:20
+
+from django.db import migrations
+
+
+def drop_item_fk(apps, schema_editor):
+    # item_search is created without it now (restaurants/search.py)
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('ALTER TABLE IF EXISTS item_search DROP CONSTRAINT IF EXISTS item_search_item_id_fkey')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0007_menu_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_item_fk, migrations.RunPython.noop),
+    ]
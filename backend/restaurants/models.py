@@ -3,6 +3,9 @@
 from django.db import models
 from django.conf import settings
 
+from .geo import encode_geohash
+from .tagbits import next_free_tag_bit
+
 
 class Restaurant(models.Model):
     """
@@ -22,14 +25,33 @@ class Restaurant(models.Model):
     description = models.TextField(blank=True)
     photo = models.ImageField(upload_to='restaurants/', null=True, blank=True)
     
+    # Resized copies built in the background after upload (see images.py)
+    photo_hash = models.CharField(max_length=64, blank=True, editable=False)
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    
+    # Derived from latitude/longitude, used to prefilter nearby searches
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.geohash = encode_geohash(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'restaurant'
+        indexes = [
+            models.Index(fields=['geohash', 'latitude', 'longitude'], name='restaurant_geohash_idx'),
+        ]
 
 
 class Tag(models.Model):
@@ -39,9 +61,17 @@ class Tag(models.Model):
     """
     name = models.CharField(max_length=100, unique=True)
     
+    # Bit position in Item.tag_mask (null once all bits are taken)
+    bit = models.SmallIntegerField(unique=True, null=True, blank=True, editable=False)
+    
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = next_free_tag_bit()
+        super().save(*args, **kwargs)
+    
     class Meta:
         db_table = 'tag'
         ordering = ['name']
@@ -60,6 +90,12 @@ class Item(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     photo = models.ImageField(upload_to='menu_items/', null=True, blank=True)
+    
+    # Resized copies built in the background after upload (see images.py)
+    photo_hash = models.CharField(max_length=64, blank=True, editable=False)
+    photo_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False)
     price = models.DecimalField(max_digits=6, decimal_places=2)
     
     # Nutrition (all in grams, owner-inputted)
@@ -72,6 +108,9 @@ class Item(models.Model):
     # Many-to-many relationship with tags
     tags = models.ManyToManyField(Tag, related_name='items', blank=True)
     
+    # Denormalized OR of Tag.bit for every tag (kept in sync by signals)
+    tag_mask = models.BigIntegerField(default=0, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -79,4 +118,32 @@ class Item(models.Model):
         return f"{self.name} - {self.restaurant.name}"
     
     class Meta:
-        db_table = 'item'
\ No newline at end of file
+        db_table = 'item'
+        indexes = [
+            # Narrows to the restaurant only: tag_mask & mask can't use a B-tree, so
+            # the bitwise tag tests run on each of that restaurant's rows
+            models.Index(fields=['restaurant', 'tag_mask'], name='item_restaurant_tagmask_idx'),
+        ]
+
+
+class MenuSnapshot(models.Model):
+    """
+    Precomputed JSON menu of one restaurant, served as-is by the menu endpoint
+    Rebuilt by signals after its items or their tags change (see snapshots.py)
+    """
+    restaurant = models.OneToOneField(
+        Restaurant, 
+        on_delete=models.CASCADE, 
+        primary_key=True, 
+        related_name='menu_snapshot'
+    )
+    payload = models.TextField()
+    etag = models.CharField(max_length=64)
+    item_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Menu snapshot for restaurant {self.restaurant_id}"
+    
+    class Meta:
+        db_table = 'menu_snapshot'
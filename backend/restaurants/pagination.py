@@ -0,0 +1,14 @@
+# restaurants/pagination.py
+
+from rest_framework.pagination import CursorPagination
+
+
+class ItemPagination(CursorPagination):
+    """
+    Keyset pagination on id for item listings
+    An unfiltered listing spans every restaurant, so it is never returned in one piece
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
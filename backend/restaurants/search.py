@@ -0,0 +1,290 @@
+# restaurants/search.py
+
+import re
+
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Text search configuration for PostgreSQL (stemming + stop words)
+TEXT_SEARCH_CONFIG = 'english'
+
+# Bound the work a single search can ask for
+MAX_QUERY_TERMS = 8
+
+# Ids per statement when reindexing, below SQLite's bound-parameter limit
+INDEX_BATCH_SIZE = 500
+
+_TERM_RE = re.compile(r'\w+', re.U)
+
+# Space-separated tag names for one item (correlated on item alias "i")
+_TAG_NAMES_SQL = {
+    'postgresql': (
+        "(SELECT string_agg(t.name, ' ') FROM item_tags it JOIN tag t ON t.id = it.tag_id "
+        "WHERE it.item_id = i.id)"
+    ),
+    'sqlite': (
+        "(SELECT group_concat(t.name, ' ') FROM item_tags it JOIN tag t ON t.id = it.tag_id "
+        "WHERE it.item_id = i.id)"
+    ),
+}
+
+
+def query_terms(text):
+    """Lowercased word tokens of a search string; punctuation and operators are dropped"""
+    return [term.lower() for term in _TERM_RE.findall(text or '')][:MAX_QUERY_TERMS]
+
+
+class PostgresSearchIndex:
+    """
+    item_search(item_id, document tsvector) with a GIN index
+    Weights: name A, tag names B, description C; ranked with ts_rank_cd
+    No foreign key to item, like the SQLite table: flush (and TransactionTestCase)
+    truncates Django's tables only and would refuse. Deleted items are removed by
+    signal, and search_items skips ids whose item is gone.
+    """
+    table = 'item_search'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'item_id bigint PRIMARY KEY, document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {self.table}_document_idx ON {self.table} USING GIN (document)')
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _insert_sql(self, where):
+        document = (
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(i.name, '')), 'A') || "
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce({_TAG_NAMES_SQL['postgresql']}, '')), 'B') || "
+            f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(i.description, '')), 'C')"
+        )
+        return (
+            f'INSERT INTO {self.table} (item_id, document) SELECT i.id, {document} FROM item i {where} '
+            'ON CONFLICT (item_id) DO UPDATE SET document = excluded.document'
+        )
+
+    def index(self, item_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(self._insert_sql('WHERE i.id = ANY(%s)'), [list(item_ids)])
+
+    def remove(self, item_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE item_id = ANY(%s)', [list(item_ids)])
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+            cursor.execute(self._insert_sql(''))
+            cursor.execute(f'SELECT count(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    def match_expression(self, terms):
+        # Prefix match on every term so partial words work while typing
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def ids_sql(self, terms):
+        return (
+            f"SELECT item_id FROM {self.table} WHERE document @@ to_tsquery('{TEXT_SEARCH_CONFIG}', %s)",
+            [self.match_expression(terms)],
+        )
+
+    def ranked_sql(self, terms, id_subquery, limit):
+        sql = (
+            f'SELECT s.item_id, ts_rank_cd(s.document, q) AS score '
+            f"FROM {self.table} s, to_tsquery('{TEXT_SEARCH_CONFIG}', %s) q WHERE s.document @@ q"
+        )
+        params = [self.match_expression(terms)]
+        if id_subquery is not None:
+            sql += f' AND s.item_id IN ({id_subquery[0]})'
+            params.extend(id_subquery[1])
+        sql += ' ORDER BY score DESC, s.item_id LIMIT %s'
+        params.append(limit)
+        return sql, params
+
+
+class SqliteSearchIndex:
+    """
+    FTS5 shadow table item_fts(name, tags, description) keyed by item rowid
+    Porter-stemmed; ranked with bm25 weighting name over tags over description
+    """
+    table = 'item_fts'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} "
+                "USING fts5(name, tags, description, tokenize='porter unicode61')"
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _insert_sql(self, where):
+        return (
+            f'INSERT INTO {self.table} (rowid, name, tags, description) '
+            f"SELECT i.id, i.name, coalesce({_TAG_NAMES_SQL['sqlite']}, ''), i.description FROM item i {where}"
+        )
+
+    def index(self, item_ids):
+        item_ids = list(item_ids)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(item_ids), INDEX_BATCH_SIZE):
+                batch = item_ids[start:start + INDEX_BATCH_SIZE]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+                cursor.execute(self._insert_sql(f'WHERE i.id IN ({placeholders})'), batch)
+
+    def remove(self, item_ids):
+        item_ids = list(item_ids)
+        with self.connection.cursor() as cursor:
+            for start in range(0, len(item_ids), INDEX_BATCH_SIZE):
+                batch = item_ids[start:start + INDEX_BATCH_SIZE]
+                cursor.execute(
+                    f"DELETE FROM {self.table} WHERE rowid IN ({', '.join(['%s'] * len(batch))})", batch,
+                )
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(self._insert_sql(''))
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f'SELECT count(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+    def match_expression(self, terms):
+        # Quoted prefix terms, implicitly ANDed; quoting keeps FTS5 syntax out of user input
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def ids_sql(self, terms):
+        return f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [self.match_expression(terms)]
+
+    def ranked_sql(self, terms, id_subquery, limit):
+        # bm25 is lower-is-better, so negate it into a score
+        sql = f'SELECT rowid, -bm25({self.table}, 10.0, 4.0, 1.0) AS score FROM {self.table} WHERE {self.table} MATCH %s'
+        params = [self.match_expression(terms)]
+        if id_subquery is not None:
+            sql += f' AND rowid IN ({id_subquery[0]})'
+            params.extend(id_subquery[1])
+        sql += ' ORDER BY score DESC, rowid LIMIT %s'
+        params.append(limit)
+        return sql, params
+
+
+_INDEX_CLASSES = {
+    'postgresql': PostgresSearchIndex,
+    'sqlite': SqliteSearchIndex,
+}
+
+_available = {}
+
+
+def search_index(using=DEFAULT_DB_ALIAS, connection=None):
+    """Full-text index for a database, or None when the backend has none (or it isn't built)"""
+    connection = connection or connections[using]
+    index_class = _INDEX_CLASSES.get(connection.vendor)
+    if index_class is None:
+        return None
+    key = connection.alias
+    if key not in _available:
+        with connection.cursor() as cursor:
+            _available[key] = index_class.table in connection.introspection.table_names(cursor)
+    return index_class(connection) if _available[key] else None
+
+
+def create_search_index(connection):
+    """Create the index structures for a connection's backend (used by migrations)"""
+    index_class = _INDEX_CLASSES.get(connection.vendor)
+    if index_class is not None:
+        index_class(connection).create()
+        _available.pop(connection.alias, None)
+
+
+def drop_search_index(connection):
+    index_class = _INDEX_CLASSES.get(connection.vendor)
+    if index_class is not None:
+        index_class(connection).drop()
+        _available.pop(connection.alias, None)
+
+
+def index_items(item_ids, using=DEFAULT_DB_ALIAS):
+    """(Re)index items after their name, description or tags changed"""
+    item_ids = [item_id for item_id in set(item_ids) if item_id is not None]
+    index = search_index(using)
+    if index is not None and item_ids:
+        index.index(item_ids)
+
+
+def remove_items(item_ids, using=DEFAULT_DB_ALIAS):
+    item_ids = [item_id for item_id in set(item_ids) if item_id is not None]
+    index = search_index(using)
+    if index is not None and item_ids:
+        index.remove(item_ids)
+
+
+def rebuild_search_index(using=DEFAULT_DB_ALIAS):
+    """Reindex every item (after bulk imports that skip signals); returns rows indexed or None"""
+    index = search_index(using)
+    return index.rebuild() if index is not None else None
+
+
+def matching_item_ids(text, using=DEFAULT_DB_ALIAS):
+    """
+    RawSQL selecting ids of items matching a search string, for pk__in filters
+    Returns None when there is nothing to search for or no index
+    """
+    terms = query_terms(text)
+    index = search_index(using)
+    if not terms or index is None:
+        return None
+    return RawSQL(*index.ids_sql(terms))
+
+
+def search_items(text, queryset=None, limit=20):
+    """
+    Items matching a search string, best match first
+    Returns a list of (item, score)
+
+    queryset narrows the candidates (restaurant, tags, nearby restaurants);
+    it becomes an IN subquery of the full-text query, so ranking, filtering
+    and the limit all happen in one indexed statement. Without an index the
+    search falls back to icontains with a zero score.
+    """
+    from .models import Item
+
+    terms = query_terms(text)
+    if not terms:
+        return []
+    base = queryset if queryset is not None else Item.objects.all()
+    index = search_index(base.db)
+    if index is None:
+        matches = base
+        for term in terms:
+            matches = matches.filter(Q(name__icontains=term) | Q(description__icontains=term))
+        return [(item, 0.0) for item in matches.order_by('name', 'id')[:limit]]
+
+    id_subquery = None
+    if queryset is not None:
+        try:
+            id_subquery = queryset.order_by().values('pk').query.sql_with_params()
+        except EmptyResultSet:
+            return []
+    sql, params = index.ranked_sql(terms, id_subquery, limit)
+    with connections[base.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        ranked = cursor.fetchall()
+
+    items = Item.objects.using(base.db).in_bulk([item_id for item_id, _ in ranked])
+    return [(items[item_id], float(score)) for item_id, score in ranked if item_id in items]
@@ -0,0 +1,87 @@
+# restaurants/serializers.py
+
+from rest_framework import serializers
+from .images import rendition_urls
+from .models import Restaurant, Item
+
+
+class PhotoRenditionsField(serializers.ReadOnlyField):
+    """Resized photo URLs by size label: {"thumb": {"width", "height", "webp", "jpeg"}, ...}"""
+    
+    def to_representation(self, value):
+        return rendition_urls(value)
+
+
+class RestaurantSerializer(serializers.ModelSerializer):
+    """Public restaurant fields"""
+    photo_renditions = PhotoRenditionsField()
+    
+    class Meta:
+        model = Restaurant
+        fields = [
+            'id', 'name', 'google_place_id', 'latitude', 'longitude', 'address', 'description',
+            'photo', 'photo_renditions',
+        ]
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """Query parameters for nearby restaurant search"""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    radius = serializers.FloatField(min_value=0.01, max_value=100, default=5)
+    limit = serializers.IntegerField(min_value=1, max_value=200, default=50)
+
+
+class ItemFilterSerializer(serializers.Serializer):
+    """Query parameters for tag-filtered item listing (tags comma separated)"""
+    restaurant = serializers.IntegerField(required=False)
+    include = serializers.CharField(required=False, default='')
+    exclude = serializers.CharField(required=False, default='')
+
+
+class ItemSearchQuerySerializer(serializers.Serializer):
+    """Query parameters for menu search; lat/lng/radius limit results to nearby restaurants"""
+    q = serializers.CharField(max_length=200)
+    restaurant = serializers.IntegerField(required=False)
+    include = serializers.CharField(required=False, default='')
+    exclude = serializers.CharField(required=False, default='')
+    lat = serializers.FloatField(min_value=-90, max_value=90, required=False)
+    lng = serializers.FloatField(min_value=-180, max_value=180, required=False)
+    radius = serializers.FloatField(min_value=0.01, max_value=100, default=5)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+    
+    def validate(self, attrs):
+        if ('lat' in attrs) != ('lng' in attrs):
+            raise serializers.ValidationError('lat and lng must be given together')
+        return attrs
+
+
+class ItemSerializer(serializers.ModelSerializer):
+    """Menu item with nutrition"""
+    photo_renditions = PhotoRenditionsField()
+    
+    class Meta:
+        model = Item
+        fields = [
+            'id', 'restaurant', 'name', 'description', 'photo', 'photo_renditions', 'price',
+            'totalprotein', 'totalgreens', 'totalcarb', 'totalfat', 'totalcalories',
+        ]
+
+
+class MenuImportRowSerializer(serializers.Serializer):
+    """One imported menu row; missing nutrition values take the model defaults"""
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0)
+    totalprotein = serializers.IntegerField(min_value=0, default=0)
+    totalgreens = serializers.IntegerField(min_value=0, default=0)
+    totalcarb = serializers.IntegerField(min_value=0, default=0)
+    totalfat = serializers.IntegerField(min_value=0, default=0)
+    totalcalories = serializers.IntegerField(min_value=0, default=0)
+    tags = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+
+
+class MenuImportQuerySerializer(serializers.Serializer):
+    """Query parameters for a menu import; file_format defaults to the uploaded file's extension"""
+    file_format = serializers.ChoiceField(choices=['csv', 'jsonl'], required=False)
+    dry_run = serializers.BooleanField(default=False)
@@ -0,0 +1,105 @@
+# restaurants/signals.py
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .catalog import catalog
+from .images import needs_renditions, schedule_renditions
+from .models import Item, Restaurant, Tag
+from .search import index_items, remove_items
+from .snapshots import refresh_menu_snapshots, restaurants_of_items
+from .tagbits import recompute_tag_masks
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_catalog(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Any Item or Tag change invalidates the tag maps and cached menus once it commits
+    Connected before the receivers below, which rebuild menu snapshots from the catalog
+    """
+    catalog.invalidate_on_commit(using)
+
+
+@receiver(m2m_changed, sender=Item.tags.through)
+def invalidate_catalog_on_tags(sender, action, using=DEFAULT_DB_ALIAS, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        catalog.invalidate_on_commit(using)
+
+
+def _tags_changed(item_ids):
+    recompute_tag_masks(item_ids)
+    index_items(item_ids)
+    refresh_menu_snapshots(restaurants_of_items(item_ids))
+
+
+@receiver(m2m_changed, sender=Item.tags.through)
+def sync_item_tag_mask(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep Item.tag_mask and the search index in sync when tags are added, removed or cleared"""
+    if not reverse:
+        # item.tags.add(...) / remove / clear / set
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _tags_changed([instance.pk])
+        return
+    
+    # tag.items.add(...) / remove / clear
+    if action == 'pre_clear':
+        instance._cleared_item_ids = list(instance.items.values_list('id', flat=True))
+    elif action == 'post_clear':
+        _tags_changed(getattr(instance, '_cleared_item_ids', []))
+    elif action in ('post_add', 'post_remove'):
+        _tags_changed(pk_set or [])
+
+
+@receiver(pre_delete, sender=Tag)
+def remember_tagged_items(sender, instance, **kwargs):
+    # The item_tags rows cascade away without m2m_changed, so note the items first
+    instance._tagged_item_ids = list(instance.items.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def drop_deleted_tag_bit(sender, instance, **kwargs):
+    """Clear a deleted tag's bit so it can be reused by a new tag, and drop its name from the search index"""
+    if instance.bit is not None:
+        bit = 1 << instance.bit
+        Item.objects.alias(
+            _bit=F('tag_mask').bitand(bit),
+        ).exclude(_bit=0).update(tag_mask=F('tag_mask').bitand(~bit))
+    item_ids = getattr(instance, '_tagged_item_ids', [])
+    index_items(item_ids)
+    refresh_menu_snapshots(restaurants_of_items(item_ids))
+
+
+@receiver(post_save, sender=Item)
+def index_saved_item(sender, instance, raw=False, **kwargs):
+    """Reindex an item's name and description, and rebuild its restaurant's menu snapshot"""
+    if not raw:
+        index_items([instance.pk])
+        refresh_menu_snapshots([instance.restaurant_id])
+
+
+@receiver(post_delete, sender=Item)
+def unindex_deleted_item(sender, instance, **kwargs):
+    remove_items([instance.pk])
+    refresh_menu_snapshots([instance.restaurant_id])
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag(sender, instance, created, raw=False, **kwargs):
+    """Items carry their tag names in the search index and menu snapshots"""
+    if not created and not raw:
+        item_ids = list(instance.items.values_list('id', flat=True))
+        index_items(item_ids)
+        refresh_menu_snapshots(restaurants_of_items(item_ids))
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=Restaurant)
+def queue_photo_renditions(sender, instance, raw=False, **kwargs):
+    """Resize a new or replaced photo in the background once the save commits"""
+    if not raw and needs_renditions(instance):
+        schedule_renditions(instance)
@@ -0,0 +1,117 @@
+# restaurants/snapshots.py
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .catalog import catalog
+from .images import rendition_urls
+
+
+def menu_rows(restaurant_id):
+    """Menu items as served by the API: price as a string, tag names, rendition URLs"""
+    rows = []
+    for item in catalog.menu(restaurant_id):
+        row = {key: value for key, value in item.items() if key not in ('tag_mask', 'photo_renditions')}
+        row['price'] = str(item['price'])
+        row['photo_renditions'] = rendition_urls(item['photo_renditions'])
+        row['tags'] = catalog.tag_names(item['tag_ids'])
+        rows.append(row)
+    return rows
+
+
+def build_menu_snapshot(restaurant_id):
+    """
+    Serialize a restaurant's menu and store it with its ETag
+    Returns the MenuSnapshot, or None if the restaurant doesn't exist.
+    The ETag is a hash of the payload, so rebuilding an unchanged menu keeps
+    clients' cached copies valid.
+    """
+    from .models import MenuSnapshot, Restaurant
+
+    rows = menu_rows(restaurant_id)
+    if not rows and not Restaurant.objects.using(DEFAULT_DB_ALIAS).filter(pk=restaurant_id).exists():
+        return None
+    payload = json.dumps(rows, cls=DjangoJSONEncoder, separators=(',', ':'))
+    snapshot = MenuSnapshot(
+        restaurant_id=restaurant_id,
+        payload=payload,
+        etag=hashlib.sha256(payload.encode()).hexdigest()[:32],
+        item_count=len(rows),
+    )
+    MenuSnapshot.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [snapshot],
+        update_conflicts=True,
+        unique_fields=['restaurant'],
+        update_fields=['payload', 'etag', 'item_count', 'built_at'],
+    )
+    return snapshot
+
+
+class _PendingRebuild:
+    """on_commit callback collecting the restaurants changed in one transaction"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.restaurant_ids = set()
+
+    def queued(self):
+        # Rolling back the transaction (or the savepoint it was queued in) drops the callback
+        return any(func is self for _, func, _ in self.connection.run_on_commit)
+
+    def __call__(self):
+        if getattr(self.connection, _PENDING_ATTR, None) is self:
+            delattr(self.connection, _PENDING_ATTR)
+        for restaurant_id in sorted(self.restaurant_ids):
+            build_menu_snapshot(restaurant_id)
+
+
+_PENDING_ATTR = '_pending_menu_snapshots'
+
+
+def refresh_menu_snapshots(restaurant_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Rebuild snapshots once the current transaction commits (immediately outside one)
+    Restaurants are collected per transaction, so however many items and tags
+    it changes, each menu is rebuilt once.
+    """
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id is not None}
+    if not restaurant_ids:
+        return
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        for restaurant_id in sorted(restaurant_ids):
+            build_menu_snapshot(restaurant_id)
+        return
+
+    pending = getattr(connection, _PENDING_ATTR, None)
+    if pending is None or not pending.queued():
+        pending = _PendingRebuild(connection)
+        setattr(connection, _PENDING_ATTR, pending)
+        transaction.on_commit(pending, using=using)
+    pending.restaurant_ids.update(restaurant_ids)
+
+
+def restaurants_of_items(item_ids):
+    from .models import Item
+
+    item_ids = list(item_ids)
+    if not item_ids:
+        return []
+    return Item.objects.using(DEFAULT_DB_ALIAS).filter(id__in=item_ids).values_list('restaurant_id', flat=True).distinct()
+
+
+def rebuild_menu_snapshots(restaurant_ids=None):
+    """Rebuild snapshots for the given restaurants (all when None); returns how many were built"""
+    from .models import Restaurant
+
+    if restaurant_ids is None:
+        restaurant_ids = Restaurant.objects.using(DEFAULT_DB_ALIAS).order_by('id').values_list('id', flat=True)
+    built = 0
+    for restaurant_id in restaurant_ids:
+        if build_menu_snapshot(restaurant_id) is not None:
+            built += 1
+    return built
+
@@ -0,0 +1,96 @@
+# restaurants/tagbits.py
+
+from django.db.models import F, Q
+
+# Bits 0-62 of a signed 64-bit column (bit 63 would flip the sign)
+MAX_TAG_BITS = 63
+
+
+def next_free_tag_bit():
+    """Return the lowest unused tag bit, or None when all bits are taken"""
+    from .models import Tag
+
+    used = set(Tag.objects.exclude(bit__isnull=True).values_list('bit', flat=True))
+    for bit in range(MAX_TAG_BITS):
+        if bit not in used:
+            return bit
+    return None
+
+
+def mask_from_bits(bits):
+    """OR together a collection of bit positions"""
+    mask = 0
+    for bit in bits:
+        if bit is not None:
+            mask |= 1 << bit
+    return mask
+
+
+def recompute_tag_masks(item_ids):
+    """Rebuild Item.tag_mask for the given items from their tag rows"""
+    from .models import Item
+
+    item_ids = set(item_ids)
+    if not item_ids:
+        return
+    masks = dict.fromkeys(item_ids, 0)
+    rows = Item.tags.through.objects.filter(item_id__in=item_ids).values_list('item_id', 'tag__bit')
+    for item_id, bit in rows:
+        if bit is not None:
+            masks[item_id] |= 1 << bit
+    items = [Item(id=item_id, tag_mask=mask) for item_id, mask in masks.items()]
+    Item.objects.bulk_update(items, ['tag_mask'], batch_size=500)
+
+
+def resolve_tags(tag_names):
+    """
+    Split tag names into (mask, unbitted_ids, missing_names)
+    Tags without a bit are returned by id so callers can fall back to a join
+    """
+    from .catalog import catalog
+
+    found, missing = catalog.tag_entries(tag_names)
+    mask = 0
+    unbitted = []
+    for tag_id, bit in found.values():
+        if bit is None:
+            unbitted.append(tag_id)
+        else:
+            mask |= 1 << bit
+    return mask, unbitted, missing
+
+
+def filter_items_by_tags(queryset=None, include=(), exclude=()):
+    """
+    Filter items that have every tag in include and none of the tags in exclude
+    e.g. filter_items_by_tags(include=['Thai', 'Spicy'], exclude=['Peanuts'])
+
+    Both sides collapse into bitwise tests on Item.tag_mask, so there is
+    no join through the item_tags table however many tags are given
+    """
+    from .models import Item
+
+    if queryset is None:
+        queryset = Item.objects.all()
+
+    include_mask, include_unbitted, include_missing = resolve_tags(include)
+    exclude_mask, exclude_unbitted, _ = resolve_tags(exclude)
+
+    # An unknown required tag can never match
+    if include_missing:
+        return queryset.none()
+
+    if include_mask:
+        queryset = queryset.alias(
+            _include_bits=F('tag_mask').bitand(include_mask),
+        ).filter(_include_bits=include_mask)
+    if exclude_mask:
+        queryset = queryset.alias(
+            _exclude_bits=F('tag_mask').bitand(exclude_mask),
+        ).filter(_exclude_bits=0)
+
+    for tag_id in include_unbitted:
+        queryset = queryset.filter(tags__id=tag_id)
+    if exclude_unbitted:
+        queryset = queryset.exclude(Q(tags__id__in=exclude_unbitted))
+    return queryset
@@ -1,3 +1,338 @@
-from django.test import TestCase
+# restaurants/tests.py
 
-# Create your tests here.
+import io
+import json
+from decimal import Decimal
+from itertools import combinations
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from config.profiling import QueryBudgetExceeded
+from users.models import User
+from . import menu_io, search
+from .catalog import Catalog, catalog
+from .checks import check_cache_client, check_shared_cache
+from .models import Item, MenuSnapshot, Restaurant, Tag
+from .search import search_items
+from .snapshots import rebuild_menu_snapshots
+from .tagbits import filter_items_by_tags, recompute_tag_masks
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class QueryBudgetTests(TestCase):
+    """Budgeted endpoints stay within settings.QUERY_BUDGETS (strict mode raises otherwise)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Budget Bistro', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        tags = [Tag.objects.create(name=name) for name in ('Thai', 'Spicy')]
+        for index in range(5):
+            item = Item.objects.create(restaurant=cls.restaurant, name=f'Dish {index}', price=Decimal('9.50'))
+            item.tags.set(tags[:index % 3])
+
+    def test_menu_within_budget(self):
+        response = self.client.get(reverse('restaurant-menu', args=[self.restaurant.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 5)
+
+    def test_item_list_within_budget(self):
+        response = self.client.get(reverse('item-list'), {'restaurant': self.restaurant.pk, 'include': 'Thai'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    @override_settings(QUERY_BUDGETS={'restaurant-menu': 0})
+    def test_over_budget_raises(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('restaurant-menu', args=[self.restaurant.pk]))
+
+
+class TagFilterTests(TestCase):
+    """The tag_mask filter returns what the equivalent join through item_tags returns"""
+
+    NAMES = ('Thai', 'Spicy', 'Vegan', 'Peanuts', 'Halal')
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        restaurant = Restaurant.objects.create(
+            user=owner, name='Mask Kitchen', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.tags = [Tag.objects.create(name=name) for name in cls.NAMES]
+        # Every combination of tags, on one item each
+        for combo in range(2 ** len(cls.tags)):
+            item = Item.objects.create(restaurant=restaurant, name=f'Dish {combo}', price=Decimal('5.00'))
+            item.tags.set([tag for index, tag in enumerate(cls.tags) if combo & 1 << index])
+        # A tag without a bit, as once all 63 are taken: filtered through the join instead
+        Tag.objects.filter(name='Halal').update(bit=None)
+        recompute_tag_masks(Item.objects.values_list('id', flat=True))
+
+    def setUp(self):
+        catalog.invalidate()
+
+    def joined(self, include, exclude):
+        queryset = Item.objects.all()
+        for name in include:
+            queryset = queryset.filter(tags__name=name)
+        if exclude:
+            queryset = queryset.exclude(tags__name__in=exclude)
+        return set(queryset.values_list('id', flat=True))
+
+    def assert_matches_join(self):
+        names = [tag.name for tag in Tag.objects.all()]
+        cases = [()] + [combo for size in (1, 2) for combo in combinations(names, size)]
+        for include in cases:
+            for exclude in cases[:len(names) + 1]:
+                with self.subTest(include=include, exclude=exclude):
+                    filtered = filter_items_by_tags(include=include, exclude=exclude)
+                    self.assertEqual(set(filtered.values_list('id', flat=True)), self.joined(include, exclude))
+
+    def test_matches_join(self):
+        self.assert_matches_join()
+
+    def test_matches_join_after_tag_changes(self):
+        thai, spicy, _, peanuts, _ = self.tags
+        Item.objects.get(name='Dish 3').tags.remove(spicy)
+        peanuts.items.clear()
+        thai.delete()
+        catalog.invalidate()
+        self.assert_matches_join()
+
+    def test_unknown_tag(self):
+        self.assertFalse(filter_items_by_tags(include=['Thai', 'Nope']).exists())
+        self.assertEqual(filter_items_by_tags(exclude=['Nope']).count(), Item.objects.count())
+
+
+class SearchTests(TestCase):
+    """Full-text ranking (name over tags over description), index upkeep and the icontains fallback"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant, cls.other = [
+            Restaurant.objects.create(user=owner, name=name, latitude=Decimal('47.61'), longitude=Decimal('-122.33'))
+            for name in ('Search Spot', 'Elsewhere')
+        ]
+        cls.tag = Tag.objects.create(name='Curry')
+        cls.named = Item.objects.create(restaurant=cls.restaurant, name='Green Curry', price=Decimal('11.00'))
+        cls.tagged = Item.objects.create(restaurant=cls.restaurant, name='Massaman Bowl', price=Decimal('12.00'))
+        cls.tagged.tags.add(cls.tag)
+        cls.described = Item.objects.create(
+            restaurant=cls.restaurant, name='Rice Plate', description='Jasmine rice with a side of curry sauce',
+            price=Decimal('9.00'),
+        )
+        cls.elsewhere = Item.objects.create(restaurant=cls.other, name='Curry Puffs', price=Decimal('6.00'))
+        Item.objects.create(restaurant=cls.restaurant, name='Spring Rolls', price=Decimal('5.00'))
+
+    def names(self, text, queryset=None):
+        return [item.name for item, _ in search_items(text, queryset)]
+
+    def test_name_beats_tags_beats_description(self):
+        results = search_items('curry', Item.objects.filter(restaurant=self.restaurant))
+        self.assertEqual([item.pk for item, _ in results], [self.named.pk, self.tagged.pk, self.described.pk])
+        scores = [score for _, score in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        self.assertGreater(scores[0], scores[-1])
+
+    def test_terms_are_prefixes_and_all_required(self):
+        self.assertEqual(len(self.names('curr')), 4)
+        self.assertEqual(self.names('green curry'), ['Green Curry'])
+        self.assertEqual(self.names('jasmine sauce'), ['Rice Plate'])
+        self.assertEqual(self.names('curry pizza'), [])
+
+    def test_queryset_and_limit_narrow_the_results(self):
+        self.assertEqual(self.names('curry', Item.objects.filter(restaurant=self.other)), ['Curry Puffs'])
+        self.assertEqual(self.names('curry', Item.objects.none()), [])
+        self.assertEqual(len(search_items('curry', limit=2)), 2)
+
+    def test_query_syntax_is_ignored(self):
+        self.assertEqual(self.names('"green" (curry*)'), ['Green Curry'])
+        self.assertEqual(self.names('  ( ) '), [])
+
+    def test_index_follows_edits(self):
+        self.named.name = 'Red Curry'
+        self.named.save()
+        self.assertIn('Red Curry', self.names('red'))
+        self.tag.name = 'Kari'
+        self.tag.save()
+        self.assertEqual(self.names('kari'), ['Massaman Bowl'])
+        self.described.delete()
+        self.assertNotIn('Rice Plate', self.names('rice'))
+
+    def test_fallback_without_index(self):
+        with mock.patch.object(search, 'search_index', return_value=None):
+            results = search_items('curry', Item.objects.filter(restaurant=self.restaurant))
+        # icontains on name and description, alphabetical, no score
+        self.assertEqual([item.name for item, _ in results], ['Green Curry', 'Rice Plate'])
+        self.assertEqual({score for _, score in results}, {0.0})
+
+    def test_search_endpoint(self):
+        response = self.client.get(reverse('item-search'), {'q': 'curry', 'restaurant': self.restaurant.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['Green Curry', 'Massaman Bowl', 'Rice Plate'])
+
+
+class MenuImportTests(TestCase):
+    """Importing onto existing items"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        cls.restaurant = Restaurant.objects.create(
+            user=owner, name='Import Inn', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        cls.tag = Tag.objects.create(name='Thai')
+        cls.item = Item.objects.create(
+            restaurant=cls.restaurant, name='Pad Thai', description='Rice noodles', price=Decimal('12.00'),
+            totalprotein=9, totalcalories=640,
+        )
+        cls.item.tags.add(cls.tag)
+
+    def import_csv(self, text):
+        return menu_io.import_menu(self.restaurant.pk, io.StringIO(text), 'csv')
+
+    def assert_partial_row_keeps_other_columns(self):
+        report = self.import_csv('name,price\nPad Thai,13.50\n')
+        self.assertEqual((report['updated'], report['error_count']), (1, 0))
+        item = Item.objects.get(pk=self.item.pk)
+        self.assertEqual(item.price, Decimal('13.50'))
+        self.assertEqual((item.description, item.totalprotein, item.totalcalories), ('Rice noodles', 9, 640))
+        self.assertEqual(list(item.tags.values_list('name', flat=True)), ['Thai'])
+        self.assertNotEqual(item.tag_mask, 0)
+
+    def test_partial_row_keeps_other_columns(self):
+        self.assert_partial_row_keeps_other_columns()
+
+    def test_partial_row_keeps_other_columns_with_bulk_update(self):
+        with mock.patch.object(menu_io, '_update_from_values_supported', return_value=False):
+            self.assert_partial_row_keeps_other_columns()
+
+    def test_supplied_columns_are_written(self):
+        self.import_csv('name,price,totalprotein,tags\nPad Thai,12.00,0,\n')
+        item = Item.objects.get(pk=self.item.pk)
+        self.assertEqual((item.totalprotein, item.description, item.tag_mask), (0, 'Rice noodles', 0))
+        self.assertFalse(item.tags.exists())
+
+
+class MenuImportSnapshotTests(TransactionTestCase):
+    """The menu snapshot rebuilt when an import commits shows the imported rows"""
+
+    def setUp(self):
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        self.restaurant = Restaurant.objects.create(
+            user=owner, name='Snapshot Shack', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        Item.objects.create(restaurant=self.restaurant, name='A', price=Decimal('1.00'))
+
+    def snapshot(self):
+        return MenuSnapshot.objects.get(restaurant=self.restaurant)
+
+    def test_snapshot_after_import(self):
+        # Warm this process's catalog with the menu as it was before the import
+        self.assertEqual([item['price'] for item in catalog.menu(self.restaurant.pk)], [Decimal('1.00')])
+        etag = self.snapshot().etag
+
+        menu_io.import_menu(self.restaurant.pk, io.StringIO('name,price\nA,5.00\nB,2.00\n'), 'csv')
+
+        snapshot = self.snapshot()
+        self.assertNotEqual(snapshot.etag, etag)
+        prices = {row['name']: row['price'] for row in json.loads(snapshot.payload)}
+        self.assertEqual(prices, {'A': '5.00', 'B': '2.00'})
+
+
+class MenuSnapshotTests(TransactionTestCase):
+    """
+    The menu endpoint's ETag follows the menu's content, and a matching If-None-Match gets a 304
+    Edits commit for real, as snapshots are rebuilt on commit
+    """
+
+    def setUp(self):
+        catalog.invalidate()
+        owner = User.objects.create_user(username='owner', password='x', type='owner')
+        self.restaurant = Restaurant.objects.create(
+            user=owner, name='Cache Corner', latitude=Decimal('47.61'), longitude=Decimal('-122.33'),
+        )
+        self.item = Item.objects.create(restaurant=self.restaurant, name='Soup', price=Decimal('4.00'))
+        self.url = reverse('restaurant-menu', args=[self.restaurant.pk])
+
+    def get(self, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(self.url, headers=headers)
+
+    def test_not_modified(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.json()], ['Soup'])
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header), self.assertNumQueries(1):
+                response = self.get(header)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get('"other"').status_code, 200)
+
+    def test_etag_changes_with_the_menu(self):
+        etag = self.get()['ETag']
+        # An unchanged menu rebuilds to the same ETag, so cached copies stay valid
+        rebuild_menu_snapshots([self.restaurant.pk])
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        self.item.price = Decimal('4.50')
+        self.item.save()
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['price'], '4.50')
+
+        etag = response['ETag']
+        self.item.tags.add(Tag.objects.create(name='Vegan'))
+        response = self.get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]['tags'], ['Vegan'])
+
+    def test_missing_snapshot_is_built_on_request(self):
+        MenuSnapshot.objects.all().delete()
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(MenuSnapshot.objects.get(restaurant=self.restaurant).etag, response['ETag'].strip('"'))
+        missing = reverse('restaurant-menu', args=[self.restaurant.pk + 100])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+
+@override_settings(CATALOG_VERSION_CHECK_SECONDS=0)
+class CatalogVersionTests(TestCase):
+    """A bump by one worker's catalog reaches the others through the shared cache"""
+
+    def test_other_worker_rebuilds_after_invalidate(self):
+        tag = Tag.objects.create(name='Thai')
+        worker_a, worker_b = Catalog(), Catalog()
+        self.assertEqual(worker_b.tag_name(tag.pk), 'Thai')
+        # queryset.update() skips the signals, like the bulk writes that call invalidate() themselves
+        Tag.objects.filter(pk=tag.pk).update(name='Thai Street')
+        self.assertEqual(worker_b.tag_name(tag.pk), 'Thai')
+        worker_a.invalidate()
+        self.assertEqual(worker_b.tag_name(tag.pk), 'Thai Street')
+
+    def test_deploy_check_wants_a_shared_cache(self):
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with self.settings(CACHES=local):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['restaurants.E001'])
+        with self.settings(CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_redis_cache_needs_the_client(self):
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+        with self.settings(CACHES=shared):
+            with mock.patch('importlib.util.find_spec', return_value=None):
+                self.assertEqual([error.id for error in check_cache_client(None)], ['restaurants.E002'])
+            with mock.patch('importlib.util.find_spec', return_value=object()):
+                self.assertEqual(check_cache_client(None), [])
+        self.assertEqual(check_cache_client(None), [])
@@ -0,0 +1,13 @@
+# restaurants/urls.py
+
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('nearby/', views.nearby, name='restaurant-nearby'),
+    path('items/', views.items, name='item-list'),
+    path('search/', views.search, name='item-search'),
+    path('<int:restaurant_id>/menu/', views.menu, name='restaurant-menu'),
+    path('<int:restaurant_id>/menu/export.<str:fmt>', views.menu_export, name='menu-export'),
+    path('<int:restaurant_id>/menu/import/', views.menu_import, name='menu-import'),
+]
@@ -1,3 +1,189 @@
-from django.shortcuts import render
+# restaurants/views.py
 
-# Create your views here.
+import io
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from config.async_api import error_response, json_response, validate_query
+from .geo import anearby_restaurants, nearby_restaurants
+from .menu_io import FORMATS as MENU_FORMATS, export_menu, format_for_name, import_menu
+from .models import Item, MenuSnapshot, Restaurant
+from .pagination import ItemPagination
+from .search import search_items
+from .snapshots import build_menu_snapshot
+from .serializers import (
+    RestaurantSerializer, NearbyQuerySerializer, ItemSerializer, ItemFilterSerializer, ItemSearchQuerySerializer,
+    MenuImportQuerySerializer,
+)
+from .tagbits import filter_items_by_tags
+
+
+def _split_csv(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+@require_GET
+async def nearby(request):
+    """
+    Restaurants within a radius (km) of a point, nearest first
+    GET /api/restaurants/nearby/?lat=47.61&lng=-122.33&radius=5
+    """
+    data, error = validate_query(NearbyQuerySerializer, request)
+    if error:
+        return error
+    
+    results = await anearby_restaurants(data['lat'], data['lng'], data['radius'], limit=data['limit'])
+    payload = []
+    for restaurant, distance in results:
+        row = RestaurantSerializer(restaurant).data
+        row['distance_km'] = round(distance, 3)
+        payload.append(row)
+    return json_response(payload)
+
+
+@require_GET
+async def items(request):
+    """
+    Menu items filtered by tags, a page at a time (id order)
+    GET /api/restaurants/items/?restaurant=1&include=Thai,Spicy&exclude=Peanuts&page_size=50
+    """
+    data, error = validate_query(ItemFilterSerializer, request)
+    if error:
+        return error
+    
+    queryset = Item.objects.all()
+    if 'restaurant' in data:
+        queryset = queryset.filter(restaurant_id=data['restaurant'])
+    # Tag names resolve through the catalog, which may need to load from the database
+    queryset = await sync_to_async(filter_items_by_tags)(
+        queryset,
+        include=_split_csv(data['include']),
+        exclude=_split_csv(data['exclude']),
+    )
+    paginator = ItemPagination()
+    page = await sync_to_async(paginator.paginate_queryset)(queryset, Request(request))
+    return json_response(paginator.get_paginated_response(ItemSerializer(page, many=True).data).data)
+
+
+@require_GET
+async def menu(request, restaurant_id):
+    """
+    Full menu for a restaurant, served from its precomputed snapshot
+    GET /api/restaurants/<id>/menu/
+    One primary-key lookup; answers 304 when If-None-Match has the current ETag
+    """
+    row = await MenuSnapshot.objects.filter(restaurant_id=restaurant_id).values_list('payload', 'etag').afirst()
+    if row is None:
+        snapshot = await sync_to_async(build_menu_snapshot)(restaurant_id)
+        if snapshot is None:
+            return error_response('Not found.', status=404)
+        row = (snapshot.payload, snapshot.etag)
+    payload, etag = row
+    
+    etag = quote_etag(etag)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        # A 304 repeats the validator (RFC 9110 15.4.5)
+        not_modified['ETag'] = etag
+        return not_modified
+    response = HttpResponse(payload, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+@api_view(['GET'])
+def search(request):
+    """
+    Ranked full-text menu search, optionally narrowed by restaurant, tags and distance
+    GET /api/restaurants/search/?q=chicken+salad&exclude=Peanuts&lat=47.61&lng=-122.33&radius=5
+    """
+    params = ItemSearchQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    data = params.validated_data
+    
+    queryset = None
+    distances = {}
+    if 'lat' in data:
+        nearby_results = nearby_restaurants(data['lat'], data['lng'], data['radius'])
+        distances = {restaurant.pk: distance for restaurant, distance in nearby_results}
+        queryset = Item.objects.filter(restaurant_id__in=list(distances))
+    if 'restaurant' in data:
+        queryset = (queryset if queryset is not None else Item.objects.all()).filter(restaurant_id=data['restaurant'])
+    if data['include'] or data['exclude']:
+        queryset = filter_items_by_tags(
+            queryset,
+            include=_split_csv(data['include']),
+            exclude=_split_csv(data['exclude']),
+        )
+    
+    payload = []
+    for item, score in search_items(data['q'], queryset, limit=data['limit']):
+        row = ItemSerializer(item).data
+        row['score'] = round(score, 6)
+        if item.restaurant_id in distances:
+            row['distance_km'] = round(distances[item.restaurant_id], 3)
+        payload.append(row)
+    return Response(payload)
+
+
+
+@require_GET
+def menu_export(request, restaurant_id, fmt):
+    """
+    Stream an owner's menu as CSV or JSON lines, in the format menu_import accepts
+    GET /api/restaurants/<id>/menu/export.csv (or export.jsonl)
+    """
+    if not request.user.is_authenticated:
+        return error_response('Authentication credentials were not provided.', status=403)
+    owner_id = Restaurant.objects.filter(pk=restaurant_id).values_list('user_id', flat=True).first()
+    if owner_id is None or fmt not in MENU_FORMATS:
+        return error_response('Not found.', status=404)
+    if owner_id != request.user.pk:
+        return error_response('Not your restaurant', status=403)
+    
+    content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(export_menu(restaurant_id, fmt), content_type=f'{content_type}; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="menu-{restaurant_id}.{fmt}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([MultiPartParser])
+def menu_import(request, restaurant_id):
+    """
+    Create or update an owner's menu items from an uploaded CSV or JSON-lines file
+    POST /api/restaurants/<id>/menu/import/?dry_run=true (multipart, field "file")
+    Items are matched by name; returns counts, row errors and rows/sec
+    """
+    restaurant = get_object_or_404(Restaurant.objects.only('id', 'user_id'), pk=restaurant_id)
+    if restaurant.user_id != request.user.pk:
+        raise PermissionDenied('Not your restaurant')
+    
+    params = MenuImportQuerySerializer(data=request.query_params)
+    params.is_valid(raise_exception=True)
+    upload = request.FILES.get('file')
+    if upload is None:
+        raise ValidationError({'file': ['No file was submitted.']})
+    fmt = params.validated_data.get('file_format') or format_for_name(upload.name)
+    
+    stream = io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')
+    try:
+        report = import_menu(restaurant.pk, stream, fmt, dry_run=params.validated_data['dry_run'])
+    except UnicodeDecodeError:
+        raise ValidationError({'file': ['File is not UTF-8 text.']})
+    finally:
+        stream.detach()
+    status = 200 if report['created'] or report['updated'] or not report['error_count'] else 400
+    return Response(report, status=status)
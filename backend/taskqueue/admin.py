@@ -0,0 +1,23 @@
+# taskqueue/admin.py
+
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Task queue admin (rows are written by the queue and its workers)"""
+    list_display = ['id', 'name', 'status', 'attempts', 'run_after', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    search_fields = ['key']
+    readonly_fields = ['locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at']
+    show_full_result_count = False
+    actions = ['retry_now']
+    
+    @admin.action(description='Queue selected tasks to run again now')
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status=Task.RUNNING).update(
+            status=Task.QUEUED, run_after=timezone.now(), attempts=0, locked_by='', locked_at=None,
+        )
+        self.message_user(request, f'{updated} tasks queued')
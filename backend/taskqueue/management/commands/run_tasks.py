@@ -0,0 +1,62 @@
+# taskqueue/management/commands/run_tasks.py
+
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from taskqueue.queue import drain, prune, run_once, worker_id
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks (order side effects, ...) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run every due task, then exit')
+        parser.add_argument('--names', nargs='+', help='Only run these task names')
+        parser.add_argument('--claim-size', type=int, help='Tasks claimed per round (default: TASK_QUEUE setting)')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--prune-days', type=float, help='Also delete finished tasks older than this')
+
+    def handle(self, *args, **options):
+        worker = worker_id()
+        if options['prune_days'] is not None:
+            deleted = prune(timedelta(days=options['prune_days']))
+            self.stdout.write(f'  ✓ Pruned {deleted} finished tasks')
+        
+        start = time.perf_counter()
+        if options['once']:
+            succeeded, failed = drain(names=options['names'], worker=worker)
+            self.report(succeeded, failed, start)
+            return
+        
+        stopping = False
+        
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+        
+        signal.signal(signal.SIGTERM, stop)
+        self.stdout.write(f'Worker {worker} waiting for tasks (Ctrl-C to stop)')
+        succeeded = failed = 0
+        try:
+            while not stopping:
+                close_old_connections()
+                done, errors = run_once(worker, names=options['names'], limit=options['claim_size'])
+                succeeded += done
+                failed += errors
+                if done or errors:
+                    self.stdout.write(f'  ✓ {done} done, {errors} failed')
+                else:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.report(succeeded, failed, start)
+
+    def report(self, succeeded, failed, start):
+        elapsed = time.perf_counter() - start
+        rate = succeeded / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {succeeded} tasks done, {failed} failed in {elapsed:.1f}s ({rate:.0f}/s)'
+        ))
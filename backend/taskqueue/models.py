@@ -0,0 +1,48 @@
+# taskqueue/models.py
+
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """
+    One queued call of a registered task handler (see taskqueue/queue.py)
+    Rows are inserted in the caller's transaction, so a task only becomes
+    visible to workers once the work that queued it has committed.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100, help_text="Registered handler name")
+    payload = models.JSONField(default=dict, blank=True)
+    
+    # Queuing the same key twice is a no-op, for as long as the row is kept
+    key = models.CharField(max_length=200, unique=True, null=True, blank=True)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+    
+    class Meta:
+        db_table = 'task'
+        indexes = [
+            # Workers poll for due tasks in id order
+            models.Index(fields=['status', 'run_after', 'id'], name='task_due_idx'),
+        ]
@@ -0,0 +1,252 @@
+# taskqueue/queue.py
+
+import logging
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def _config():
+    return getattr(settings, 'TASK_QUEUE', {})
+
+
+class TaskHandler:
+    """A registered task: the function plus its retry and batching policy"""
+
+    def __init__(self, name, func, max_attempts, batch_size, retry_delay):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+
+    def call(self, payloads):
+        if self.batch_size > 1:
+            self.func(payloads)
+        else:
+            for payload in payloads:
+                self.func(**payload)
+
+    def backoff(self, attempts):
+        """Delay before the next attempt: retry_delay doubled after every failure"""
+        return timedelta(seconds=self.retry_delay * 2 ** max(0, attempts - 1))
+
+
+def task(name, max_attempts=5, batch_size=1, retry_delay=None):
+    """
+    Register a task handler under a name
+    With batch_size 1 the handler is called with each payload as keyword
+    arguments. With batch_size > 1 it is called with a list of up to that many
+    payloads, so a burst of identical jobs is handled in one call; if that
+    call raises, the batch is retried in halves to isolate the bad payloads.
+    Handlers run inside a transaction that also marks their tasks done, so
+    their database writes happen exactly once; retries only follow a rollback,
+    and a run whose tasks were requeued meanwhile is rolled back too.
+    """
+    def register(func):
+        if name in _handlers and _handlers[name].func is not func:
+            raise ValueError(f'Task {name!r} is already registered')
+        delay = retry_delay if retry_delay is not None else _config().get('RETRY_DELAY_SECONDS', 5)
+        _handlers[name] = TaskHandler(name, func, max_attempts, batch_size, delay)
+        return func
+    return register
+
+
+def get_handler(name):
+    return _handlers.get(name)
+
+
+def enqueue(name, payload=None, key=None, delay=None):
+    """Queue one task; see enqueue_many"""
+    enqueue_many(name, [payload or {}], keys=[key], delay=delay)
+
+
+def enqueue_many(name, payloads, keys=None, delay=None):
+    """
+    Queue tasks in the current transaction with one insert
+    Workers only see them once it commits. A task whose key is already in the
+    queue (queued, running, done or failed and not yet pruned) is skipped.
+    In eager mode (TASK_QUEUE['EAGER'], for tests) they run in this process
+    as soon as the transaction commits.
+    """
+    from .models import Task
+
+    if name not in _handlers:
+        raise ValueError(f'Unknown task {name!r}')
+    payloads = list(payloads)
+    if not payloads:
+        return
+    keys = list(keys) if keys is not None else [None] * len(payloads)
+    run_after = timezone.now() + timedelta(seconds=delay or 0)
+    Task.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [
+            Task(name=name, payload=payload, key=key, run_after=run_after)
+            for payload, key in zip(payloads, keys)
+        ],
+        ignore_conflicts=True,
+    )
+    if _config().get('EAGER'):
+        transaction.on_commit(lambda: drain(names=[name]), using=DEFAULT_DB_ALIAS)
+
+
+def worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+
+def requeue_stale():
+    """Put back tasks whose worker died mid-run (locked longer than LOCK_TIMEOUT_SECONDS)"""
+    from .models import Task
+
+    cutoff = timezone.now() - timedelta(seconds=_config().get('LOCK_TIMEOUT_SECONDS', 300))
+    return Task.objects.filter(status=Task.RUNNING, locked_at__lt=cutoff).update(
+        status=Task.QUEUED, locked_by='', locked_at=None,
+    )
+
+
+def claim(worker, names=None, limit=None):
+    """
+    Lock up to limit due tasks for a worker, oldest first
+    Uses SKIP LOCKED where the backend has it so workers never wait on each
+    other; elsewhere the status check in the UPDATE keeps a task from being
+    claimed twice. Claiming counts as an attempt.
+    """
+    from .models import Task
+
+    limit = limit or _config().get('CLAIM_SIZE', 200)
+    now = timezone.now()
+    due = Task.objects.filter(status=Task.QUEUED, run_after__lte=now).order_by('id')
+    if names:
+        due = due.filter(name__in=names)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        if connections[DEFAULT_DB_ALIAS].features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list('id', flat=True)[:limit])
+        if not ids:
+            return []
+        Task.objects.filter(id__in=ids, status=Task.QUEUED).update(
+            status=Task.RUNNING, locked_by=worker, locked_at=now, attempts=F('attempts') + 1,
+        )
+    return list(Task.objects.filter(id__in=ids, status=Task.RUNNING, locked_by=worker).order_by('id'))
+
+
+class _LockLost(Exception):
+    """Tasks of a running batch were requeued (and maybe claimed) by someone else meanwhile"""
+
+
+def _execute(handler, tasks):
+    """
+    Run one batch; returns (succeeded, failed) task counts
+    A failed batch is rolled back, split in half and each half run again,
+    down to single tasks, so one bad payload only fails (and retries) its
+    own task instead of every task batched with it.
+    The tasks are only marked done while this worker still holds them: if
+    requeue_stale() handed any to another worker during a slow run, the
+    handler's writes are rolled back and that worker's run is the one kept.
+    """
+    from .models import Task
+
+    ids = [task.pk for task in tasks]
+    worker = tasks[0].locked_by
+    try:
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            handler.call([task.payload for task in tasks])
+            marked = Task.objects.filter(id__in=ids, status=Task.RUNNING, locked_by=worker).update(
+                status=Task.DONE, finished_at=timezone.now(), locked_by='', last_error='',
+            )
+            if marked != len(ids):
+                raise _LockLost
+        return len(tasks), 0
+    except _LockLost:
+        logger.warning(
+            'Task %s: %s of %s tasks were requeued while running, rolled back',
+            handler.name, len(ids) - marked, len(ids),
+        )
+        # The ones still held go back to the queue rather than wait out the lock timeout
+        Task.objects.filter(id__in=ids, status=Task.RUNNING, locked_by=worker).update(
+            status=Task.QUEUED, locked_by='', locked_at=None,
+        )
+        return 0, 0
+    except Exception as exc:
+        if len(tasks) > 1:
+            logger.warning('Task %s failed for %s tasks, splitting the batch: %s', handler.name, len(tasks), exc)
+            middle = len(tasks) // 2
+            first, second = _execute(handler, tasks[:middle]), _execute(handler, tasks[middle:])
+            return first[0] + second[0], first[1] + second[1]
+        logger.exception('Task %s failed for task %s', handler.name, tasks[0].pk)
+        _failed(handler, tasks, f'{type(exc).__name__}: {exc}')
+        return 0, 1
+
+
+def _failed(handler, tasks, error):
+    """Requeue failed tasks with a backoff, or fail them for good after max_attempts (only while still held)"""
+    from .models import Task
+
+    now = timezone.now()
+    max_attempts = handler.max_attempts if handler is not None else 0
+    by_attempts = {}
+    for task in tasks:
+        by_attempts.setdefault((task.attempts, task.locked_by), []).append(task.pk)
+    for (attempts, worker), ids in by_attempts.items():
+        if attempts >= max_attempts:
+            fields = {'status': Task.FAILED, 'finished_at': now}
+        else:
+            fields = {'status': Task.QUEUED, 'run_after': now + handler.backoff(attempts)}
+        Task.objects.filter(id__in=ids, status=Task.RUNNING, locked_by=worker).update(
+            locked_by='', locked_at=None, last_error=error[:2000], **fields,
+        )
+
+
+def run_claimed(tasks):
+    """Run claimed tasks, handler by handler in batches; returns (succeeded, failed) task counts"""
+    succeeded = failed = 0
+    by_name = {}
+    for task in tasks:
+        by_name.setdefault(task.name, []).append(task)
+    for name, group in by_name.items():
+        handler = get_handler(name)
+        if handler is None:
+            _failed(None, group, f'No handler registered for {name!r}')
+            failed += len(group)
+            continue
+        for start in range(0, len(group), handler.batch_size):
+            done, errors = _execute(handler, group[start:start + handler.batch_size])
+            succeeded += done
+            failed += errors
+    return succeeded, failed
+
+
+def run_once(worker=None, names=None, limit=None):
+    """Claim and run one round of due tasks; returns (succeeded, failed)"""
+    requeue_stale()
+    return run_claimed(claim(worker or worker_id(), names=names, limit=limit))
+
+
+def drain(names=None, worker=None):
+    """Run due tasks until none are left (eager mode, tests, run_tasks --once)"""
+    worker = worker or worker_id()
+    succeeded = failed = 0
+    while True:
+        done, errors = run_once(worker, names=names)
+        if not done and not errors:
+            return succeeded, failed
+        succeeded += done
+        failed += errors
+
+
+def prune(older_than):
+    """Delete finished tasks older than a timedelta; their keys can then be queued again"""
+    from .models import Task
+
+    cutoff = timezone.now() - older_than
+    deleted, _ = Task.objects.filter(status__in=[Task.DONE, Task.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
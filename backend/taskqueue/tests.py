@@ -0,0 +1,101 @@
+# taskqueue/tests.py
+
+from datetime import timedelta
+
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import queue
+from .models import Task
+
+# Calls seen by the handlers below, cleared per test
+calls = []
+
+
+@queue.task('taskqueue.tests.record', max_attempts=3, retry_delay=10)
+def record(name):
+    calls.append([name])
+    if name.startswith('bad'):
+        raise ValueError(name)
+    Group.objects.create(name=name)
+
+
+@queue.task('taskqueue.tests.record_batch', batch_size=8, retry_delay=10)
+def record_batch(payloads):
+    names = [payload['name'] for payload in payloads]
+    calls.append(names)
+    if any(name.startswith('bad') for name in names):
+        raise ValueError('bad payload')
+    Group.objects.bulk_create([Group(name=name) for name in names])
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def names(self):
+        return sorted(Group.objects.values_list('name', flat=True))
+
+    def test_retry_with_backoff_then_fail(self):
+        queue.enqueue('taskqueue.tests.record', {'name': 'bad'})
+        task = Task.objects.get()
+        for attempt, delay in ((1, 10), (2, 20)):
+            started = timezone.now()
+            with self.assertLogs('taskqueue.queue', 'ERROR'):
+                self.assertEqual(queue.run_once('worker'), (0, 1))
+            task.refresh_from_db()
+            self.assertEqual((task.status, task.attempts, task.last_error), (Task.QUEUED, attempt, 'ValueError: bad'))
+            self.assertGreaterEqual(task.run_after, started + timedelta(seconds=delay))
+            self.assertLess(task.run_after, started + timedelta(seconds=delay + 5))
+            # Not due yet
+            self.assertEqual(queue.run_once('worker'), (0, 0))
+            Task.objects.update(run_after=timezone.now())
+        with self.assertLogs('taskqueue.queue', 'ERROR'):
+            self.assertEqual(queue.run_once('worker'), (0, 1))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts, task.locked_by), (Task.FAILED, 3, ''))
+
+    def test_failed_batch_is_split_down_to_the_bad_payloads(self):
+        names = [f'good-{index}' for index in range(8)]
+        names[2], names[5] = 'bad-2', 'bad-5'
+        queue.enqueue_many('taskqueue.tests.record_batch', [{'name': name} for name in names])
+        with self.assertLogs('taskqueue.queue', 'WARNING'):
+            self.assertEqual(queue.run_once('worker'), (6, 2))
+        self.assertEqual(self.names(), sorted(name for name in names if name.startswith('good')))
+        self.assertEqual(calls[0], names)
+        self.assertEqual(len(calls), 1 + 2 + 4 + 4)  # 8, then halves down to the single bad payloads
+        statuses = dict(Task.objects.values_list('payload__name', 'status'))
+        self.assertEqual({name for name, status in statuses.items() if status == Task.QUEUED}, {'bad-2', 'bad-5'})
+
+    def test_tasks_requeued_while_running_are_rolled_back(self):
+        queue.enqueue_many('taskqueue.tests.record_batch', [{'name': 'a'}, {'name': 'b'}])
+        slow = queue.claim('slow-worker')
+        # While it runs, its lock times out and another worker claims the tasks
+        Task.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        queue.requeue_stale()
+        other = queue.claim('other-worker')
+        with self.assertLogs('taskqueue.queue', 'WARNING') as logs:
+            self.assertEqual(queue.run_claimed(slow), (0, 0))
+        self.assertIn('2 of 2 tasks were requeued while running', logs.output[0])
+        self.assertEqual(self.names(), [])
+        self.assertEqual(set(Task.objects.values_list('status', 'locked_by')), {(Task.RUNNING, 'other-worker')})
+        # The other worker's run is the one that counts: side effects once
+        self.assertEqual(queue.run_claimed(other), (2, 0))
+        self.assertEqual(self.names(), ['a', 'b'])
+
+    def test_keys_deduplicate(self):
+        queue.enqueue('taskqueue.tests.record', {'name': 'once'}, key='once')
+        queue.enqueue('taskqueue.tests.record', {'name': 'once'}, key='once')
+        self.assertEqual(queue.drain(), (1, 0))
+        self.assertEqual(self.names(), ['once'])
+
+    @override_settings(TASK_QUEUE={'EAGER': True, 'CLAIM_SIZE': 200})
+    def test_eager_mode_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            queue.enqueue('taskqueue.tests.record', {'name': 'eager'})
+            # Nothing runs before the queuing transaction commits
+            self.assertEqual(self.names(), [])
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.names(), ['eager'])
+        self.assertEqual(Task.objects.get().status, Task.DONE)